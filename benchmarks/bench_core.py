@@ -0,0 +1,201 @@
+"""Times the hot paths of the engine on seeded boards, for orders 2 to 8.
+
+Results are microseconds per call, saved as JSON so that two runs can be
+compared: timings slower than the baseline by more than the threshold are
+reported as regressions, and make the script exit with status 1.
+
+Usage: python -m benchmarks.bench_core [-o results.json] [-b baseline.json]
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import timeit
+from typing import Dict, List, Tuple, Callable
+
+from nutok.tokens import TokenStack
+from nutok.directions import Vertical, Horizontal
+from nutok.board import Board
+from nutok.simulation import try_a_game
+
+ORDERS = range(2, 9)
+# Sizes of the boards, as fractions of the number of tokens of the game
+FILL_RATIOS = (0.1, 0.3, 0.6)
+NB_QUERIES = 64
+
+
+def seeded_board(order: int, size: int, seed: int) -> Tuple[Board, TokenStack]:
+    """Drops random tokens on random legal locations until the board holds
+    `size` tokens, or no token of the stack fits anywhere"""
+    rng = random.Random(seed)
+    b = Board(order)
+    stack = TokenStack(b.token_set, rng)
+    b.drop_first_token(stack.pick())
+    while len(b) < size and not stack.is_empty():
+        moves = b.legal_moves(stack.stack, multi=False)
+        if not moves:
+            break
+        move = rng.choice(moves)
+        stack.stack.remove(move.tokens[0])
+        b.push_move(move)
+    return b, stack
+
+
+def queries(b: Board, stack: TokenStack, seed: int) -> dict:
+    """Draws the arguments of the timed calls, legal or not"""
+    rng = random.Random(seed)
+    tokens = b.token_set.all_tokens()
+    frontier = b.get_all_nearest_empty_locations()
+    occupied = list(b.dropped)
+    drops = [(rng.choice(tokens), *rng.choice(frontier)) for _ in range(NB_QUERIES)]
+
+    lines = list()
+    for _ in range(NB_QUERIES):
+        size = rng.randint(1, b.order)
+        lines.append([rng.choice(tokens) for _ in range(size)])
+
+    # Half of the lines are legal, the other half are random
+    multi = [(m.tokens, m.pos_a, m.pos_b) for m in b.legal_moves(stack.stack[-b.order:]) if not m.is_single()]
+    multi = multi[:NB_QUERIES // 2]
+    for _ in range(NB_QUERIES - len(multi)):
+        i, j = rng.choice(frontier)
+        direction = rng.choice([Vertical, Horizontal])
+        size = rng.randint(2, b.order)
+        pos_b = (i, j)
+        for _ in range(size - 1):
+            pos_b = direction.next(*pos_b)
+        multi.append(([rng.choice(tokens) for _ in range(size)], (i, j), pos_b))
+    return dict(drops=drops, lines=lines, multi=multi, occupied=occupied)
+
+
+def per_call(func: Callable, nb_calls: int, repeat: int) -> float:
+    """Best time of func over `repeat` runs, in microseconds per call.
+    func must perform `nb_calls` calls of the timed operation."""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return 1e6 * min(timer.repeat(repeat, number)) / (number * nb_calls)
+
+
+def bench_board(b: Board, q: dict, repeat: int) -> Dict[str, float]:
+    ts = b.token_set
+    drops, lines, multi, occupied = q['drops'], q['lines'], q['multi'], q['occupied']
+
+    def line_consistency():
+        for line in lines:
+            ts.line_consistency(line)
+
+    def single_droppable():
+        for t, i, j in drops:
+            b.single_droppable(t, i, j)
+
+    def multi_droppable():
+        for tokens, pos_a, pos_b in multi:
+            b.multi_droppable(tokens, pos_a, pos_b)
+
+    def get_widest_line():
+        for t, i, j in drops:
+            b.get_widest_line(i, j, Vertical, t)
+            b.get_widest_line(i, j, Horizontal, t)
+
+    def score_count():
+        for i, j in occupied:
+            b.score_count(i, j)
+
+    return {
+        'line_consistency': per_call(line_consistency, len(lines), repeat),
+        'single_droppable': per_call(single_droppable, len(drops), repeat),
+        'multi_droppable': per_call(multi_droppable, len(multi), repeat),
+        'get_widest_line': per_call(get_widest_line, 2 * len(drops), repeat),
+        'get_all_nearest_empty_locations': per_call(b.get_all_nearest_empty_locations, 1, repeat),
+        'score_count': per_call(score_count, len(occupied), repeat),
+        '__str__': per_call(b.__str__, 1, repeat),
+    }
+
+
+def games_per_second(order: int, seed: int, duration: float) -> float:
+    rng = random.Random(seed)
+    nb_games = 0
+    t0 = time.perf_counter()
+    while nb_games == 0 or time.perf_counter() - t0 < duration:
+        try_a_game(order, rng=rng)
+        nb_games += 1
+    return nb_games / (time.perf_counter() - t0)
+
+
+def run(orders=ORDERS, ratios=FILL_RATIOS, seed=0, repeat=5, game_duration=2.) -> dict:
+    """Returns the results, keyed by "operation/order=../fill=..".
+    The try_a_game entries are in games per second, the others in
+    microseconds per call."""
+    results = dict()
+    for order in orders:
+        for ratio in ratios:
+            b, stack = seeded_board(order, max(2, int(ratio * 3 * order * order)), seed)
+            for name, value in bench_board(b, queries(b, stack, seed), repeat).items():
+                results[f"{name}/order={order}/fill={ratio}"] = value
+        results[f"try_a_game/order={order}"] = games_per_second(order, seed, game_duration)
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'date': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'seed': seed,
+        'results': results,
+    }
+
+
+def regressions(results: dict, baseline: dict, threshold: float) -> List[Tuple[str, float, float]]:
+    """Returns (key, baseline, result) for the timings worse than the
+    baseline by more than threshold (relative): slower calls, or fewer games"""
+    worse = list()
+    for key, value in results['results'].items():
+        ref = baseline['results'].get(key)
+        if ref is None:
+            continue
+        if key.startswith('try_a_game'):
+            ratio = ref / value
+        else:
+            ratio = value / ref
+        if ratio > 1 + threshold:
+            worse.append((key, ref, value))
+    return worse
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-o", "--output", help="JSON file to save the results to")
+    parser.add_argument("-b", "--baseline", help="JSON file of results to compare with")
+    parser.add_argument("-t", "--threshold", type=float, default=0.2,
+                        help="relative slowdown reported as a regression (default: 0.2)")
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    parser.add_argument("--orders", type=int, nargs="+", default=list(ORDERS))
+    parser.add_argument("--quick", action="store_true", help="fewer repeats, shorter game runs")
+    args = parser.parse_args()
+
+    if args.quick:
+        results = run(args.orders, seed=args.seed, repeat=1, game_duration=0.2)
+    else:
+        results = run(args.orders, seed=args.seed)
+
+    for key, value in results['results'].items():
+        unit = "games/s" if key.startswith('try_a_game') else "us"
+        print(f"{key:<56} {value:>12.3f} {unit}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        worse = regressions(results, baseline, args.threshold)
+        for key in sorted(baseline['results'].keys() - results['results'].keys()):
+            print(f"NOT COMPARED {key}: missing from this run")
+        for key, ref, value in worse:
+            print(f"REGRESSION {key}: {ref:.3f} -> {value:.3f}")
+        if worse:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Times `Board.get_all_nearest_empty_locations` as the board grows.
+
+Usage: python -m benchmarks.bench_frontier
+"""
+import timeit
+
+from nutok.tokens import Shape, Color, Token
+from nutok.board import Board
+
+
+def spiral_board(size: int) -> Board:
+    """Fills a board with `size` tokens, along a square spiral.
+    The rules are not checked: only the shape of the board matters here."""
+    b = Board(8)
+    t = Token(Shape.SQUARE, Color.PURPLE)
+    i, j = 0, 0
+    di, dj = 0, 1
+    b.add_single_token_no_check(t, i, j)
+    while len(b) < size:
+        i, j = i + di, j + dj
+        b.add_single_token_no_check(t, i, j)
+        # Turn left whenever the cell on the left is free
+        li, lj = -dj, di
+        if not b.has_token_at(i + li, j + lj):
+            di, dj = li, lj
+    return b
+
+
+def main():
+    number = 2000
+    print(f"{'tokens':>8}  {'frontier':>8}  {'snapshot (us)':>14}  {'view (us)':>10}")
+    for size in [10, 100, 1000, 10000]:
+        b = spiral_board(size)
+        t_snapshot = timeit.timeit(b.get_all_nearest_empty_locations, number=number)
+        t_view = timeit.timeit(b.frontier, number=number)
+        print(f"{size:>8}  {len(b.frontier()):>8}  "
+              f"{1e6 * t_snapshot / number:>14.2f}  {1e6 * t_view / number:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
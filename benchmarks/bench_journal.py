@@ -0,0 +1,28 @@
+"""Times `JournalReplayer.board_at` on an order 8 game, with and without snapshots.
+
+Usage: python -m benchmarks.bench_journal
+"""
+import random
+import timeit
+
+from nutok.journal import MoveJournal, JournalReplayer
+from nutok.simulation import try_a_game
+
+
+def main():
+    journal = MoveJournal(8)
+    try_a_game(order=8, rng=random.Random(0), journal=journal)
+    number = 200
+    print(f"{len(journal)} plies")
+    print(f"{'snapshot interval':>18}  {'ply':>6}  {'board_at (us)':>14}")
+    for interval in [len(journal) + 1, 64, 16]:
+        replayer = JournalReplayer(journal, snapshot_interval=interval)
+        # Takes all the snapshots
+        replayer.board_at(len(journal))
+        for ply in [len(journal) // 2, len(journal)]:
+            t = timeit.timeit(lambda: replayer.board_at(ply), number=number)
+            print(f"{interval:>18}  {ply:>6}  {1e6 * t / number:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,83 +1,13 @@
 import datetime
 import os
-import time
-from typing import Union, List, Type
-from nutok.tokens import Shape, Color, Token, TokenSet, TokenStack, MAX_TOKEN_ORDER
-from nutok.directions import Direction, Vertical, Horizontal
-from nutok.board import Board
+from typing import Union, Dict
+from nutok.tokens import MAX_TOKEN_ORDER
+from nutok.journal import MoveJournal
+from nutok.moves import Move
+from nutok.game import Action, Game
+from nutok.players import AiPlayer, LookaheadPlayer
+from nutok.endgame import EndgamePlayer
 import random
-from enum import Enum
-
-
-class Action:
-    """
-    Supported actions:
-
-    PLAY_TOKEN
-    You want to play a token on the board
-    Example:    play 2 3 4
-        means play token number 2 at position (3, 4), where 3 denotes the row.
-
-    EXCHANGE_TOKEN
-    Example:    exchange 2
-        means exchange token 2 with one from the stack.
-
-    QUIT
-    You don't want to keep playing.
-
-    INVALID
-    This is not an action, but rather the error code for a bad action.
-    """
-
-    (
-        INVALID,
-        PLAY_TOKEN,
-        EXCHANGE_TOKEN,
-        QUIT
-    ) = range(4)
-
-    @classmethod
-    def parse(cls, msg: str) -> (int, dict):
-        items = [e.strip() for e in msg.split(' ')]
-        try:
-            command = items[0].strip().lower()
-            params = items[1:]
-            if command.startswith('p'):
-                return cls.parse_play(params)
-            elif command.startswith('e'):
-                return cls.parse_exchange(params)
-            elif command.startswith('q'):
-                return cls.parse_quit(params)
-            else:
-                # Non-explicit commands
-                if len(items) == 3:
-                    return cls.parse_play(items)
-                else:
-                    raise ValueError(f"command not supported: {command}")
-        except IndexError as err:
-            return cls.INVALID, dict(reason="invalid index", err=err)
-        except ValueError as err:
-            return cls.INVALID, dict(reason="invalid data format", err=err)
-
-    @classmethod
-    def parse_play(cls, params: List[str]) -> (int, dict):
-        if len(params) != 3:
-            raise ValueError(f"{len(params)} param(s) provided instead of 3")
-        token_index = int(params[0]) - 1
-        i = int(params[1])
-        j = int(params[2])
-        return cls.PLAY_TOKEN, dict(token_index=token_index, i=i, j=j)
-
-    @classmethod
-    def parse_exchange(cls, params: List[str]) -> (int, dict):
-        if len(params) != 1:
-            raise ValueError(f"{len(params)} param(s) provided instead of 1")
-        token_index = int(params[0]) - 1
-        return cls.EXCHANGE_TOKEN, dict(token_index=token_index)
-
-    @classmethod
-    def parse_quit(cls, _) -> (int, dict):
-        return cls.QUIT, dict()
 
 
 def ask_for_order() -> int:
@@ -85,84 +15,37 @@ def ask_for_order() -> int:
     return int(value)
 
 
-class CliGame:
-
-    def __init__(self, order, nb_players: int):
-        self.order = order
-        self.b = Board(order)
-        self.stack = TokenStack(self.b.token_set)
-        self.nb_players = nb_players
-
-        self.players = list()
-        for k in range(self.nb_players):
-            self.players.append(
-                dict(
-                    tokens=list(),
-                    name=f"Player {k}",
-                    score=0
-                )
-            )
+class CliGame(Game):
 
-        init_token = self.stack.pick()
-        self.b.add_single_token_no_check(init_token, 0, 0)
-        for player_id in self.player_ids:
-            self.fill_player_stack(player_id)
+    def __init__(self, order, nb_players: int, rng: Union[None, random.Random] = None,
+                 journal: Union[None, MoveJournal] = None, bots: Union[None, Dict[int, AiPlayer]] = None):
+        """Game played in a terminal, see `Game` for the rules.
 
-    @property
-    def tokens_per_player(self):
-        return self.order
-
-    @property
-    def player_ids(self):
-        return range(len(self.players))
+        :param bots: Artificial players, by player index. Other players are humans.
+        """
+        self.bots = dict(bots) if bots is not None else dict()
+        names = [f"Player {k}" + (" (bot)" if k in self.bots else "") for k in range(nb_players)]
+        super().__init__(order, nb_players, rng, journal, names)
+        for k, bot in self.bots.items():
+            bot.unseen = self.unseen[k]
 
     def run(self):
-        stop = False
-        while not stop:
-            for k in range(self.nb_players):
-                self.print_game()
-                stop = self.play_player(k)
-                if stop:
-                    break
-            if self.stack.is_empty():
+        while True:
+            self.print_game()
+            if self.play_player(self.to_move):
+                break
+            if self.over:
                 print("Stack is now empty, the game ends now.")
                 self.quit()
 
-    # Players specific methods
-    def get_player_tokens(self, player_id: int):
-        return self.players[player_id]['tokens']
-
-    def is_player_stack_empty(self, player_id: int):
-        return self.nb_of_tokens_for(player_id) == 0
-
-    def nb_of_tokens_for(self, player_id: int):
-        return len(self.get_player_tokens(player_id))
-
-    def add_token_to_player(self, player_id: int, token: Token):
-        self.players[player_id]["tokens"].append(token)
-
-    def get_name(self, player_id: int):
-        return self.players[player_id]['name']
-
     def add_score(self, player_id: int, score: int):
-        self.players[player_id]["score"] += score
+        super().add_score(player_id, score)
         print(f"{self.get_name(player_id)} won {score} point(s) (total: {self.get_score(player_id)}).")
 
-    def get_score(self, player_id: int) -> int:
-        return self.players[player_id]["score"]
-
-    def fill_player_stack(self, player_id: int):
-        """Returns True iff it was possible to fully fill the player's stack"""
-        while self.nb_of_tokens_for(player_id) < self.tokens_per_player:
-            if self.stack.is_empty():
-                return False
-            token = self.stack.pick()
-            self.add_token_to_player(player_id, token)
-        return True
-
     # Game specific actions
 
     def play_player(self, player_id: int) -> bool:
+        """Lets a player play its turn. Returns True iff it cannot play anymore."""
         if self.is_player_stack_empty(player_id):
             return True
 
@@ -180,6 +63,12 @@ class CliGame:
         print(f"Available tokens: {t_str}")
         print(f"         Indices: {k_str}")
 
+        if player_id in self.bots:
+            if self.play_bot(player_id):
+                return True
+            self.end_turn()
+            return False
+
         finish_turn = False
         while not finish_turn:
             action, params = self.ask_player_raw()
@@ -192,6 +81,24 @@ class CliGame:
                     player_id, params['token_index'])
             elif action == Action.QUIT:
                 self.quit()
+        self.end_turn()
+        return False
+
+    def play_bot(self, player_id: int) -> bool:
+        """Lets an artificial player play. Returns True iff it cannot play anymore."""
+        bot = self.bots[player_id]
+        tokens = self.get_player_tokens(player_id)
+        move = bot.choose(self.b, tokens, len(self.stack))
+        if move is not None and self.run_move(player_id, move):
+            print(f"{self.get_name(player_id)} dropped {move.tokens} from {move.pos_a} to {move.pos_b}.")
+            return False
+        if self.stack.is_empty():
+            print(f"{self.get_name(player_id)} cannot play anymore.")
+            self.give_up()
+            return True
+        self.run_action_exchange(player_id, bot.exchange_index(self.b, tokens))
+        print(f"{self.get_name(player_id)} exchanged a token.")
+        return False
 
     @staticmethod
     def ask_player_raw():
@@ -204,39 +111,23 @@ class CliGame:
             return action, params
 
     def run_action_play(self, player_id: int, token_index: int, i: int, j: int) -> bool:
-        nb_tokens = len(self.players[player_id]['tokens'])
-        if not 0 <= token_index < nb_tokens:
-            print("Invalid token position")
-            return False
-        token = self.players[player_id]['tokens'][token_index]
-        droppable = self.b.single_droppable(token, i, j)
-        if not droppable:
-            print(f"This action is not possible, you can't drop it at ({i}, {j})")
-            return False
-        del self.players[player_id]['tokens'][token_index]
-        could_be_dropped = self.b.add_single_token(token, i, j)
-        if not could_be_dropped:
-            print("It was impossible to drop the token.")
-            return False
-        score = self.b.score_count(i, j)
-        self.add_score(player_id, score)
-        self.fill_player_stack(player_id)
-        return True
+        done, info = self.play_token(player_id, token_index, i, j)
+        if not done:
+            print(info['reason'])
+        return done
+
+    def run_move(self, player_id: int, move: Move) -> bool:
+        """Drops one or several tokens of the player, see `Board.add_multi_token`"""
+        done, info = self.play_move(player_id, move)
+        if not done:
+            print(info['reason'])
+        return done
 
     def run_action_exchange(self, player_id: int, token_index: int) -> bool:
-        nb_tokens = len(self.players[player_id]['tokens'])
-        if not 0 <= token_index < nb_tokens:
-            print("Invalid token position")
-            return False
-        if self.stack.is_empty():
-            print("Stack is empty, it is useless to exchange your token.")
-            return False
-        token = self.players[player_id]['tokens'][token_index]
-        del self.players[player_id]['tokens'][token_index]
-        self.stack.randomly_append(token)
-        new_token = self.stack.pick()
-        self.add_token_to_player(player_id, new_token)
-        return True
+        done, info = self.exchange_token(player_id, token_index)
+        if not done:
+            print(info['reason'])
+        return done
 
     def quit(self):
         self.print_scores()
@@ -255,16 +146,24 @@ class CliGame:
         file_path = os.path.join('history', file)
         with open(file_path, 'w', encoding='utf8') as writer:
             writer.write(txt)
+        self.save_binary(os.path.splitext(file_path)[0] + ".ntk")
         print(f"Game saved in {file}")
 
-    # Printing
+    def save_binary(self, file_path: str):
+        """Saves the game state in the compact binary format,
+        see `nutok.serialization`"""
+        with open(file_path, 'wb') as writer:
+            writer.write(self.dump())
 
-    def str_scores(self):
-        s = "Scores:\n"
-        sorted_players = sorted(self.players, key=lambda p: - p['score'])
-        for rank, player in enumerate(sorted_players):
-            s += f"\t[{rank + 1}] {player['name']}: {player['score']}\n"
-        return s[:-1]
+    @classmethod
+    def load_binary(cls, file_path: str, rng: Union[None, random.Random] = None) -> 'CliGame':
+        """Restores a game saved with `save_binary`"""
+        with open(file_path, 'rb') as reader:
+            game = cls.load(reader.read(), rng)
+        game.bots = dict()
+        return game
+
+    # Printing
 
     def print_scores(self):
         print(self.str_scores())
@@ -274,10 +173,22 @@ class CliGame:
         print(self.b.str_with_indices())
 
 
+def ask_for_bots(nb_players: int) -> int:
+    value = input(f"Number of computer players (0 to {nb_players}):  ")
+    return int(value)
+
+
 def main():
     order = ask_for_order()
+    nb_players = 2
+    nb_bots = ask_for_bots(nb_players)
+    # Bots take the last seats, and solve the endgame once the stack is empty
+    bots = {
+        k: EndgamePlayer(LookaheadPlayer(time_budget=2.0), seat=k, time_budget=2.0, nb_players=nb_players)
+        for k in range(nb_players - nb_bots, nb_players)
+    }
     print("Let's play!\n")
-    game = CliGame(order, 2)
+    game = CliGame(order, nb_players, bots=bots)
     game.run()
 
 
@@ -0,0 +1,192 @@
+"""Archive of many games in a single file, read through `mmap`.
+
+Layout, little-endian:
+- header (32 bytes): magic `NTK`, format version, content kind,
+  then the offset of the index, the number of games and of records,
+- move records (8 bytes each, see `RECORD_FORMAT`), game after game,
+- index (24 bytes per game, see `INDEX_FORMAT`).
+
+A record is a token dropped on the board (kinds DROP and MULTI of
+`JournalEntry`, one record per token), or an exchange: then `code` is
+the received token and `i` the code of the token put back.
+"""
+import mmap
+import os
+import struct
+from typing import List, Tuple, Iterator
+from nutok.tokens import Token
+from nutok.board import Board
+from nutok.journal import MoveJournal, JournalEntry
+from nutok.serialization import MAGIC, VERSION, KIND_ARCHIVE
+
+
+HEADER_FORMAT = "<3sBB3xQQQ"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+# i, j, token code, kind, player, score
+RECORD_FORMAT = "<hhBBbB"
+RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+
+# first record, seed, number of records, order
+INDEX_FORMAT = "<QqIB3x"
+INDEX_SIZE = struct.calcsize(INDEX_FORMAT)
+
+# NumPy equivalents of the formats above
+RECORD_DTYPE = [('i', '<i2'), ('j', '<i2'), ('code', 'u1'), ('kind', 'u1'), ('player', 'i1'), ('score', 'u1')]
+INDEX_DTYPE = [('first', '<u8'), ('seed', '<i8'), ('count', '<u4'), ('order', 'u1'), ('pad', 'V3')]
+
+
+def journal_records(journal: MoveJournal) -> List[Tuple[int, int, int, int, int, int]]:
+    """Converts the entries of a journal to archive records,
+    replaying them to count the score of every drop"""
+    b = Board(journal.order)
+    records = list()
+    for entry in journal.entries:
+        if entry.kind == JournalEntry.EXCHANGE:
+            given, received = entry.tokens
+            records.append((given.code, 0, received.code, entry.kind, entry.player, 0))
+            continue
+        entry.apply(b)
+        score = b.score_count(*entry.pos_b)
+        locations, _ = b.pos_to_locations(entry.pos_a, entry.pos_b)
+        for t, (i, j) in zip(entry.tokens, locations):
+            records.append((i, j, t.code, entry.kind, entry.player, score if (i, j) == entry.pos_b else 0))
+    return records
+
+
+class ArchiveWriter:
+
+    def __init__(self, path: str):
+        """Writes games to a new archive file. Must be closed to be readable."""
+        self._file = open(path, 'wb')
+        self._file.write(bytes(HEADER_SIZE))
+        self._index = list()
+        self._nb_records = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def add_game(self, order: int, records: List[Tuple[int, int, int, int, int, int]], seed: int = 0):
+        """Appends a game, given its records (see `RECORD_FORMAT`)"""
+        self._index.append((self._nb_records, seed, len(records), order))
+        self._file.write(b"".join([struct.pack(RECORD_FORMAT, *r) for r in records]))
+        self._nb_records += len(records)
+
+    def add_journal(self, journal: MoveJournal, seed: int = 0):
+        """Appends a journaled game"""
+        self.add_game(journal.order, journal_records(journal), seed)
+
+    def close(self):
+        """Writes the index and the header"""
+        if self._file.closed:
+            return
+        index_offset = self._file.tell()
+        self._file.write(b"".join([struct.pack(INDEX_FORMAT, *e) for e in self._index]))
+        self._file.seek(0)
+        self._file.write(struct.pack(
+            HEADER_FORMAT, MAGIC, VERSION, KIND_ARCHIVE, index_offset, len(self._index), self._nb_records))
+        self._file.close()
+
+
+class ArchivedGame:
+
+    def __init__(self, archive: 'GameArchive', k: int):
+        """Game k of an archive, whose records are only read on demand"""
+        self.archive = archive
+        self.first, self.seed, self.count, self.order = archive.index_entry(k)
+
+    def records(self) -> Iterator[Tuple[int, int, int, int, int, int]]:
+        start = HEADER_SIZE + self.first * RECORD_SIZE
+        return struct.iter_unpack(RECORD_FORMAT, self.archive.buffer[start:start + self.count * RECORD_SIZE])
+
+    def journal(self) -> MoveJournal:
+        """Rebuilds the journal of the game.
+        Multi-token drops come back as successive drops."""
+        journal = MoveJournal(self.order)
+        for i, j, code, kind, player, _ in self.records():
+            if kind == JournalEntry.EXCHANGE:
+                journal.record_exchange(player, Token.from_code(i), Token.from_code(code))
+            else:
+                journal.record_drop(player, Token.from_code(code), i, j)
+        return journal
+
+    def board(self) -> Board:
+        """Rebuilds the final board of the game"""
+        b = Board(self.order)
+        for i, j, code, kind, _, _ in self.records():
+            if kind != JournalEntry.EXCHANGE:
+                b.add_single_token_no_check(Token.from_code(code), i, j)
+        return b
+
+
+class GameArchive:
+
+    def __init__(self, path: str):
+        """Reads an archive written by `ArchiveWriter`, through a read-only
+        memory map: games are only loaded when accessed."""
+        self._file = open(path, 'rb')
+        if os.fstat(self._file.fileno()).st_size < HEADER_SIZE:
+            raise ValueError("not a nutok archive")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.buffer = memoryview(self._mmap)
+        magic, version, kind, self.index_offset, self.nb_games, self.nb_records = \
+            struct.unpack_from(HEADER_FORMAT, self.buffer, 0)
+        if magic != MAGIC or kind != KIND_ARCHIVE:
+            raise ValueError("not a nutok archive")
+        if version != VERSION:
+            raise ValueError(f"unsupported format version: {version}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def close(self):
+        """Closes the archive. NumPy views must have been released."""
+        self.buffer.release()
+        self._mmap.close()
+        self._file.close()
+
+    def __len__(self):
+        """Returns the number of games"""
+        return self.nb_games
+
+    def index_entry(self, k: int) -> Tuple[int, int, int, int]:
+        """Returns (first record, seed, number of records, order) of game k"""
+        if not 0 <= k < self.nb_games:
+            raise IndexError(f"game {k} out of range [0, {self.nb_games})")
+        return struct.unpack_from(INDEX_FORMAT, self.buffer, self.index_offset + k * INDEX_SIZE)
+
+    def __getitem__(self, k: int) -> ArchivedGame:
+        return ArchivedGame(self, k)
+
+    def __iter__(self) -> Iterator[ArchivedGame]:
+        for k in range(self.nb_games):
+            yield ArchivedGame(self, k)
+
+    def records_array(self):
+        """Returns a NumPy structured array of all the move records (see
+        `RECORD_DTYPE`), viewing the memory map without copying it"""
+        import numpy as np
+        return np.frombuffer(self.buffer, dtype=RECORD_DTYPE, count=self.nb_records, offset=HEADER_SIZE)
+
+    def index_array(self):
+        """Returns a NumPy structured array of the index (see `INDEX_DTYPE`),
+        viewing the memory map without copying it"""
+        import numpy as np
+        return np.frombuffer(self.buffer, dtype=INDEX_DTYPE, count=self.nb_games, offset=self.index_offset)
+
+    def chain_lengths(self):
+        """Returns a NumPy array of the number of tokens dropped by
+        the players in each game (first token excluded)"""
+        import numpy as np
+        records = self.records_array()
+        index = self.index_array()
+        drops = (records['kind'] != JournalEntry.EXCHANGE) & (records['player'] >= 0)
+        cumulated = np.concatenate([[0], np.cumsum(drops)])
+        first = index['first'].astype(np.int64)
+        return cumulated[first + index['count']] - cumulated[first]
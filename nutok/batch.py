@@ -0,0 +1,168 @@
+import random
+from typing import Union, List, Tuple
+import numpy as np
+from nutok.tokens import Token, TokenSet, TokenStack
+from nutok.board import Board
+from nutok.grid_board import EMPTY, MARGIN, frontier_of, admissible_of
+from nutok.simulation import game_seed
+
+
+class BoardBatch:
+
+    def __init__(self, order: int, nb_boards: int, size: int = 16):
+        """Independent boards stored in a single NumPy array, so that
+        frontiers, legality and scores are computed for all of them
+        in one vectorized call (see `nutok.grid_board`).
+
+        grid[k, p, q] holds the code of the token of board k at
+        (p + origin[0], q + origin[1]), EMPTY if there is none.
+
+        :param size: Initial height and width of the boards
+        """
+        self.order = order
+        self.token_set = TokenSet(order)
+        self.grid = np.full((nb_boards, size, size), EMPTY, dtype=np.int8)
+        self.origin = (-(size // 2), -(size // 2))
+        # Number of tokens and score of each board
+        self.counts = np.zeros(nb_boards, dtype=np.int64)
+        self.scores = np.zeros(nb_boards, dtype=np.int64)
+
+    def __len__(self):
+        """Returns the number of boards"""
+        return self.grid.shape[0]
+
+    def _fit(self, rows: np.ndarray, cols: np.ndarray):
+        """Grows the grids, so that all the provided locations
+        are in them, away from their border"""
+        while True:
+            _, h, w = self.grid.shape
+            p = rows - self.origin[0]
+            q = cols - self.origin[1]
+            extra_top = h if (p < MARGIN).any() else 0
+            extra_bottom = h if (p >= h - MARGIN).any() else 0
+            extra_left = w if (q < MARGIN).any() else 0
+            extra_right = w if (q >= w - MARGIN).any() else 0
+            if not extra_top + extra_bottom + extra_left + extra_right:
+                return
+            grid = np.full((len(self), h + extra_top + extra_bottom, w + extra_left + extra_right),
+                           EMPTY, dtype=np.int8)
+            grid[:, extra_top:extra_top + h, extra_left:extra_left + w] = self.grid
+            self.grid = grid
+            self.origin = (self.origin[0] - extra_top, self.origin[1] - extra_left)
+
+    def drop(self, tokens: List[Union[None, Token]], locations: np.ndarray):
+        """Drops tokens[k] at locations[k] = (i, j) on board k, for every board
+        whose token is not None, without checking the games rules"""
+        locations = np.asarray(locations, dtype=np.int64).reshape(len(self), 2)
+        boards = np.array([k for k, t in enumerate(tokens) if t is not None], dtype=np.int64)
+        if len(boards) == 0:
+            return
+        codes = np.array([tokens[k].code for k in boards], dtype=np.int8)
+        rows, cols = locations[boards, 0], locations[boards, 1]
+        self._fit(rows, cols)
+        self.grid[boards, rows - self.origin[0], cols - self.origin[1]] = codes
+        self.counts[boards] += 1
+
+    def frontier(self) -> np.ndarray:
+        """Returns the empty locations near a token, of every board"""
+        return frontier_of(self.grid)
+
+    def admissible(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Returns, for every location of every board, the set of tokens that
+        can be dropped there, as a mask over the token codes, and the number
+        of tokens of the vertical and horizontal lines it would join"""
+        return admissible_of(self.grid, self.order, self.token_set.code_mask)
+
+    @staticmethod
+    def token_bits(tokens: List[Union[None, Token]]) -> np.ndarray:
+        """Returns the bit of each token in masks over the token codes, 0 for None"""
+        return np.array([0 if t is None else 1 << t.code for t in tokens], dtype=np.uint64)
+
+    def droppable(self, tokens: List[Union[None, Token]],
+                  admissible: Union[None, np.ndarray] = None) -> np.ndarray:
+        """Returns the locations where tokens[k] can be dropped on board k,
+        for all boards at once. Boards whose token is None have none."""
+        if admissible is None:
+            admissible, _, _ = self.admissible()
+        return (admissible & self.token_bits(tokens)[:, None, None]) != 0
+
+    def line_points(self, size: np.ndarray) -> np.ndarray:
+        """Vectorized `Board._line_points`"""
+        return size + np.where(size == self.order, self.order, 0)
+
+    def step(self, tokens: List[Union[None, Token]], rng: np.random.Generator,
+             admissible: Union[None, Tuple[np.ndarray, np.ndarray, np.ndarray]] = None) \
+            -> Tuple[np.ndarray, np.ndarray]:
+        """Drops tokens[k] at a random legal location of board k, for all boards
+        at once, and adds the `score_count` of the drops to the scores.
+
+        :param admissible: Result of `admissible`, if already computed
+        :return: Whether each token could be dropped, and the scores of the drops
+        """
+        mask, size_v, size_h = self.admissible() if admissible is None else admissible
+        droppable = self.droppable(tokens, mask)
+        dropped = droppable.any(axis=(1, 2))
+
+        # Picks a random droppable location per board
+        keys = np.where(droppable, rng.random(droppable.shape), -1.)
+        flat = keys.reshape(len(self), -1).argmax(axis=1)
+        p, q = np.unravel_index(flat, droppable.shape[1:])
+        boards = np.arange(len(self))
+        scores = self.line_points(size_v[boards, p, q] + 1) + self.line_points(size_h[boards, p, q] + 1)
+        scores = np.where(dropped, scores, 0)
+
+        locations = np.stack([p + self.origin[0], q + self.origin[1]], axis=1)
+        self.drop([t if ok else None for t, ok in zip(tokens, dropped)], locations)
+        self.scores += scores
+        return dropped, scores
+
+    def board(self, k: int) -> Board:
+        """Returns board k as a `Board`"""
+        b = Board(self.order)
+        rows, cols = np.nonzero(self.grid[k] != EMPTY)
+        for p, q in zip(rows, cols):
+            b.add_single_token_no_check(Token.from_code(int(self.grid[k, p, q])),
+                                        int(p) + self.origin[0], int(q) + self.origin[1])
+        return b
+
+
+def play_batch(order: int = 6, nb_boards: int = 64, pick_attempts: int = 20, seed: int = 0) \
+        -> Tuple[np.ndarray, BoardBatch]:
+    """Plays `try_a_game` on many boards in lockstep: at every step, legality
+    is checked for all the boards at once.
+
+    Returns the number of moves of each game (counted as `try_a_game` does)
+    and the final boards. Each board draws from its own stack, seeded with
+    `game_seed(seed, k)`.
+    """
+    batch = BoardBatch(order, nb_boards)
+    stacks = [TokenStack(batch.token_set, random.Random(game_seed(seed, k))) for k in range(nb_boards)]
+    rng = np.random.default_rng(seed)
+
+    batch.drop([s.pick() for s in stacks], np.zeros((nb_boards, 2), dtype=np.int64))
+    active = np.ones(nb_boards, dtype=bool)
+    move_counts = np.zeros(nb_boards, dtype=np.int64)
+
+    while True:
+        active &= np.array([not s.is_empty() for s in stacks])
+        if not active.any():
+            break
+        move_counts[active] += 1
+        tokens = [s.pick() if ok else None for s, ok in zip(stacks, active)]
+
+        # Boards do not change while tokens get exchanged
+        admissible = batch.admissible()
+        okay = np.zeros(nb_boards, dtype=bool)
+        for _ in range(pick_attempts):
+            okay = batch.droppable(tokens, admissible[0]).any(axis=(1, 2))
+            for k in np.nonzero(active & ~okay)[0]:
+                stacks[k].randomly_append(tokens[k])
+                tokens[k] = stacks[k].pick()
+            if (okay | ~active).all():
+                break
+
+        # Games stop when their token could not be dropped
+        active &= okay
+        batch.step([t if ok else None for t, ok in zip(tokens, active)], rng, admissible)
+
+    return move_counts, batch
@@ -1,6 +1,11 @@
+import copy
 from typing import Union, List, Type, Tuple
-from nutok.tokens import Shape, Color, Token, TokenSet
+from nutok.tokens import Shape, Color, Token, TokenSet, line_masks, tokens_mask
 from nutok.directions import Direction, Vertical, Horizontal
+from nutok.runs import RunIndex
+from nutok.moves import Move
+from nutok.zobrist import zobrist_key
+from nutok.render import BoardRenderer
 
 
 LOCATION = Tuple[int, int]
@@ -30,67 +35,40 @@ class Board:
         self.order = order
         self.token_set = TokenSet(order)
         self.dropped = dict()
+        # Empty locations next to at least one token, kept up to date on
+        # every drop, mapped to the tokens they accept (see `admissible_mask`).
+        # Dicts are insertion-ordered: the keys are also an ordered set.
+        self._frontier = dict()
+        # Locations of the frontier which accept at least one token, with
+        # their masks. Lines only grow as tokens are dropped, so a location
+        # accepting no token is dead until a token is removed.
+        self._live = dict()
+        # Widest lines going through each token, in both directions
+        self._runs = {
+            Vertical: RunIndex(Vertical),
+            Horizontal: RunIndex(Horizontal),
+        }
+        # Moves played with push_move, so that they can be undone
+        self._move_stack = list()
+        # XOR of the Zobrist keys of all the dropped tokens
+        self._zobrist = 0
+        # Bounding box of the dropped tokens (see `bounds`),
+        # recomputed lazily when a token on its border is removed
+        self._bounds = None
+        self._bounds_outdated = False
+        # Counts changes, and remembers the last change of each row,
+        # so that renderers only redraw what changed
+        self._revision = 0
+        self._row_revisions = dict()
 
     def __str__(self):
         """Prints a simple representation of the board"""
-        if self.is_empty():
-            return self.EMPTY_BOARD_TXT
-
-        r0, r1 = self.min_vert(), self.max_vert()
-        c0, c1 = self.min_horiz(), self.max_horiz()
-
-        txt = ""
-        for i in range(r0, r1 + 1):
-            line = ""
-            for j in range(c0, c1 + 1):
-                if self.has_token_at(i, j):
-                    line += f"{self.get_token(i, j)}"
-                else:
-                    line += self.TOKEN_REPLACEMENT
-                line += self.TOKEN_SEPARATOR
-            txt = f"{line}\n{txt}"
-        return txt
+        return BoardRenderer(self).render()
 
     def str_with_indices(self):
         """Prints a representation of the board
         with row and column indices on the sides"""
-
-        if self.is_empty():
-            return self.EMPTY_BOARD_TXT
-
-        r0, r1 = self.min_vert(), self.max_vert()
-        c0, c1 = self.min_horiz(), self.max_horiz()
-
-        txt = ""
-        for i in range(r0, r1 + 1):
-            line = ""
-            for j in range(c0, c1 + 1):
-                if self.has_token_at(i, j):
-                    line += f"{self.get_token(i, j)}"
-                else:
-                    line += self.TOKEN_REPLACEMENT
-                line += self.TOKEN_SEPARATOR
-            txt = f"{line}\n{txt}"
-
-        col_indices = ""
-        col_size = len(self.TOKEN_SEPARATOR + self.TOKEN_REPLACEMENT)
-        for j in range(c0, c1 + 1):
-            col_str = str(j)
-            col_indices += col_str + (col_size - len(col_str)) * ' '
-
-        row_size = 3
-        row_barrier = "  "
-        split_text = txt.splitlines()
-        for i in range(len(split_text)):
-            idx = r1 - i
-            row_str = str(idx)
-            split_text[i] = (row_size - len(row_str)) * ' ' + row_str + row_barrier + split_text[i]
-
-        txt = "\n".join(split_text)
-
-        txt = f"{txt}\n{(row_size + len(row_barrier)) * ' ' + col_indices}"
-
-        return txt
+        return BoardRenderer(self).render_with_indices()
 
     def is_empty(self) -> bool:
         """Says whether a piece has already been dropped"""
@@ -121,7 +99,99 @@ class Board:
 
     def add_single_token_no_check(self, token: Token, i: int, j: int):
         """Adds a token without checking the games rules"""
+        if (i, j) in self.dropped:
+            self.remove_single_token_no_check(i, j)
         self.dropped[(i, j)] = token
+        self._frontier.pop((i, j), None)
+        self._live.pop((i, j), None)
+        for loc in self.get_neighborhood(i, j):
+            if loc not in self.dropped:
+                self._frontier[loc] = 0
+        self._runs[Vertical].add(token, i, j)
+        self._runs[Horizontal].add(token, i, j)
+        # Only the locations at both ends of the new runs see different lines,
+        # the new locations of the frontier being among them
+        self._update_admissible(self._run_ends(i, j))
+        self._zobrist ^= zobrist_key(i, j, token.code)
+        self._revision += 1
+        self._row_revisions[i] = self._revision
+        if self._bounds is None:
+            self._bounds = (i, i, j, j)
+        elif not self._bounds_outdated:
+            r0, r1, c0, c1 = self._bounds
+            self._bounds = (min(r0, i), max(r1, i), min(c0, j), max(c1, j))
+
+    def remove_single_token_no_check(self, i: int, j: int) -> Token:
+        """Removes the token at (i, j) without checking the games rules,
+        and returns it"""
+        ends = self._run_ends(i, j)
+        token = self.dropped.pop((i, j))
+        if self.has_at_least_one_neighbor(i, j):
+            self._frontier[(i, j)] = 0
+        for loc in self.get_neighborhood(i, j):
+            if loc in self._frontier and not self.has_at_least_one_neighbor(*loc):
+                del self._frontier[loc]
+                self._live.pop(loc, None)
+        self._runs[Vertical].remove(i, j)
+        self._runs[Horizontal].remove(i, j)
+        ends.append((i, j))
+        self._update_admissible(ends)
+        self._zobrist ^= zobrist_key(i, j, token.code)
+        self._revision += 1
+        self._row_revisions[i] = self._revision
+        if self.is_empty():
+            self._bounds = None
+            self._bounds_outdated = False
+        elif not self._bounds_outdated:
+            r0, r1, c0, c1 = self._bounds
+            self._bounds_outdated = i == r0 or i == r1 or j == c0 or j == c1
+        return token
+
+    def revision(self) -> int:
+        """Returns the number of changes made to the board so far"""
+        return self._revision
+
+    def row_revision(self, i: int) -> int:
+        """Returns the revision of the last change of row i, 0 if it never changed"""
+        return self._row_revisions.get(i, 0)
+
+    def zobrist_hash(self) -> int:
+        """Returns a 64-bit hash of the dropped tokens, which does not depend
+        on the order they were dropped in (see `nutok.zobrist`)"""
+        return self._zobrist
+
+    def push_move(self, move: Move):
+        """Plays a move without checking the games rules,
+        so that it can be undone with `pop_move`.
+
+        Meant for search: moves should come from `legal_moves`."""
+        for t, (i, j) in zip(move.tokens, move.locations()):
+            self.add_single_token_no_check(t, i, j)
+        self._move_stack.append(move)
+
+    def pop_move(self) -> Move:
+        """Undoes the last move played with `push_move`, and returns it"""
+        move = self._move_stack.pop()
+        for i, j in reversed(move.locations()):
+            self.remove_single_token_no_check(i, j)
+        return move
+
+    def copy(self) -> 'Board':
+        """Returns an independent copy of the board, indexes included,
+        made of copies of dicts rather than of replayed drops.
+        Moves pushed on the board cannot be popped from the copy."""
+        b = copy.copy(self)
+        b.dropped = dict(self.dropped)
+        b._frontier = dict(self._frontier)
+        b._live = dict(self._live)
+        b._runs = {direction: runs.copy() for direction, runs in self._runs.items()}
+        b._move_stack = list()
+        b._row_revisions = dict(self._row_revisions)
+        return b
+
+    def nb_pushed_moves(self) -> int:
+        """Returns the number of moves that `pop_move` can undo"""
+        return len(self._move_stack)
 
     def drop_first_token(self, token: Token):
         """Drops the first token at (0, 0)"""
@@ -135,25 +205,21 @@ class Board:
         ----------
         The existing game must already satisfy the game rules.
         """
-        # You cannot drop above an existing token
-        if self.has_token_at(i, j):
-            return False
-
-        # You must drop against an existing token
-        if not self.has_at_least_one_neighbor(i, j):
-            return False
-
-        # The new vertical line must be consistent
-        line_v = self.get_widest_line(i, j, Vertical, token=token)
-        if not self.token_set.line_consistency(line_v):
-            return False
+        # Locations which are not in the frontier are either taken,
+        # or away from any token: they do not accept any token.
+        # Others accept the tokens keeping both lines consistent.
+        return self._live.get((i, j), 0) >> token.code & 1 == 1
 
-        # The new horizontal line must be consistent
-        line_h = self.get_widest_line(i, j, Horizontal, token=token)
-        if not self.token_set.line_consistency(line_h):
-            return False
+    def line_consistency_with(self, token: Token, i: int, j: int, direction: Type[Direction]) -> bool:
+        """Checks if the widest line going through (i, j) in the provided
+        direction would be consistent, with token dropped at (i, j).
 
-        return True
+        Same as checking `get_widest_line(i, j, direction, token)`,
+        in constant time, using the masks of the neighboring runs.
+        """
+        size, shape_mask, color_mask = self._runs[direction].around(i, j)
+        return self.token_set.mask_consistency(
+            size + 1, shape_mask | token.shape_bit, color_mask | token.color_bit)
 
     def add_multi_token(self, tokens: List[Token], pos_a: LOCATION, pos_b: LOCATION) -> bool:
         """Adds provided tokens along the line defined by
@@ -165,7 +231,7 @@ class Board:
         if not droppable:
             return False
 
-        locations = self.pos_to_locations(pos_a, pos_b)
+        locations, _ = self.pos_to_locations(pos_a, pos_b)
         for t, (i, j) in zip(tokens, locations):
             self.add_single_token_no_check(t, i, j)
         return True
@@ -213,33 +279,178 @@ class Board:
                 return False
 
         # Perpendicular widest lines must be consistent
+        perpendicular = direction.perpendicular()
         for t, (i, j) in zip(tokens, locations):
-            line_t = self.get_widest_line(i, j, direction.perpendicular(), token=t)
-            if not self.token_set.line_consistency(line_t):
+            if not self.line_consistency_with(t, i, j, perpendicular):
                 return False
 
         # Line in the main direction must be consistent
-        line_dir = self.get_multi_widest_line(tokens, pos_a, pos_b, direction)
-        if not self.token_set.line_consistency(line_dir):
+        size = len(tokens)
+        shape_mask, color_mask = line_masks(tokens)
+        runs = self._runs[direction]
+        for run in (runs.get(*direction.prev(*pos_a)), runs.get(*direction.next(*pos_b))):
+            if run is not None:
+                size += len(run)
+                shape_mask |= run.shape_mask
+                color_mask |= run.color_mask
+        if not self.token_set.mask_consistency(size, shape_mask, color_mask):
             return False
 
         return True
 
+    def admissible_mask(self, i: int, j: int) -> int:
+        """Returns the set of tokens that can be dropped at (i, j),
+        as a mask over the token codes (see `nutok.tokens.tokens_mask`)"""
+        return self._live.get((i, j), 0)
+
+    def droppable_mask(self) -> int:
+        """Returns the set of tokens that can be dropped somewhere,
+        as a mask over the token codes"""
+        mask = 0
+        for m in self._live.values():
+            mask |= m
+        return mask
+
+    def _compute_admissible_mask(self, i: int, j: int) -> int:
+        mask = self.token_set.admissible_mask(*self._runs[Vertical].around(i, j))
+        if mask:
+            mask &= self.token_set.admissible_mask(*self._runs[Horizontal].around(i, j))
+        return mask
+
+    def _run_ends(self, i: int, j: int) -> List[LOCATION]:
+        """Returns the locations right before and right after the runs
+        going through the token at (i, j), in both directions"""
+        ends = list()
+        for direction, runs in self._runs.items():
+            run = runs[(i, j)]
+            ends.append(direction.prev(*run.start))
+            end = list(run.start)
+            end[direction.axis] += len(run.tokens)
+            ends.append(tuple(end))
+        return ends
+
+    def _update_admissible(self, locations: List[LOCATION]):
+        """Recomputes the tokens accepted by the provided locations
+        which are in the frontier, and whether they are still alive"""
+        for loc in locations:
+            if loc in self._frontier:
+                mask = self._compute_admissible_mask(*loc)
+                self._frontier[loc] = mask
+                if mask:
+                    self._live[loc] = mask
+                else:
+                    self._live.pop(loc, None)
+
+    def legal_moves(self, rack: List[Token], multi: bool = True) -> List[Move]:
+        """Returns all the moves that can be played with the tokens of the rack:
+        - every token droppable on every empty location (see `add_single_token`),
+        - if multi is True, every line of at least two tokens, touching
+        the existing tokens, that `add_multi_token` would accept.
+
+        The score of each move is the `score_count` of its last token (pos_b),
+        once the move is played.
+
+        Locations are pruned with the set of tokens each of them still accepts,
+        and lines are grown one token at a time, keeping them consistent.
+        """
+        rack = list(dict.fromkeys(rack))
+        rack_mask = tokens_mask(rack)
+        moves = list()
+
+        for (i, j), mask in self._live.items():
+            mask &= rack_mask
+            if not mask:
+                continue
+            size_v = self._runs[Vertical].around(i, j)[0] + 1
+            size_h = self._runs[Horizontal].around(i, j)[0] + 1
+            score = self._line_points(size_v) + self._line_points(size_h)
+            for t in rack:
+                if mask >> t.code & 1:
+                    moves.append(Move([t], (i, j), (i, j), score))
+
+        if multi and len(rack) >= 2:
+            for direction in [Vertical, Horizontal]:
+                self._multi_moves(rack, direction, moves)
+
+        return moves
+
+    def _multi_moves(self, rack: List[Token], direction: Type[Direction], moves: List[Move]):
+        """Appends to moves all the lines of at least two tokens
+        along the provided direction (see `legal_moves`)"""
+        runs = self._runs[direction]
+        perpendicular_runs = self._runs[direction.perpendicular()]
+        admissible_mask = self.token_set.admissible_mask
+
+        # A line must contain a location of the frontier, which cannot be
+        # dead, it starts at most order - 1 locations before it,
+        # and cannot go through a token.
+        starts = dict()
+        for loc in self._live:
+            for _ in range(self.order):
+                if loc in self.dropped:
+                    break
+                starts[loc] = None
+                loc = direction.prev(*loc)
+
+        def extend(loc, placed, placed_mask, size, shape_mask, color_mask, touching):
+            # Tokens that keep both the main line and the perpendicular line consistent
+            touching = touching or loc in self._frontier
+            mask = admissible_mask(size, shape_mask, color_mask) & ~placed_mask
+            mask &= admissible_mask(*perpendicular_runs.around(*loc))
+            if not mask:
+                return
+            loc_next = direction.next(*loc)
+            run_after = runs.get(*loc_next)
+            for t in rack:
+                if not mask >> t.code & 1:
+                    continue
+                line = placed + [t]
+                line_size = size + 1
+                line_shapes = shape_mask | t.shape_bit
+                line_colors = color_mask | t.color_bit
+
+                if run_after is not None:
+                    # The line ends against a token: it includes the next run
+                    if len(line) >= 2 and touching and self.token_set.mask_consistency(
+                            line_size + len(run_after),
+                            line_shapes | run_after.shape_mask,
+                            line_colors | run_after.color_mask):
+                        score = self._line_points(line_size + len(run_after)) + \
+                            self._line_points(perpendicular_runs.around(*loc)[0] + 1)
+                        moves.append(Move(line, start, loc, score))
+                    continue
+
+                if len(line) >= 2 and touching:
+                    score = self._line_points(line_size) + \
+                        self._line_points(perpendicular_runs.around(*loc)[0] + 1)
+                    moves.append(Move(line, start, loc, score))
+                if line_size < self.order:
+                    extend(loc_next, line, placed_mask | 1 << t.code,
+                           line_size, line_shapes, line_colors, touching)
+
+        for start in starts:
+            run_before = runs.get(*direction.prev(*start))
+            if run_before is None:
+                extend(start, [], 0, 0, 0, 0, False)
+            else:
+                extend(start, [], 0, len(run_before),
+                       run_before.shape_mask, run_before.color_mask, False)
+
+    def _line_points(self, size: int) -> int:
+        """Points earned for a line of size tokens"""
+        if size == self.order:
+            return size + self.order
+        return size
+
     def score_count(self, i: int, j: int) -> int:
         """Counts the score as if the designated token
         was the last token that got dropped"""
         if not self.has_token_at(i, j):
             return 0
 
-        def line2pts(_line):
-            _pts = len(_line)
-            if _pts == self.order:
-                _pts += self.order
-            return _pts
-
-        line_v = self.get_widest_line(i, j, Vertical)
-        line_h = self.get_widest_line(i, j, Horizontal)
-        return line2pts(line_v) + line2pts(line_h)
+        line_v = self._runs[Vertical][(i, j)]
+        line_h = self._runs[Horizontal][(i, j)]
+        return self._line_points(len(line_v)) + self._line_points(len(line_h))
 
     def get_widest_line(self, i, j, direction: Type[Direction], token: Union[None, Token] = None):
         """Returns the widest continuous line of tokens from location (i, j).
@@ -247,23 +458,24 @@ class Board:
         If token is provided, then it puts token at the center of the list.
         If token is None, then it gets the value of the token at (i, j).
         """
+        runs = self._runs[direction]
         if token is None:
-            token = self.get_token(i, j)
-        else:
-            if self.has_token_at(i, j):
-                raise KeyError(f"there is already a token at ({i}, {j})")
+            if not self.has_token_at(i, j):
+                raise KeyError(f"no pieces at {(i, j)}")
+            return list(runs[(i, j)].tokens)
+
+        if self.has_token_at(i, j):
+            raise KeyError(f"there is already a token at ({i}, {j})")
 
         elements = [token]
 
-        i_next, j_next = direction.next(i, j)
-        while self.has_token_at(i_next, j_next):
-            elements.append(self.get_token(i_next, j_next))
-            i_next, j_next = direction.next(i_next, j_next)
+        run_next = runs.get(*direction.next(i, j))
+        if run_next is not None:
+            elements = elements + run_next.tokens
 
-        i_prev, j_prev = direction.prev(i, j)
-        while self.has_token_at(i_prev, j_prev):
-            elements = [self.get_token(i_prev, j_prev)] + elements
-            i_prev, j_prev = direction.prev(i_prev, j_prev)
+        run_prev = runs.get(*direction.prev(i, j))
+        if run_prev is not None:
+            elements = run_prev.tokens + elements
 
         return elements
 
@@ -322,35 +534,55 @@ class Board:
             (i + 1, j),
         ]
 
-    def get_all_nearest_empty_locations(self):
+    def get_all_nearest_empty_locations(self) -> List[LOCATION]:
         """Returns all the locations near a token that are empty
         Near = "at +/- 1 vertically or +/- 1 horizontally"
+
+        The returned list is a snapshot: it is safe to drop tokens
+        while iterating over it.
         """
-        locations = list()
+        return list(self._frontier)
 
-        for i, j in self.dropped.keys():
-            for i_n, j_n in self.get_neighborhood(i, j):
-                is_empty = not self.has_token_at(i_n, j_n)
-                still_unknown = (i_n, j_n) not in locations
-                if is_empty and still_unknown:
-                    locations.append((i_n, j_n))
+    def frontier(self):
+        """Returns a read-only, live view of the empty locations near a token.
 
-        return locations
+        Unlike `get_all_nearest_empty_locations`, this does not copy anything,
+        but the view must not be iterated while tokens are being dropped.
+        """
+        return self._frontier.keys()
 
-    def _furthest_component(self, min_or_max, axis: int):
-        if self.is_empty():
-            return None
-        return min_or_max([e[axis] for e in self.dropped.keys()])
+    def live_locations(self):
+        """Returns a read-only, live view of the locations of the frontier
+        where at least one token can be dropped (see `frontier`).
+
+        The others are dead: the lines going through them
+        cannot take any token anymore."""
+        return self._live.keys()
+
+    def nb_live_locations(self) -> int:
+        return len(self._live)
+
+    def nb_dead_locations(self) -> int:
+        return len(self._frontier) - len(self._live)
+
+    def bounds(self) -> Union[None, Tuple[int, int, int, int]]:
+        """Returns the bounding box of the dropped tokens, as
+        (min_vert, max_vert, min_horiz, max_horiz), None if the board is empty"""
+        if self._bounds_outdated:
+            rows = [i for i, _ in self.dropped]
+            cols = [j for _, j in self.dropped]
+            self._bounds = (min(rows), max(rows), min(cols), max(cols))
+            self._bounds_outdated = False
+        return self._bounds
 
     def max_vert(self):
-        return self._furthest_component(max, 0)
+        return None if self.is_empty() else self.bounds()[1]
 
     def min_vert(self):
-        return self._furthest_component(min, 0)
+        return None if self.is_empty() else self.bounds()[0]
 
     def max_horiz(self):
-        return self._furthest_component(max, 1)
+        return None if self.is_empty() else self.bounds()[3]
 
     def min_horiz(self):
-        return self._furthest_component(min, 1)
-
+        return None if self.is_empty() else self.bounds()[2]
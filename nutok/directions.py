@@ -1,6 +1,9 @@
 
 class Direction:
 
+    # Index of the coordinate that changes along the direction
+    axis = None
+
     @staticmethod
     def next(i, j):
         raise NotImplemented
@@ -16,6 +19,8 @@ class Direction:
 
 class Vertical(Direction):
 
+    axis = 0
+
     @staticmethod
     def next(i, j):
         return i + 1, j
@@ -31,6 +36,8 @@ class Vertical(Direction):
 
 class Horizontal(Direction):
 
+    axis = 1
+
     @staticmethod
     def next(i, j):
         return i, j + 1
@@ -0,0 +1,261 @@
+import time
+from typing import Union, List, Tuple
+from nutok.tokens import Token
+from nutok.board import Board
+from nutok.moves import Move
+from nutok.players import AiPlayer
+from nutok.transposition import TranspositionTable
+from nutok.zobrist import zobrist_turn
+from nutok.unseen import UnseenTokens
+
+
+# Depth of the entries whose value does not depend on the depth of the search
+COMPLETE_DEPTH = 1 << 30
+
+# Bound of the values of the positions
+_INFINITY = 1 << 30
+
+
+class _BudgetExhausted(Exception):
+    pass
+
+
+class EndgameResult:
+
+    __slots__ = ('value', 'line', 'exact', 'depth', 'nodes')
+
+    def __init__(self, value: int, line: List[Union[None, Move]], exact: bool, depth: int, nodes: int):
+        """Outcome of `EndgameSolver.solve`
+
+        :param value: Points the player to move will score from now on,
+            minus the points its opponents will score
+        :param line: Best sequence of moves found
+        :param exact: Whether the search went to the end of the game
+        :param depth: Number of moves of the deepest completed search
+        :param nodes: Number of positions visited
+        """
+        self.value = value
+        self.line = line
+        self.exact = exact
+        self.depth = depth
+        self.nodes = nodes
+
+
+class EndgameSolver:
+
+    def __init__(self, time_budget: float = 1.0, max_nodes: Union[None, int] = None,
+                 table: Union[None, TranspositionTable] = None):
+        """Plays out the end of a game once the stack is empty, and every
+        rack is known: players drop tokens in turn, following the rules of
+        `Game`. The game is over when the player to move has no token left,
+        or cannot drop any, or at the end of the round (see `solve`).
+
+        The search is a negamax with alpha-beta pruning, deepened one move at
+        a time until it reaches the end of the game, or runs out of budget.
+        Positions (board, racks, player to move) are cached in a
+        transposition table, along with their moves, best first.
+        With more than two players, opponents are assumed to play together
+        against the player to move at the root (paranoid search).
+
+        :param max_nodes: Maximum number of positions visited per solve, no limit if None
+        """
+        self.time_budget = time_budget
+        self.max_nodes = max_nodes
+        self.table = table if table is not None else TranspositionTable()
+        self.nodes = 0
+        self._deadline = None
+        self._root = 0
+
+    def solve(self, board: Board, racks: List[List[Token]], to_move: int = 0,
+              plies_left: Union[None, int] = None) -> EndgameResult:
+        """Searches the best line for player to_move, racks being the tokens
+        of all the players. The board is left untouched.
+
+        :param plies_left: Number of moves before the end of the round,
+            when the game ends (see `Game.end_turn`), no limit if None
+        """
+        racks = tuple(tuple(r) for r in racks)
+        if to_move != self._root:
+            # With more than two players, values depend on the player at the root
+            self.table.clear()
+        self.table.new_search()
+        self.nodes = 0
+        self._deadline = time.perf_counter() + self.time_budget
+        self._root = to_move
+
+        result = EndgameResult(0, list(), False, 0, 0)
+        # Every move drops at least one token
+        max_depth = sum(len(r) for r in racks)
+        if plies_left is not None:
+            max_depth = min(max_depth, plies_left)
+        for depth in range(1, max_depth + 1):
+            try:
+                value, complete = self._negamax(board, racks, to_move, plies_left, depth, -_INFINITY, _INFINITY)
+            except _BudgetExhausted:
+                break
+            line = self._principal_line(board, racks, to_move, plies_left)
+            result = EndgameResult(value, line, complete, depth, self.nodes)
+            if complete:
+                break
+        result.nodes = self.nodes
+        return result
+
+    def _same_side(self, player: int, other: int) -> bool:
+        return (player == self._root) == (other == self._root)
+
+    def _key(self, board: Board, racks: Tuple[Tuple[Token, ...], ...], player: int,
+             plies_left: Union[None, int]) -> int:
+        return board.zobrist_hash() ^ zobrist_turn(racks, player, plies_left or 0)
+
+    def _moves(self, board: Board, rack: Tuple[Token, ...]) -> List[Move]:
+        """Legal moves, best scoring first: they are often the best ones"""
+        moves = board.legal_moves(list(rack))
+        moves.sort(key=lambda m: -m.score)
+        return moves
+
+    def _negamax(self, board: Board, racks: Tuple[Tuple[Token, ...], ...], player: int,
+                 plies_left: Union[None, int], depth: int, alpha: int, beta: int) -> Tuple[int, bool]:
+        """Returns the value of the position for the player to move, and
+        whether it does not depend on depth (the search reached the end)"""
+        self.nodes += 1
+        if time.perf_counter() > self._deadline:
+            raise _BudgetExhausted()
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise _BudgetExhausted()
+
+        if plies_left == 0 or not racks[player]:
+            return 0, True
+        if depth == 0:
+            return 0, False
+
+        key = self._key(board, racks, player, plies_left)
+        entry = self.table.probe(key)
+        if entry is not None:
+            if entry.depth >= depth:
+                complete = entry.depth == COMPLETE_DEPTH
+                if entry.flag == TranspositionTable.EXACT:
+                    return entry.value, complete
+                if entry.flag == TranspositionTable.LOWER_BOUND and entry.value >= beta:
+                    return entry.value, complete
+                if entry.flag == TranspositionTable.UPPER_BOUND and entry.value <= alpha:
+                    return entry.value, complete
+            moves = entry.moves
+        else:
+            moves = self._moves(board, racks[player])
+            if not moves:
+                # The player cannot play: the game is over
+                return 0, True
+
+        alpha_start = alpha
+        best_value, best_index = None, 0
+        complete = True
+        nxt = (player + 1) % len(racks)
+        same_side = self._same_side(player, nxt)
+        child_plies_left = None if plies_left is None else plies_left - 1
+        for index, m in enumerate(moves):
+            rack = list(racks[player])
+            for t in m.tokens:
+                rack.remove(t)
+            gain = m.score
+            child_racks = racks[:player] + (tuple(rack),) + racks[player + 1:]
+
+            board.push_move(m)
+            try:
+                if same_side:
+                    v, child_complete = self._negamax(
+                        board, child_racks, nxt, child_plies_left, depth - 1, alpha - gain, beta - gain)
+                    value = gain + v
+                else:
+                    v, child_complete = self._negamax(
+                        board, child_racks, nxt, child_plies_left, depth - 1, gain - beta, gain - alpha)
+                    value = gain - v
+            finally:
+                board.pop_move()
+
+            complete = complete and child_complete
+            if best_value is None or value > best_value:
+                best_value, best_index = value, index
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+
+        if best_value <= alpha_start:
+            flag = TranspositionTable.UPPER_BOUND
+        elif best_value >= beta:
+            flag = TranspositionTable.LOWER_BOUND
+        else:
+            flag = TranspositionTable.EXACT
+        if best_index:
+            moves = [moves[best_index]] + moves[:best_index] + moves[best_index + 1:]
+        self.table.store(key, COMPLETE_DEPTH if complete else depth, best_value, flag, moves)
+        return best_value, complete
+
+    def _principal_line(self, board: Board, racks: Tuple[Tuple[Token, ...], ...], player: int,
+                        plies_left: Union[None, int]) -> List[Move]:
+        """Follows the best moves of the table from the root"""
+        line = list()
+        try:
+            while plies_left != 0 and racks[player]:
+                entry = self.table.probe(self._key(board, racks, player, plies_left))
+                if entry is None:
+                    break
+                m = entry.moves[0]
+                line.append(m)
+                rack = list(racks[player])
+                for t in m.tokens:
+                    rack.remove(t)
+                racks = racks[:player] + (tuple(rack),) + racks[player + 1:]
+                board.push_move(m)
+                player = (player + 1) % len(racks)
+                if plies_left is not None:
+                    plies_left -= 1
+        finally:
+            for _ in line:
+                board.pop_move()
+        return line
+
+
+class EndgamePlayer(AiPlayer):
+
+    def __init__(self, player: AiPlayer, seat: Union[None, int] = None, time_budget: float = 1.0,
+                 max_nodes: Union[None, int] = None, nb_players: int = 2):
+        """Plays as player until the stack is empty, then plays the first
+        move of the line found by `EndgameSolver`.
+
+        Once the stack is empty, the tokens a player cannot see are the ones
+        of its opponent: this only holds for two player games.
+
+        :param seat: Index of the player in the game, which ends at the end
+            of the round the stack gets empty in (see `Game.end_turn`).
+            If None, the end of the game is played out without this limit.
+        :param nb_players: Number of players of the game, which must be 2
+        """
+        if nb_players != 2:
+            raise ValueError(f"endgames are solved for 2 players, not {nb_players}")
+        if seat is not None and not 0 <= seat < nb_players:
+            raise ValueError(f"seat {seat} out of range [0, {nb_players - 1}]")
+        super().__init__(time_budget)
+        self.player = player
+        self.seat = seat
+        self.nb_players = nb_players
+        self.solver = EndgameSolver(time_budget, max_nodes)
+        # Result of the last endgame search, for inspection
+        self.result = None
+
+    def choose(self, board: Board, rack: List[Token], stack_size: int) -> Union[None, Move]:
+        self.player.unseen = self.unseen
+        if stack_size > 0:
+            return self.player.choose(board, rack, stack_size)
+        if self.unseen is not None:
+            opponent = self.unseen.tokens()
+        else:
+            opponent = UnseenTokens.from_board(board, rack).tokens()
+        # Moves of this seat and of the next ones, until the end of the round
+        plies_left = None if self.seat is None else self.nb_players - self.seat
+        self.result = self.solver.solve(board, [rack, opponent], plies_left=plies_left)
+        if not self.result.line:
+            return self.player.choose(board, rack, stack_size)
+        return self.result.line[0]
+
+    def exchange_index(self, board: Board, rack: List[Token]) -> int:
+        return self.player.exchange_index(board, rack)
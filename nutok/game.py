@@ -0,0 +1,305 @@
+import copy
+import random
+from typing import Union, List, Tuple
+from nutok.tokens import Token, TokenStack
+from nutok.board import Board
+from nutok.moves import Move
+from nutok.journal import MoveJournal, NO_PLAYER
+from nutok.serialization import dump_game, load_game
+from nutok.unseen import UnseenTokens
+
+
+class Action:
+    """
+    Supported actions:
+
+    PLAY_TOKEN
+    You want to play a token on the board
+    Example:    play 2 3 4
+        means play token number 2 at position (3, 4), where 3 denotes the row.
+
+    EXCHANGE_TOKEN
+    Example:    exchange 2
+        means exchange token 2 with one from the stack.
+
+    QUIT
+    You don't want to keep playing.
+
+    INVALID
+    This is not an action, but rather the error code for a bad action.
+    """
+
+    (
+        INVALID,
+        PLAY_TOKEN,
+        EXCHANGE_TOKEN,
+        QUIT
+    ) = range(4)
+
+    @classmethod
+    def parse(cls, msg: str) -> (int, dict):
+        items = [e.strip() for e in msg.split(' ')]
+        try:
+            command = items[0].strip().lower()
+            params = items[1:]
+            if command.startswith('p'):
+                return cls.parse_play(params)
+            elif command.startswith('e'):
+                return cls.parse_exchange(params)
+            elif command.startswith('q'):
+                return cls.parse_quit(params)
+            else:
+                # Non-explicit commands
+                if len(items) == 3:
+                    return cls.parse_play(items)
+                else:
+                    raise ValueError(f"command not supported: {command}")
+        except IndexError as err:
+            return cls.INVALID, dict(reason="invalid index", err=err)
+        except ValueError as err:
+            return cls.INVALID, dict(reason="invalid data format", err=err)
+
+    @classmethod
+    def parse_play(cls, params: List[str]) -> (int, dict):
+        if len(params) != 3:
+            raise ValueError(f"{len(params)} param(s) provided instead of 3")
+        token_index = int(params[0]) - 1
+        i = int(params[1])
+        j = int(params[2])
+        return cls.PLAY_TOKEN, dict(token_index=token_index, i=i, j=j)
+
+    @classmethod
+    def parse_exchange(cls, params: List[str]) -> (int, dict):
+        if len(params) != 1:
+            raise ValueError(f"{len(params)} param(s) provided instead of 1")
+        token_index = int(params[0]) - 1
+        return cls.EXCHANGE_TOKEN, dict(token_index=token_index)
+
+    @classmethod
+    def parse_quit(cls, _) -> (int, dict):
+        return cls.QUIT, dict()
+
+
+class Game:
+
+    __slots__ = ('order', 'b', 'stack', 'players', 'journal', 'to_move', 'over', 'unseen')
+
+    def __init__(self, order: int, nb_players: int, rng: Union[None, random.Random] = None,
+                 journal: Union[None, MoveJournal] = None, names: Union[None, List[str]] = None):
+        """State and rules of a game, without any input or output:
+        actions return whether they were applied, along with a dict giving
+        either the points scored, or the reason of the refusal.
+
+        Players play in turn (see `to_move`). The game is over when the
+        player to move has no token left, when a player cannot play anymore
+        (see `give_up`), or at the end of the round the stack got empty in.
+
+        :param names: Names of the players, "Player <index>" by default
+        """
+        self.order = order
+        self.journal = journal
+        self.b = Board(order)
+        self.stack = TokenStack(self.b.token_set, rng)
+        self.to_move = 0
+        self.over = False
+
+        self.players = list()
+        for k in range(nb_players):
+            self.players.append(
+                dict(
+                    tokens=list(),
+                    name=names[k] if names is not None else f"Player {k}",
+                    score=0
+                )
+            )
+
+        # Tokens each player has not seen, kept up to date on every action
+        self.unseen = [UnseenTokens(self.b.token_set) for _ in self.player_ids]
+
+        init_token = self.stack.pick()
+        self.b.add_single_token_no_check(init_token, 0, 0)
+        for unseen in self.unseen:
+            unseen.record_drop(init_token)
+        if self.journal is not None:
+            self.journal.record_drop(NO_PLAYER, init_token, 0, 0)
+        for player_id in self.player_ids:
+            self.fill_player_stack(player_id)
+
+    @property
+    def tokens_per_player(self):
+        return self.order
+
+    @property
+    def nb_players(self):
+        return len(self.players)
+
+    @property
+    def player_ids(self):
+        return range(len(self.players))
+
+    def get_state(self) -> dict:
+        """Returns a snapshot of the game: board, stack (including the state
+        of its source of randomness), players and turn"""
+        return dict(
+            cells=tuple((i, j, t.code) for (i, j), t in self.b.dropped.items()),
+            stack=self.stack.get_state(),
+            players=copy.deepcopy(self.players),
+            to_move=self.to_move,
+            over=self.over,
+        )
+
+    def set_state(self, state: dict):
+        """Restores a snapshot taken by `get_state`"""
+        self.b = Board(self.order)
+        for i, j, code in state['cells']:
+            self.b.add_single_token_no_check(Token.from_code(code), i, j)
+        self.stack.set_state(state['stack'])
+        self.players = copy.deepcopy(state['players'])
+        self.to_move = state.get('to_move', 0)
+        self.over = state.get('over', False)
+        self._count_unseen()
+
+    def dump(self) -> bytes:
+        """Serializes the board, the stack and the players,
+        see `nutok.serialization.dump_game`"""
+        return dump_game(self.b, self.stack, self.players)
+
+    @classmethod
+    def load(cls, data: bytes, rng: Union[None, random.Random] = None) -> 'Game':
+        """Restores a game serialized with `dump`, first player to move"""
+        b, stack, players = load_game(data, rng)
+        game = cls.__new__(cls)
+        game.order = b.order
+        game.b = b
+        game.stack = stack
+        game.players = players
+        game.journal = None
+        game.to_move = 0
+        game.over = False
+        game.unseen = [UnseenTokens(b.token_set) for _ in game.player_ids]
+        game._count_unseen()
+        return game
+
+    def _count_unseen(self):
+        """Counts the tokens each player has not seen, from scratch. Trackers
+        are updated in place: the players holding them stay up to date."""
+        for k, unseen in enumerate(self.unseen):
+            unseen.recount(self.b, self.get_player_tokens(k))
+
+    # Players specific methods
+    def get_player_tokens(self, player_id: int) -> List[Token]:
+        return self.players[player_id]['tokens']
+
+    def is_player_stack_empty(self, player_id: int):
+        return self.nb_of_tokens_for(player_id) == 0
+
+    def nb_of_tokens_for(self, player_id: int):
+        return len(self.get_player_tokens(player_id))
+
+    def add_token_to_player(self, player_id: int, token: Token):
+        self.players[player_id]["tokens"].append(token)
+
+    def get_name(self, player_id: int):
+        return self.players[player_id]['name']
+
+    def add_score(self, player_id: int, score: int):
+        self.players[player_id]["score"] += score
+
+    def get_score(self, player_id: int) -> int:
+        return self.players[player_id]["score"]
+
+    def fill_player_stack(self, player_id: int):
+        """Returns True iff it was possible to fully fill the player's stack"""
+        missing = self.tokens_per_player - self.nb_of_tokens_for(player_id)
+        for token in self.stack.pick_many(missing):
+            self.add_token_to_player(player_id, token)
+            self.unseen[player_id].record_draw(token)
+        return self.nb_of_tokens_for(player_id) >= self.tokens_per_player
+
+    # Turns
+    def start_turn(self) -> bool:
+        """Returns True iff the player to move can play: the game is over
+        as soon as the player to move has no token left"""
+        if not self.over and self.is_player_stack_empty(self.to_move):
+            self.over = True
+        return not self.over
+
+    def end_turn(self):
+        """Gives the hand to the next player. The game is over at the end
+        of the round, once the stack is empty."""
+        self.to_move = (self.to_move + 1) % self.nb_players
+        if self.to_move == 0 and self.stack.is_empty():
+            self.over = True
+
+    def give_up(self):
+        """The player to move cannot, or does not want to, play anymore"""
+        self.over = True
+
+    # Game specific actions
+    def play_token(self, player_id: int, token_index: int, i: int, j: int) -> Tuple[bool, dict]:
+        """Drops a token of the player at (i, j)"""
+        nb_tokens = self.nb_of_tokens_for(player_id)
+        if not 0 <= token_index < nb_tokens:
+            return False, dict(reason="Invalid token position")
+        token = self.players[player_id]['tokens'][token_index]
+        if not self.b.add_single_token(token, i, j):
+            return False, dict(reason=f"This action is not possible, you can't drop it at ({i}, {j})")
+        del self.players[player_id]['tokens'][token_index]
+        self._record_drops(player_id, [token])
+        if self.journal is not None:
+            self.journal.record_drop(player_id, token, i, j)
+        score = self.b.score_count(i, j)
+        self.add_score(player_id, score)
+        self.fill_player_stack(player_id)
+        return True, dict(score=score)
+
+    def play_move(self, player_id: int, move: Move) -> Tuple[bool, dict]:
+        """Drops one or several tokens of the player, see `Board.add_multi_token`"""
+        tokens = self.players[player_id]['tokens']
+        remaining = list(tokens)
+        for t in move.tokens:
+            if t not in remaining:
+                return False, dict(reason="Invalid token")
+            remaining.remove(t)
+        if not self.b.add_multi_token(move.tokens, move.pos_a, move.pos_b):
+            return False, dict(reason="It was impossible to drop the tokens.")
+        self.players[player_id]['tokens'] = remaining
+        self._record_drops(player_id, move.tokens)
+        if self.journal is not None:
+            if move.is_single():
+                self.journal.record_drop(player_id, move.tokens[0], *move.pos_a)
+            else:
+                self.journal.record_multi(player_id, move.tokens, move.pos_a, move.pos_b)
+        score = self.b.score_count(*move.pos_b)
+        self.add_score(player_id, score)
+        self.fill_player_stack(player_id)
+        return True, dict(score=score)
+
+    def exchange_token(self, player_id: int, token_index: int) -> Tuple[bool, dict]:
+        """Puts a token of the player back in the stack, and draws another one"""
+        nb_tokens = self.nb_of_tokens_for(player_id)
+        if not 0 <= token_index < nb_tokens:
+            return False, dict(reason="Invalid token position")
+        if self.stack.is_empty():
+            return False, dict(reason="Stack is empty, it is useless to exchange your token.")
+        token = self.players[player_id]['tokens'][token_index]
+        del self.players[player_id]['tokens'][token_index]
+        self.stack.randomly_append(token)
+        new_token = self.stack.pick()
+        self.add_token_to_player(player_id, new_token)
+        self.unseen[player_id].record_exchange(token, new_token)
+        if self.journal is not None:
+            self.journal.record_exchange(player_id, token, new_token)
+        return True, dict()
+
+    def _record_drops(self, player_id: int, tokens: List[Token]):
+        for k, unseen in enumerate(self.unseen):
+            for t in tokens:
+                unseen.record_drop(t, own=k == player_id)
+
+    def str_scores(self):
+        s = "Scores:\n"
+        sorted_players = sorted(self.players, key=lambda p: - p['score'])
+        for rank, player in enumerate(sorted_players):
+            s += f"\t[{rank + 1}] {player['name']}: {player['score']}\n"
+        return s[:-1]
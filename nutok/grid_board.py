@@ -0,0 +1,194 @@
+from typing import List, Tuple
+import numpy as np
+from nutok.tokens import Token, TOKEN_CODE_BASE, _POPCOUNT, _SHAPE_TOKENS, _COLOR_TOKENS
+from nutok.board import Board, LOCATION
+
+
+EMPTY = -1
+
+_POPCOUNT_ARRAY = np.array(_POPCOUNT, dtype=np.int8)
+_SHAPE_TOKENS_ARRAY = np.array(_SHAPE_TOKENS, dtype=np.uint64)
+_COLOR_TOKENS_ARRAY = np.array(_COLOR_TOKENS, dtype=np.uint64)
+
+# Shape and color bits of every token code, 0 for EMPTY (index -1)
+_SHAPE_BIT_OF_CODE = np.array([1 << (c // TOKEN_CODE_BASE) for c in range(TOKEN_CODE_BASE ** 2)] + [0])
+_COLOR_BIT_OF_CODE = np.array([1 << (c % TOKEN_CODE_BASE) for c in range(TOKEN_CODE_BASE ** 2)] + [0])
+
+# Tokens are kept at least MARGIN cells away from the border of the grids
+MARGIN = 2
+
+
+def _shift(a: np.ndarray, di: int, dj: int, fill) -> np.ndarray:
+    """Returns b such that b[..., p, q] = a[..., p - di, q - dj], `fill` outside of a"""
+    b = np.full_like(a, fill)
+    h, w = a.shape[-2:]
+    b[..., max(di, 0):h + min(di, 0), max(dj, 0):w + min(dj, 0)] = \
+        a[..., max(-di, 0):h + min(-di, 0), max(-dj, 0):w + min(-dj, 0)]
+    return b
+
+
+def frontier_of(grid: np.ndarray) -> np.ndarray:
+    """Returns the empty locations near a token, for grids of shape (..., H, W)"""
+    occupied = grid != EMPTY
+    near = np.zeros_like(occupied)
+    for di, dj in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
+        near |= _shift(occupied, di, dj, False)
+    return near & ~occupied
+
+
+def _side_runs(flat: np.ndarray, cells: np.ndarray, order: int, step: int) \
+        -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Describes, for the provided cells of a flattened grid, the run of
+    tokens starting right next to each of them, `step` cells apart:
+    its number of tokens, capped to the order, and its shape and color masks.
+
+    Cells must be at least one cell away from the border of their grid,
+    and the border must be empty: runs then never go across it."""
+    size = np.zeros(len(cells), dtype=np.int64)
+    shape_mask = np.zeros(len(cells), dtype=np.int64)
+    color_mask = np.zeros(len(cells), dtype=np.int64)
+    alive = np.ones(len(cells), dtype=bool)
+    for k in range(1, order + 1):
+        # Tokens k cells away, as long as the run is not interrupted.
+        # Clipped cells are only read once the run is over.
+        codes = flat[np.clip(cells + k * step, 0, len(flat) - 1)]
+        alive &= codes != EMPTY
+        if not alive.any():
+            break
+        size += alive
+        shape_mask |= np.where(alive, _SHAPE_BIT_OF_CODE[codes], 0)
+        color_mask |= np.where(alive, _COLOR_BIT_OF_CODE[codes], 0)
+    return size, shape_mask, color_mask
+
+
+def _admissible_along(flat: np.ndarray, cells: np.ndarray, order: int, code_mask: int, step: int) \
+        -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorized `TokenSet.admissible_mask` of the lines that go through
+    the provided cells of a flattened grid, `step` cells apart.
+
+    Returns the admissible masks, and the number of tokens of the lines
+    (the cell itself excluded)."""
+    size_a, shape_a, color_a = _side_runs(flat, cells, order, step)
+    size_b, shape_b, color_b = _side_runs(flat, cells, order, -step)
+    size = size_a + size_b
+    shape_mask = shape_a | shape_b
+    color_mask = color_a | color_b
+
+    nb_shapes = _POPCOUNT_ARRAY[shape_mask]
+    nb_colors = _POPCOUNT_ARRAY[color_mask]
+    same_shape = (nb_shapes == 1) & (nb_colors == size)
+    same_color = (nb_colors == 1) & (nb_shapes == size)
+    shape_tokens = _SHAPE_TOKENS_ARRAY[shape_mask]
+    color_tokens = _COLOR_TOKENS_ARRAY[color_mask]
+
+    zero = np.uint64(0)
+    mask = np.where(same_shape, shape_tokens & ~color_tokens, zero)
+    mask |= np.where(same_color, color_tokens & ~shape_tokens, zero)
+    mask = np.where(size >= order, zero, mask)
+    mask = np.where(size == 0, np.uint64(code_mask), mask)
+    return mask & np.uint64(code_mask), size
+
+
+def admissible_of(grid: np.ndarray, order: int, code_mask: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Returns, for every location of grids of shape (..., H, W), the set of
+    tokens that can be dropped there, as a mask over the token codes,
+    and the number of tokens of the vertical and horizontal lines
+    the location would join.
+
+    Only the frontier is looked at: other locations accept no token, and
+    their lines are reported empty. Tokens must be at least two cells away
+    from the border of the grids (see `GridBoard`)."""
+    flat = grid.reshape(-1)
+    cells = np.flatnonzero(frontier_of(grid))
+    mask_v, size_v = _admissible_along(flat, cells, order, code_mask, grid.shape[-1])
+    mask_h, size_h = _admissible_along(flat, cells, order, code_mask, 1)
+
+    mask = np.zeros(flat.shape, dtype=np.uint64)
+    mask[cells] = mask_v & mask_h
+    sizes_v = np.zeros(flat.shape, dtype=np.int64)
+    sizes_v[cells] = size_v
+    sizes_h = np.zeros(flat.shape, dtype=np.int64)
+    sizes_h[cells] = size_h
+    return mask.reshape(grid.shape), sizes_v.reshape(grid.shape), sizes_h.reshape(grid.shape)
+
+
+class GridBoard(Board):
+
+    def __init__(self, order: int, size: int = 16):
+        """Board that also stores its tokens in a growable NumPy grid,
+        so that questions about all locations are answered at once,
+        with array operations.
+
+        grid[p, q] holds the code of the token at (p + origin[0], q + origin[1]),
+        EMPTY if there is none. The grid always keeps an empty border of
+        MARGIN cells, so that every location near a token is in the grid,
+        and lines never go across the border.
+
+        :param size: Initial height and width of the grid
+        """
+        super().__init__(order)
+        self.grid = np.full((size, size), EMPTY, dtype=np.int8)
+        self.origin = (-(size // 2), -(size // 2))
+
+    def add_single_token_no_check(self, token: Token, i: int, j: int):
+        super().add_single_token_no_check(token, i, j)
+        self._fit(i, j)
+        self.grid[i - self.origin[0], j - self.origin[1]] = token.code
+
+    def remove_single_token_no_check(self, i: int, j: int) -> Token:
+        token = super().remove_single_token_no_check(i, j)
+        self.grid[i - self.origin[0], j - self.origin[1]] = EMPTY
+        return token
+
+    def copy(self) -> 'GridBoard':
+        b = super().copy()
+        b.grid = self.grid.copy()
+        return b
+
+    def _fit(self, i: int, j: int):
+        """Grows the grid, so that (i, j) is in it, away from its border"""
+        while True:
+            h, w = self.grid.shape
+            p, q = i - self.origin[0], j - self.origin[1]
+            if MARGIN <= p < h - MARGIN and MARGIN <= q < w - MARGIN:
+                return
+            # Doubles the size along the axes that are too small
+            extra_top = h if p < MARGIN else 0
+            extra_bottom = h if p >= h - MARGIN else 0
+            extra_left = w if q < MARGIN else 0
+            extra_right = w if q >= w - MARGIN else 0
+            grid = np.full((h + extra_top + extra_bottom, w + extra_left + extra_right), EMPTY, dtype=np.int8)
+            grid[extra_top:extra_top + h, extra_left:extra_left + w] = self.grid
+            self.grid = grid
+            self.origin = (self.origin[0] - extra_top, self.origin[1] - extra_left)
+
+    def _to_locations(self, mask: np.ndarray) -> List[LOCATION]:
+        rows, cols = np.nonzero(mask)
+        oi, oj = self.origin
+        return [(int(p) + oi, int(q) + oj) for p, q in zip(rows, cols)]
+
+    def frontier_grid(self) -> np.ndarray:
+        """Returns the grid of the empty locations near a token"""
+        return frontier_of(self.grid)
+
+    def admissible_grid(self) -> np.ndarray:
+        """Returns, for every location of the grid, the set of tokens that can
+        be dropped there, as a mask over the token codes (see `admissible_mask`)"""
+        mask, _, _ = admissible_of(self.grid, self.order, self.token_set.code_mask)
+        return mask
+
+    def droppable_locations(self, token: Token) -> List[LOCATION]:
+        """Returns all the locations where token can be dropped,
+        checked all at once"""
+        bit = np.uint64(1 << token.code)
+        return self._to_locations(self.admissible_grid() & bit)
+
+    def droppable_tokens(self, rack: List[Token]) -> List[Tuple[Token, LOCATION]]:
+        """Returns every (token, location) of the rack that can be dropped,
+        checked all at once"""
+        admissible = self.admissible_grid()
+        drops = list()
+        for t in dict.fromkeys(rack):
+            for loc in self._to_locations(admissible & np.uint64(1 << t.code)):
+                drops.append((t, loc))
+        return drops
@@ -0,0 +1,254 @@
+import functools
+import json
+import threading
+import time
+import weakref
+from typing import TextIO
+from nutok.tokens import TokenSet
+from nutok.board import Board
+from nutok.render import BoardRenderer
+
+
+# Operations timed when the instrumentation is enabled, by class
+OPERATIONS = {
+    Board: [
+        'single_droppable',
+        'multi_droppable',
+        'line_consistency_with',
+        'admissible_mask',
+        'legal_moves',
+        'get_widest_line',
+        'get_multi_widest_line',
+        'get_all_nearest_empty_locations',
+        'score_count',
+        'add_single_token_no_check',
+        'remove_single_token_no_check',
+    ],
+    TokenSet: [
+        'line_consistency',
+        'mask_consistency',
+        'admissible_mask',
+    ],
+    BoardRenderer: [
+        'render',
+        'render_with_indices',
+    ],
+}
+
+# Operations that play a move: the dict probes made since the end
+# of the previous move are charged to the move
+MOVE_OPERATIONS = {
+    Board: [
+        'add_single_token',
+        'add_multi_token',
+        'push_move',
+        'drop_first_token',
+    ],
+}
+
+
+class OperationStats:
+
+    __slots__ = ('calls', 'total_time')
+
+    def __init__(self):
+        """Number of calls of an operation, and their total duration in
+        seconds. Nested calls are included in the time of their caller."""
+        self.calls = 0
+        self.total_time = 0.
+
+    def as_dict(self) -> dict:
+        mean = self.total_time / self.calls if self.calls else 0.
+        return dict(calls=self.calls, total_time=self.total_time, mean_time=mean)
+
+
+class _ProbeCountingDict(dict):
+
+    __slots__ = ('_owner',)
+
+    def __init__(self, owner: 'Instrumentation', content: dict):
+        """Dict counting its lookups in owner.probes"""
+        super().__init__(content)
+        self._owner = owner
+
+    def __getitem__(self, key):
+        self._owner.probes += 1
+        return dict.__getitem__(self, key)
+
+    def __contains__(self, key):
+        self._owner.probes += 1
+        return dict.__contains__(self, key)
+
+    def get(self, key, default=None):
+        self._owner.probes += 1
+        return dict.get(self, key, default)
+
+    def pop(self, key, *default):
+        self._owner.probes += 1
+        return dict.pop(self, key, *default)
+
+
+class Instrumentation:
+
+    def __init__(self):
+        """Counts calls and time spent in the hot operations of the engine
+        (see `OPERATIONS`), and the dict lookups made on the boards for
+        each move.
+
+        Disabled by default. Enabling it wraps the operations in place,
+        and disabling it restores the original methods: disabled, it costs
+        nothing. Dict lookups are only counted on the boards created while
+        enabled, or explicitly watched (see `watch`).
+        """
+        self.enabled = False
+        self.stats = dict()
+        self.probes = 0
+        self.nb_moves = 0
+        self.move_probes = 0
+        self.max_move_probes = 0
+        self._originals = list()
+        self._boards = weakref.WeakSet()
+        self._move_depth = 0
+        self._move_start = 0
+        self._dump_thread = None
+        self._dump_stop = None
+
+    def enable(self):
+        if self.enabled:
+            return
+        for cls, names in OPERATIONS.items():
+            for name in names:
+                self._patch(cls, name, self._timed(f"{cls.__name__}.{name}", cls.__dict__[name]))
+        for cls, names in MOVE_OPERATIONS.items():
+            for name in names:
+                self._patch(cls, name, self._move(cls.__dict__[name]))
+        self._patch(Board, '__init__', self._watching(Board.__dict__['__init__']))
+        self.enabled = True
+
+    def disable(self):
+        if not self.enabled:
+            return
+        for cls, name, func in reversed(self._originals):
+            setattr(cls, name, func)
+        self._originals = list()
+        for b in list(self._boards):
+            self.unwatch(b)
+        self.enabled = False
+
+    def reset(self):
+        """Forgets all the measures"""
+        self.stats = {name: OperationStats() for name in self.stats}
+        for cls, name, _ in self._originals:
+            wrapper = cls.__dict__[name]
+            if hasattr(wrapper, 'stats_name'):
+                wrapper.stats = self.stats[wrapper.stats_name]
+        self.probes = 0
+        self.nb_moves = 0
+        self.move_probes = 0
+        self.max_move_probes = 0
+        self._move_start = 0
+
+    def watch(self, board: Board):
+        """Counts the dict lookups made on a board created beforehand"""
+        board.dropped = _ProbeCountingDict(self, board.dropped)
+        board._frontier = _ProbeCountingDict(self, board._frontier)
+        board._live = _ProbeCountingDict(self, board._live)
+        for runs in board._runs.values():
+            runs._runs = _ProbeCountingDict(self, runs._runs)
+        self._boards.add(board)
+
+    def unwatch(self, board: Board):
+        board.dropped = dict(board.dropped)
+        board._frontier = dict(board._frontier)
+        board._live = dict(board._live)
+        for runs in board._runs.values():
+            runs._runs = dict(runs._runs)
+        self._boards.discard(board)
+
+    def snapshot(self) -> dict:
+        """Returns the measures so far, as a JSON serializable dict"""
+        return dict(
+            time=time.time(),
+            operations={name: s.as_dict() for name, s in sorted(self.stats.items()) if s.calls},
+            probes=self.probes,
+            moves=self.nb_moves,
+            probes_per_move=self.move_probes / self.nb_moves if self.nb_moves else 0.,
+            max_probes_per_move=self.max_move_probes,
+        )
+
+    def dump(self, stream: TextIO):
+        """Writes a snapshot to stream, as a line of JSON"""
+        stream.write(json.dumps(self.snapshot()) + "\n")
+        stream.flush()
+
+    def start_periodic_dump(self, stream: TextIO, interval: float = 10.):
+        """Dumps a snapshot to stream every interval seconds,
+        from a background thread, until `stop_periodic_dump`"""
+        self.stop_periodic_dump()
+        stop = threading.Event()
+
+        def loop():
+            while not stop.wait(interval):
+                self.dump(stream)
+
+        self._dump_stop = stop
+        self._dump_thread = threading.Thread(target=loop, daemon=True)
+        self._dump_thread.start()
+
+    def stop_periodic_dump(self):
+        if self._dump_thread is not None:
+            self._dump_stop.set()
+            self._dump_thread.join()
+            self._dump_thread = None
+            self._dump_stop = None
+
+    def _patch(self, cls, name: str, wrapper):
+        self._originals.append((cls, name, cls.__dict__[name]))
+        setattr(cls, name, wrapper)
+
+    def _timed(self, stats_name: str, func):
+        stats = self.stats.setdefault(stats_name, OperationStats())
+        perf_counter = time.perf_counter
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            t0 = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                s = wrapper.stats
+                s.calls += 1
+                s.total_time += perf_counter() - t0
+
+        wrapper.stats = stats
+        wrapper.stats_name = stats_name
+        return wrapper
+
+    def _move(self, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            self._move_depth += 1
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._move_depth -= 1
+                if self._move_depth == 0:
+                    probes = self.probes - self._move_start
+                    self._move_start = self.probes
+                    self.nb_moves += 1
+                    self.move_probes += probes
+                    self.max_move_probes = max(self.max_move_probes, probes)
+
+        return wrapper
+
+    def _watching(self, init):
+        @functools.wraps(init)
+        def wrapper(board, *args, **kwargs):
+            init(board, *args, **kwargs)
+            self.watch(board)
+
+        return wrapper
+
+
+# Instrumentation of the engine, switched on with `instrumentation.enable()`
+instrumentation = Instrumentation()
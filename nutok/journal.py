@@ -0,0 +1,208 @@
+import io
+from typing import Union, List, Tuple, BinaryIO, Iterator
+from nutok.tokens import Token
+from nutok.board import Board
+from nutok.serialization import MAGIC, VERSION, KIND_JOURNAL, write_varint, read_varint, zigzag, unzigzag
+
+
+LOCATION = Tuple[int, int]
+
+# Player of the moves that are not made by a player, e.g. the first token
+NO_PLAYER = -1
+
+
+class JournalEntry:
+
+    (
+        DROP,
+        MULTI,
+        EXCHANGE
+    ) = range(3)
+
+    __slots__ = ('kind', 'player', 'tokens', 'pos_a', 'pos_b')
+
+    def __init__(self, kind: int, player: int, tokens: List[Token],
+                 pos_a: Union[None, LOCATION] = None, pos_b: Union[None, LOCATION] = None):
+        """Single action of a game
+
+        DROP: tokens[0] dropped at pos_a (pos_b == pos_a)
+        MULTI: tokens dropped along the line pos_a to pos_b
+        EXCHANGE: tokens[0] put back in the stack, tokens[1] picked instead
+        """
+        self.kind = kind
+        self.player = player
+        self.tokens = tokens
+        self.pos_a = pos_a
+        self.pos_b = pos_b
+
+    def __eq__(self, other):
+        return (self.kind, self.player, self.tokens, self.pos_a, self.pos_b) == \
+            (other.kind, other.player, other.tokens, other.pos_a, other.pos_b)
+
+    def __repr__(self):
+        return f"JournalEntry({self.kind}, {self.player}, {self.tokens}, {self.pos_a}, {self.pos_b})"
+
+    def apply(self, b: Board):
+        """Plays the entry on the board, without checking the games rules"""
+        if self.kind == self.EXCHANGE:
+            return
+        locations, _ = b.pos_to_locations(self.pos_a, self.pos_b)
+        for t, (i, j) in zip(self.tokens, locations):
+            b.add_single_token_no_check(t, i, j)
+
+    def encode(self) -> bytes:
+        buffer = bytearray()
+        buffer.append(self.kind)
+        write_varint(buffer, zigzag(self.player))
+        if self.kind != self.EXCHANGE:
+            for v in self.pos_a + self.pos_b:
+                write_varint(buffer, zigzag(v))
+        write_varint(buffer, len(self.tokens))
+        buffer += bytes(t.code for t in self.tokens)
+        return bytes(buffer)
+
+    @classmethod
+    def decode(cls, data: bytes, pos: int) -> Tuple['JournalEntry', int]:
+        kind = data[pos]
+        player, pos = read_varint(data, pos + 1)
+        pos_a = pos_b = None
+        if kind != cls.EXCHANGE:
+            coords = list()
+            for _ in range(4):
+                v, pos = read_varint(data, pos)
+                coords.append(unzigzag(v))
+            pos_a, pos_b = (coords[0], coords[1]), (coords[2], coords[3])
+        n, pos = read_varint(data, pos)
+        tokens = [Token.from_code(code) for code in data[pos:pos + n]]
+        return cls(kind, unzigzag(player), tokens, pos_a, pos_b), pos + n
+
+
+class MoveJournal:
+
+    def __init__(self, order: int, stream: Union[None, BinaryIO] = None):
+        """Append-only log of the actions of a game.
+
+        Entries are kept in memory and, if a binary stream is provided,
+        written to it as soon as they are recorded: a header, then one
+        length-prefixed entry after another (see `read_journal`).
+        """
+        self.order = order
+        self.entries = list()
+        self.stream = stream
+        if stream is not None:
+            header = bytearray(MAGIC)
+            header.append(VERSION)
+            header.append(KIND_JOURNAL)
+            header.append(order)
+            stream.write(header)
+
+    def __len__(self):
+        """Returns the number of recorded entries, i.e. of plies"""
+        return len(self.entries)
+
+    def record(self, entry: JournalEntry):
+        self.entries.append(entry)
+        if self.stream is not None:
+            data = entry.encode()
+            frame = bytearray()
+            write_varint(frame, len(data))
+            self.stream.write(bytes(frame) + data)
+            self.stream.flush()
+
+    def record_drop(self, player: int, token: Token, i: int, j: int):
+        """Records `Board.add_single_token(token, i, j)`"""
+        self.record(JournalEntry(JournalEntry.DROP, player, [token], (i, j), (i, j)))
+
+    def record_multi(self, player: int, tokens: List[Token], pos_a: LOCATION, pos_b: LOCATION):
+        """Records `Board.add_multi_token(tokens, pos_a, pos_b)`"""
+        self.record(JournalEntry(JournalEntry.MULTI, player, list(tokens), pos_a, pos_b))
+
+    def record_exchange(self, player: int, given: Token, received: Token):
+        """Records the exchange of `given` with `received` from the stack"""
+        self.record(JournalEntry(JournalEntry.EXCHANGE, player, [given, received]))
+
+
+def iter_journal(stream: BinaryIO) -> Tuple[int, Iterator[JournalEntry]]:
+    """Reads a journal written by `MoveJournal` entry by entry.
+    Returns the order of the game and an iterator over the entries.
+
+    A truncated tail, e.g. the last entry of a journal still being written,
+    ends the iteration: the bytes of the incomplete entry are consumed,
+    so reading cannot resume from there."""
+    header = stream.read(len(MAGIC) + 3)
+    if len(header) < len(MAGIC) + 3:
+        raise ValueError("incomplete journal header")
+    if header[:len(MAGIC)] != MAGIC or header[len(MAGIC) + 1] != KIND_JOURNAL:
+        raise ValueError("not a nutok journal")
+    if header[len(MAGIC)] != VERSION:
+        raise ValueError(f"unsupported format version: {header[len(MAGIC)]}")
+    order = header[-1]
+
+    def entries():
+        while True:
+            # The size prefix is read byte by byte, so that no byte
+            # of the next frame is consumed
+            size, shift = 0, 0
+            while True:
+                byte = stream.read(1)
+                if not byte:
+                    return
+                size |= (byte[0] & 0x7F) << shift
+                if byte[0] < 0x80:
+                    break
+                shift += 7
+            payload = stream.read(size)
+            if len(payload) < size:
+                return
+            entry, _ = JournalEntry.decode(payload, 0)
+            yield entry
+
+    return order, entries()
+
+
+def read_journal(data: Union[bytes, BinaryIO]) -> MoveJournal:
+    """Loads a whole journal, from bytes or from a binary stream"""
+    if isinstance(data, (bytes, bytearray)):
+        data = io.BytesIO(data)
+    order, entries = iter_journal(data)
+    journal = MoveJournal(order)
+    journal.entries = list(entries)
+    return journal
+
+
+class JournalReplayer:
+
+    def __init__(self, journal: MoveJournal, snapshot_interval: int = 64):
+        """Rebuilds the board of a journaled game at any ply.
+
+        The board at ply k is the board once the first k entries are played.
+        Snapshots of the board are taken every `snapshot_interval` plies as
+        they get replayed, so that seeking only copies the closest snapshot
+        (see `Board.copy`), and replays the entries since.
+        """
+        self.journal = journal
+        self.snapshot_interval = snapshot_interval
+        # Boards at plies 0, snapshot_interval, 2 * snapshot_interval...
+        self._snapshots = [Board(journal.order)]
+
+    def board_at(self, ply: int) -> Board:
+        """Returns the board at the provided ply"""
+        if not 0 <= ply <= len(self.journal):
+            raise IndexError(f"ply {ply} out of range [0, {len(self.journal)}]")
+
+        k = min(ply // self.snapshot_interval, len(self._snapshots) - 1)
+        b = self._snapshots[k].copy()
+        for p in range(k * self.snapshot_interval, ply):
+            self.journal.entries[p].apply(b)
+            if (p + 1) % self.snapshot_interval == 0 and (p + 1) // self.snapshot_interval == len(self._snapshots):
+                self._snapshots.append(b.copy())
+        return b
+
+    def boards(self) -> Iterator[Board]:
+        """Yields the board after each ply, from ply 0.
+        The same board object is updated and yielded every time."""
+        b = Board(self.journal.order)
+        yield b
+        for entry in self.journal.entries:
+            entry.apply(b)
+            yield b
@@ -0,0 +1,258 @@
+import math
+import multiprocessing
+import random
+import time
+from typing import Union, List, Dict, Tuple
+from nutok.tokens import Token
+from nutok.board import Board
+from nutok.moves import Move
+from nutok.players import AiPlayer
+from nutok.serialization import dump_board, load_board
+from nutok.unseen import UnseenTokens
+
+
+def unseen_tokens(board: Board, rack: List[Token]) -> List[Token]:
+    """Returns the tokens a player cannot see: the ones that are
+    neither on the board, nor in the rack of the player"""
+    return UnseenTokens.from_board(board, rack).tokens()
+
+
+class _Determinization:
+
+    def __init__(self, racks: List[List[Token]], stack: List[Token], rack_size: int):
+        """One possible state of the hidden information, played forward
+        during an iteration. Player 0 is the searching player."""
+        self.racks = racks
+        self.stack = stack
+        self.rack_size = rack_size
+        self.gains = [0] * len(racks)
+        self.to_move = 0
+        self.passes = 0
+
+    def is_over(self) -> bool:
+        return self.passes >= len(self.racks) or any(not r for r in self.racks)
+
+    def apply(self, board: Board, move: Union[None, Move], rng: random.Random):
+        """Plays move for the player to move (None: exchange, or pass if the
+        stack is empty), then gives the hand to the next player"""
+        rack = self.racks[self.to_move]
+        if move is None:
+            if self.stack:
+                k = rng.randrange(len(rack))
+                self.stack.insert(rng.randrange(len(self.stack)), rack[k])
+                rack[k] = self.stack.pop()
+            self.passes += 1
+        else:
+            board.push_move(move)
+            for t in move.tokens:
+                rack.remove(t)
+            while len(rack) < self.rack_size and self.stack:
+                rack.append(self.stack.pop())
+            self.gains[self.to_move] += move.score
+            self.passes = 0
+        self.to_move = (self.to_move + 1) % len(self.racks)
+
+    def random_move(self, board: Board, rng: random.Random) -> Union[None, Move]:
+        """Cheap random policy of `try_a_game`: a random token of the rack
+        dropped at a random location, None if no token fits anywhere"""
+        rack = list(dict.fromkeys(self.racks[self.to_move]))
+        rng.shuffle(rack)
+        for t in rack:
+            moves = board.legal_moves([t], multi=False)
+            if moves:
+                return rng.choice(moves)
+        return None
+
+    def rewards(self) -> List[float]:
+        """1 for the players who gained the most points, 0 for the others"""
+        best = max(self.gains)
+        winners = [g == best for g in self.gains]
+        return [1. / sum(winners) if w else 0. for w in winners]
+
+
+class MctsNode:
+
+    __slots__ = ('move', 'player', 'children', 'visits', 'reward', 'availability')
+
+    def __init__(self, move: Union[None, Move], player: int):
+        """Node of the search tree: move played by player to reach it.
+
+        Children are only available when their move is legal in the
+        determinization of the iteration: availability counts how many
+        times it was the case, and replaces the visits of the parent in UCT.
+        """
+        self.move = move
+        self.player = player
+        self.children = dict()
+        self.visits = 0
+        self.reward = 0.
+        self.availability = 0
+
+    def ucb(self, exploration: float) -> float:
+        return self.reward / self.visits + exploration * math.sqrt(math.log(self.availability) / self.visits)
+
+
+class MctsSearch:
+
+    def __init__(self, board: Board, rack: List[Token], stack_size: int, nb_opponents: int = 1,
+                 exploration: float = 0.7, horizon: int = 8, multi: bool = True,
+                 rng: Union[None, random.Random] = None, unseen: Union[None, List[Token]] = None):
+        """Information set Monte Carlo tree search, from the point of view
+        of a player who knows the board and its rack.
+
+        Every iteration draws a determinization of the hidden tokens (the
+        opponent racks and the stack), selects moves with UCT, expands one
+        node, and finishes with a random playout of `horizon` moves.
+
+        :param stack_size: Number of tokens left in the stack
+        :param multi: Whether the tree explores lines of tokens, or only single drops
+        :param unseen: Tokens the player cannot see, counted from the board and the rack if None
+        """
+        self.board = board
+        self.rack = list(rack)
+        self.rack_size = board.order
+        self.nb_players = nb_opponents + 1
+        self.unseen = list(unseen) if unseen is not None else unseen_tokens(board, rack)
+        self.stack_size = min(stack_size, len(self.unseen))
+        self.exploration = exploration
+        self.horizon = horizon
+        self.multi = multi
+        self.rng = rng if rng is not None else random.Random()
+        self.root = MctsNode(None, self.nb_players - 1)
+        self.iterations = 0
+
+    def determinize(self) -> _Determinization:
+        """Draws opponent racks and a stack among the unseen tokens"""
+        unseen = list(self.unseen)
+        self.rng.shuffle(unseen)
+        nb_opponents = self.nb_players - 1
+        per_opponent = (len(unseen) - self.stack_size) // nb_opponents
+        if per_opponent == 0:
+            # The stack size does not leave any token to the opponents
+            per_opponent = len(unseen) // self.nb_players
+        per_opponent = min(self.rack_size, per_opponent)
+        racks = [list(self.rack)]
+        for k in range(nb_opponents):
+            racks.append(unseen[k * per_opponent:(k + 1) * per_opponent])
+        stack = unseen[nb_opponents * per_opponent:]
+        return _Determinization(racks, stack, self.rack_size)
+
+    def iterate(self):
+        """Runs one iteration of the search"""
+        state = self.determinize()
+        nb_pushed = self.board.nb_pushed_moves()
+        node = self.root
+        path = [node]
+        try:
+            # Selection, then expansion of a single node
+            while not state.is_over():
+                moves = self.board.legal_moves(state.racks[state.to_move], multi=self.multi)
+                if not moves:
+                    moves = [None]
+                unexplored = list()
+                available = list()
+                for m in moves:
+                    child = node.children.get(m)
+                    if child is None:
+                        unexplored.append(m)
+                    else:
+                        child.availability += 1
+                        available.append(child)
+                if unexplored:
+                    m = self.rng.choice(unexplored)
+                    child = node.children[m] = MctsNode(m, state.to_move)
+                    child.availability += 1
+                    state.apply(self.board, m, self.rng)
+                    path.append(child)
+                    break
+                node = max(available, key=lambda c: c.ucb(self.exploration))
+                state.apply(self.board, node.move, self.rng)
+                path.append(node)
+
+            # Playout
+            for _ in range(self.horizon):
+                if state.is_over():
+                    break
+                state.apply(self.board, state.random_move(self.board, self.rng), self.rng)
+        finally:
+            while self.board.nb_pushed_moves() > nb_pushed:
+                self.board.pop_move()
+
+        rewards = state.rewards()
+        for n in path:
+            n.visits += 1
+            n.reward += rewards[n.player]
+        self.iterations += 1
+
+    def run(self, time_budget: float, max_iterations: Union[None, int] = None):
+        """Iterates until the time budget or the number of iterations runs out"""
+        deadline = time.perf_counter() + time_budget
+        while time.perf_counter() < deadline:
+            if max_iterations is not None and self.iterations >= max_iterations:
+                break
+            self.iterate()
+
+    def statistics(self) -> Dict[Union[None, Move], Tuple[int, float]]:
+        """Returns the visits and the total reward of the moves of the root"""
+        return {m: (c.visits, c.reward) for m, c in self.root.children.items()}
+
+
+def _search_worker(args) -> Dict[Union[None, Move], Tuple[int, float]]:
+    data, codes, unseen_codes, stack_size, params, seed, time_budget, max_iterations = args
+    unseen = [Token.from_code(c) for c in unseen_codes] if unseen_codes is not None else None
+    search = MctsSearch(load_board(data), [Token.from_code(c) for c in codes], stack_size,
+                        rng=random.Random(seed), unseen=unseen, **params)
+    search.run(time_budget, max_iterations)
+    return search.statistics()
+
+
+class MctsPlayer(AiPlayer):
+
+    def __init__(self, time_budget: float = 1.0, processes: int = 1, nb_opponents: int = 1,
+                 exploration: float = 0.7, horizon: int = 8, multi: bool = True,
+                 max_iterations: Union[None, int] = None, seed: Union[None, int] = None):
+        """Plays the most visited move of Monte Carlo tree searches
+        (see `MctsSearch`), run independently on `processes` processes
+        (root parallelization), whose root statistics are merged.
+        Worker processes only live for the duration of a search.
+
+        :param max_iterations: Maximum number of iterations per process
+        :param seed: Seed of the searches, random if None
+        """
+        super().__init__(time_budget)
+        self.processes = processes
+        self.params = dict(nb_opponents=nb_opponents, exploration=exploration, horizon=horizon, multi=multi)
+        self.max_iterations = max_iterations
+        self.rng = random.Random(seed)
+        # Merged root statistics of the last search, for inspection
+        self.statistics = dict()
+
+    def choose(self, board: Board, rack: List[Token], stack_size: int) -> Union[None, Move]:
+        moves = board.legal_moves(rack, multi=self.params['multi'])
+        if len(moves) <= 1:
+            return moves[0] if moves else None
+
+        seeds = [self.rng.getrandbits(64) for _ in range(self.processes)]
+        unseen = self.unseen.tokens() if self.unseen is not None else None
+        if self.processes == 1:
+            search = MctsSearch(board, rack, stack_size, rng=random.Random(seeds[0]), unseen=unseen, **self.params)
+            search.run(self.time_budget, self.max_iterations)
+            results = [search.statistics()]
+        else:
+            data = dump_board(board)
+            codes = [t.code for t in rack]
+            unseen_codes = [t.code for t in unseen] if unseen is not None else None
+            with multiprocessing.Pool(self.processes) as pool:
+                results = pool.map(_search_worker, [
+                    (data, codes, unseen_codes, stack_size, self.params, s, self.time_budget, self.max_iterations)
+                    for s in seeds
+                ])
+
+        self.statistics = dict()
+        for stats in results:
+            for m, (visits, reward) in stats.items():
+                v, r = self.statistics.get(m, (0, 0.))
+                self.statistics[m] = (v + visits, r + reward)
+
+        visits = {m: self.statistics.get(m, (0, 0.))[0] for m in moves}
+        return max(moves, key=visits.__getitem__)
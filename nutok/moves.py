@@ -0,0 +1,59 @@
+from typing import List, Type, Tuple
+from nutok.tokens import Token
+from nutok.directions import Direction, Vertical, Horizontal
+
+
+LOCATION = Tuple[int, int]
+
+
+class Move:
+
+    __slots__ = ('tokens', 'pos_a', 'pos_b', 'score')
+
+    def __init__(self, tokens: List[Token], pos_a: LOCATION, pos_b: LOCATION, score: int = 0):
+        """Drop of one or several tokens along the line defined
+        by the locations `pos_a` and `pos_b` (both ends included),
+        as accepted by `Board.add_multi_token`.
+
+        :param tokens: Tokens to drop, from pos_a to pos_b
+        :param score: Score of the move, see `Board.legal_moves`
+        """
+        self.tokens = tokens
+        self.pos_a = pos_a
+        self.pos_b = pos_b
+        self.score = score
+
+    def __len__(self):
+        """Returns the number of dropped tokens"""
+        return len(self.tokens)
+
+    def __eq__(self, other):
+        return self.tokens == other.tokens and self.pos_a == other.pos_a and self.pos_b == other.pos_b
+
+    def __hash__(self):
+        return hash((tuple(self.tokens), self.pos_a, self.pos_b))
+
+    def __repr__(self):
+        tokens = ",".join([str(t) for t in self.tokens])
+        return f"Move({tokens}, {self.pos_a}, {self.pos_b}, score={self.score})"
+
+    def is_single(self) -> bool:
+        """Says whether a single token is dropped"""
+        return len(self.tokens) == 1
+
+    @property
+    def direction(self) -> Type[Direction]:
+        """Direction of the line, Horizontal for single drops"""
+        if self.pos_a[0] == self.pos_b[0]:
+            return Horizontal
+        return Vertical
+
+    def locations(self) -> List[LOCATION]:
+        """Returns the locations of the dropped tokens"""
+        direction = self.direction
+        loc = self.pos_a
+        locations = list()
+        for _ in self.tokens:
+            locations.append(loc)
+            loc = direction.next(*loc)
+        return locations
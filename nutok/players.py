@@ -0,0 +1,166 @@
+import time
+from typing import Union, List, Tuple
+from nutok.tokens import Token
+from nutok.board import Board
+from nutok.moves import Move
+
+
+class AiPlayer:
+
+    def __init__(self, time_budget: Union[None, float] = None):
+        """Artificial player, choosing moves for a rack of tokens
+
+        :param time_budget: Maximum time to choose a move, in seconds,
+            None for the players that do not search
+        """
+        self.time_budget = time_budget
+        # Clock of the deadlines, in seconds
+        self.clock = time.perf_counter
+        # Tokens the player has not seen (see `nutok.unseen.UnseenTokens`),
+        # kept up to date by the game it plays, None if there is none
+        self.unseen = None
+
+    def choose(self, board: Board, rack: List[Token], stack_size: int) -> Union[None, Move]:
+        """Returns the move to play, None if the player would rather
+        exchange a token (see `exchange_index`)"""
+        raise NotImplementedError
+
+    def exchange_index(self, board: Board, rack: List[Token]) -> int:
+        """Returns the index of the rack token to exchange:
+        the one that fits in the fewest locations"""
+        admissible = [board.admissible_mask(i, j) for i, j in board.live_locations()]
+
+        def nb_locations(k):
+            return sum(1 for mask in admissible if mask >> rack[k].code & 1)
+
+        return min(range(len(rack)), key=nb_locations)
+
+
+class GreedyPlayer(AiPlayer):
+
+    def __init__(self):
+        """Drops the single token that scores the most"""
+        super().__init__()
+
+    def choose(self, board: Board, rack: List[Token], stack_size: int) -> Union[None, Move]:
+        moves = board.legal_moves(rack, multi=False)
+        if not moves:
+            return None
+        return max(moves, key=lambda m: m.score)
+
+
+class MultiTokenPlayer(AiPlayer):
+
+    def __init__(self, time_budget: float = 1.0, leave_weight: float = 0.5):
+        """Plays lines of tokens, scoring the most, while keeping tokens
+        that can be combined with each other in the rack. Moves are rated
+        from the best scoring one, until the time budget runs out.
+
+        :param leave_weight: Value of each pair of combinable tokens left in the rack
+        """
+        super().__init__(time_budget)
+        self.leave_weight = leave_weight
+
+    @staticmethod
+    def leave_value(rack: List[Token], move: Move) -> int:
+        """Counts the pairs of distinct tokens left in the rack
+        that share their shape or their color"""
+        left = list(rack)
+        for t in move.tokens:
+            left.remove(t)
+        left = list(dict.fromkeys(left))
+        pairs = 0
+        for k, ta in enumerate(left):
+            for tb in left[k + 1:]:
+                if ta.shape == tb.shape or ta.color == tb.color:
+                    pairs += 1
+        return pairs
+
+    def choose(self, board: Board, rack: List[Token], stack_size: int) -> Union[None, Move]:
+        deadline = self.clock() + self.time_budget
+        moves = board.legal_moves(rack)
+        if not moves:
+            return None
+        moves.sort(key=lambda m: -m.score)
+
+        best, best_rating = None, None
+        for m in moves:
+            rating = (m.score + self.leave_weight * self.leave_value(rack, m), len(m))
+            if best_rating is None or rating > best_rating:
+                best, best_rating = m, rating
+            if self.clock() > deadline:
+                break
+        return best
+
+
+class _Timeout(Exception):
+    pass
+
+
+class LookaheadPlayer(AiPlayer):
+
+    def __init__(self, time_budget: float = 1.0, max_depth: int = 4, beam: int = 12):
+        """Plays the move that starts the best sequence of its own next moves
+        with the tokens of the rack, searched deeper and deeper
+        (iterative deepening) until the time budget runs out.
+
+        :param max_depth: Maximum number of moves of a sequence
+        :param beam: Number of best scoring moves explored after the first one
+        """
+        super().__init__(time_budget)
+        self.max_depth = max_depth
+        self.beam = beam
+        # Depth of the last completed search, for inspection
+        self.depth = 0
+
+    def choose(self, board: Board, rack: List[Token], stack_size: int) -> Union[None, Move]:
+        deadline = self.clock() + self.time_budget
+        moves = board.legal_moves(rack)
+        if not moves:
+            return None
+        moves.sort(key=lambda m: -m.score)
+
+        best = moves[0]
+        self.depth = 1
+        for depth in range(2, self.max_depth + 1):
+            try:
+                value, move = self._search_root(board, rack, moves, depth, deadline)
+            except _Timeout:
+                break
+            best = move
+            self.depth = depth
+            # Explores the best move first at the next depth
+            moves.remove(move)
+            moves.insert(0, move)
+        return best
+
+    def _search_root(self, board: Board, rack: List[Token], moves: List[Move],
+                     depth: int, deadline: float) -> Tuple[int, Move]:
+        best_value, best_move = None, None
+        for m in moves:
+            value = m.score + self._play(board, rack, m, depth - 1, deadline)
+            if best_value is None or value > best_value:
+                best_value, best_move = value, m
+        return best_value, best_move
+
+    def _play(self, board: Board, rack: List[Token], move: Move, depth: int, deadline: float) -> int:
+        """Plays move, and returns the best score of the next depth moves"""
+        left = list(rack)
+        for t in move.tokens:
+            left.remove(t)
+        board.push_move(move)
+        try:
+            return self._search(board, left, depth, deadline)
+        finally:
+            board.pop_move()
+
+    def _search(self, board: Board, rack: List[Token], depth: int, deadline: float) -> int:
+        if self.clock() > deadline:
+            raise _Timeout()
+        if depth == 0 or not rack:
+            return 0
+        moves = board.legal_moves(rack)
+        if not moves:
+            return 0
+        moves.sort(key=lambda m: -m.score)
+        return max(m.score + self._play(board, rack, m, depth - 1, deadline) for m in moves[:self.beam])
@@ -0,0 +1,127 @@
+from typing import Union, List, Dict, Tuple
+from nutok.tokens import Token, TOKEN_CODE_BASE
+
+
+VIEWPORT = Tuple[int, int, int, int]
+
+# Text of every token, indexed by token code
+_TOKEN_TEXTS = [str(Token.from_code(c)) for c in range(TOKEN_CODE_BASE * TOKEN_CODE_BASE)]
+
+
+class BoardRenderer:
+
+    ROW_INDEX_SIZE = 3
+    ROW_BARRIER = "  "
+
+    def __init__(self, board, viewport: Union[None, VIEWPORT] = None):
+        """Renders a board as text, possibly a window of it, and keeps the
+        last frame to only render the rows that changed since then.
+
+        :param board: Board to render
+        :param viewport: Window to render, as (min_vert, max_vert, min_horiz, max_horiz).
+            If None, the window follows the bounding box of the board.
+        """
+        self.board = board
+        self.viewport = viewport
+        # Last frame: its window, the board revision it shows, and its rows
+        self._window = None
+        self._revision = None
+        self._rows = dict()
+
+    def window(self) -> Union[None, VIEWPORT]:
+        """Returns the window to render, None if there is nothing to render"""
+        if self.viewport is not None:
+            return self.viewport
+        return self.board.bounds()
+
+    def rows(self) -> List[str]:
+        """Renders the rows of the window, top row first"""
+        window = self.window()
+        self._window = window
+        self._revision = self.board.revision()
+        if window is None:
+            self._rows = dict()
+            return list()
+
+        r0, r1, c0, c1 = window
+        height, width = r1 - r0 + 1, c1 - c0 + 1
+        buffer = [[self.board.TOKEN_REPLACEMENT] * width for _ in range(height)]
+
+        dropped = self.board.dropped
+        if len(dropped) <= height * width:
+            for (i, j), t in dropped.items():
+                if r0 <= i <= r1 and c0 <= j <= c1:
+                    buffer[r1 - i][j - c0] = _TOKEN_TEXTS[t.code]
+        else:
+            # Small window over a large board: probing the window is cheaper
+            for i in range(r0, r1 + 1):
+                row = buffer[r1 - i]
+                for j in range(c0, c1 + 1):
+                    t = dropped.get((i, j))
+                    if t is not None:
+                        row[j - c0] = _TOKEN_TEXTS[t.code]
+
+        separator = self.board.TOKEN_SEPARATOR
+        lines = [separator.join(row) + separator for row in buffer]
+        self._rows = dict(zip(range(r1, r0 - 1, -1), lines))
+        return lines
+
+    def changed_rows(self) -> Dict[int, str]:
+        """Renders the rows that changed since the last frame,
+        and returns them by row index.
+
+        All rows are rendered if the window changed in the meantime."""
+        window = self.window()
+        if window != self._window or self._revision is None:
+            self.rows()
+            return dict(self._rows)
+
+        changed = dict()
+        if window is not None:
+            r0, r1, c0, c1 = window
+            for i in range(r0, r1 + 1):
+                if self.board.row_revision(i) > self._revision:
+                    changed[i] = self._rows[i] = self._render_row(i, c0, c1)
+        self._revision = self.board.revision()
+        return changed
+
+    def _render_row(self, i: int, c0: int, c1: int) -> str:
+        dropped = self.board.dropped
+        cells = list()
+        for j in range(c0, c1 + 1):
+            t = dropped.get((i, j))
+            cells.append(self.board.TOKEN_REPLACEMENT if t is None else _TOKEN_TEXTS[t.code])
+        separator = self.board.TOKEN_SEPARATOR
+        return separator.join(cells) + separator
+
+    def frame(self) -> List[str]:
+        """Returns the rows of the last frame, top row first"""
+        if self._window is None:
+            return list()
+        r0, r1, _, _ = self._window
+        return [self._rows[i] for i in range(r1, r0 - 1, -1)]
+
+    def render(self) -> str:
+        """Renders the window (see `Board.__str__`)"""
+        if self.window() is None:
+            return self.board.EMPTY_BOARD_TXT
+        return "".join([line + "\n" for line in self.rows()])
+
+    def render_with_indices(self) -> str:
+        """Renders the window with row and column indices
+        on the sides (see `Board.str_with_indices`)"""
+        if self.window() is None:
+            return self.board.EMPTY_BOARD_TXT
+        lines = self.rows()
+        r0, r1, c0, c1 = self._window
+
+        txt = [
+            str(i).rjust(self.ROW_INDEX_SIZE) + self.ROW_BARRIER + line
+            for i, line in zip(range(r1, r0 - 1, -1), lines)
+        ]
+
+        col_size = len(self.board.TOKEN_SEPARATOR + self.board.TOKEN_REPLACEMENT)
+        col_indices = "".join([str(j).ljust(col_size) for j in range(c0, c1 + 1)])
+        txt.append((self.ROW_INDEX_SIZE + len(self.ROW_BARRIER)) * ' ' + col_indices)
+
+        return "\n".join(txt)
@@ -0,0 +1,116 @@
+from typing import Union, List, Type, Tuple
+from nutok.tokens import Token, line_masks
+from nutok.directions import Direction
+
+
+LOCATION = Tuple[int, int]
+
+
+class Run:
+
+    __slots__ = ('start', 'tokens', 'shape_mask', 'color_mask')
+
+    def __init__(self, start: LOCATION, tokens: List[Token], shape_mask: int, color_mask: int):
+        """Widest continuous line of tokens along a direction
+
+        :param start: Location of the first token (lowest coordinates)
+        :param tokens: Tokens of the line, from `start` onwards
+        :param shape_mask: OR-ed shape bits of the tokens
+        :param color_mask: OR-ed color bits of the tokens
+        """
+        self.start = start
+        self.tokens = tokens
+        self.shape_mask = shape_mask
+        self.color_mask = color_mask
+
+    def __len__(self):
+        return len(self.tokens)
+
+
+class RunIndex:
+
+    def __init__(self, direction: Type[Direction]):
+        """Maps every occupied location to the run going through it,
+        along the provided direction.
+
+        Runs are never modified once created: dropping or removing a token
+        creates new runs and points the affected locations to them.
+        Since a consistent line holds at most `order` tokens, updates cost
+        O(order).
+        """
+        self.direction = direction
+        self._runs = dict()
+
+    def __getitem__(self, loc: LOCATION) -> Run:
+        """Returns the run at an occupied location"""
+        return self._runs[loc]
+
+    def get(self, i: int, j: int) -> Union[None, Run]:
+        """Returns the run at location (i, j), None if it is empty"""
+        return self._runs.get((i, j))
+
+    def around(self, i: int, j: int) -> Tuple[int, int, int]:
+        """Describes the runs right before and right after the location (i, j),
+        taken together, as (number of tokens, shape mask, color mask).
+
+        This is the line a token dropped at (i, j) would join,
+        the content of (i, j) being ignored."""
+        size, shape_mask, color_mask = 0, 0, 0
+        before = self._runs.get(self.direction.prev(i, j))
+        if before is not None:
+            size += len(before.tokens)
+            shape_mask |= before.shape_mask
+            color_mask |= before.color_mask
+        after = self._runs.get(self.direction.next(i, j))
+        if after is not None:
+            size += len(after.tokens)
+            shape_mask |= after.shape_mask
+            color_mask |= after.color_mask
+        return size, shape_mask, color_mask
+
+    def add(self, token: Token, i: int, j: int):
+        """Registers a token dropped at (i, j), merging the neighboring runs"""
+        start = (i, j)
+        tokens = [token]
+        shape_mask, color_mask = token.shape_bit, token.color_bit
+
+        before = self._runs.get(self.direction.prev(i, j))
+        if before is not None:
+            start = before.start
+            tokens = before.tokens + tokens
+            shape_mask |= before.shape_mask
+            color_mask |= before.color_mask
+
+        after = self._runs.get(self.direction.next(i, j))
+        if after is not None:
+            tokens = tokens + after.tokens
+            shape_mask |= after.shape_mask
+            color_mask |= after.color_mask
+
+        self._point_to(Run(start, tokens, shape_mask, color_mask))
+
+    def remove(self, i: int, j: int):
+        """Unregisters the token at (i, j), splitting its run in two"""
+        run = self._runs.pop((i, j))
+        axis = self.direction.axis
+        k = (i, j)[axis] - run.start[axis]
+
+        if k > 0:
+            tokens = run.tokens[:k]
+            self._point_to(Run(run.start, tokens, *line_masks(tokens)))
+
+        if k < len(run.tokens) - 1:
+            tokens = run.tokens[k + 1:]
+            self._point_to(Run(self.direction.next(i, j), tokens, *line_masks(tokens)))
+
+    def copy(self) -> 'RunIndex':
+        """Returns an independent index: runs are never modified, so they are shared"""
+        index = RunIndex(self.direction)
+        index._runs = dict(self._runs)
+        return index
+
+    def _point_to(self, run: Run):
+        loc = run.start
+        for _ in range(len(run.tokens)):
+            self._runs[loc] = run
+            loc = self.direction.next(*loc)
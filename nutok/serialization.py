@@ -0,0 +1,182 @@
+"""Compact binary format for boards, stacks and full games.
+
+Every payload starts with a header: the magic bytes `NTK`, the format
+version and the kind of content (board, stack or game). Then:
+- integers are LEB128 varints, signed ones being zigzag-encoded first,
+- tokens are single bytes, holding their code (see `Token.code`).
+
+Board: order, number of tokens, then (i, j, token) in drop order.
+Stack: order, number of tokens, then tokens from bottom to top.
+Game: board, stack, number of players, then for each player
+its name (UTF-8, length-prefixed), its score and its rack.
+Journal: see `nutok.journal`.
+Archive: see `nutok.archive`.
+"""
+import random
+from typing import Union, List, Tuple
+from nutok.tokens import Token, TokenStack
+from nutok.board import Board
+
+
+MAGIC = b"NTK"
+VERSION = 1
+
+(
+    KIND_BOARD,
+    KIND_STACK,
+    KIND_GAME,
+    KIND_JOURNAL,
+    KIND_ARCHIVE,
+) = range(1, 6)
+
+
+def write_varint(buffer: bytearray, value: int):
+    """Appends a non-negative integer to buffer, 7 bits per byte"""
+    while value >= 0x80:
+        buffer.append(value & 0x7F | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    """Reads a non-negative integer at pos, returns it and the next position"""
+    value = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def zigzag(value: int) -> int:
+    """Maps signed integers to non-negative ones: 0, -1, 1, -2... to 0, 1, 2, 3..."""
+    return value << 1 if value >= 0 else (-value << 1) - 1
+
+
+def unzigzag(value: int) -> int:
+    """Inverse of `zigzag`"""
+    return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+
+def _write_header(buffer: bytearray, kind: int):
+    buffer += MAGIC
+    buffer.append(VERSION)
+    buffer.append(kind)
+
+
+def _read_header(data: bytes, kind: int) -> int:
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError("not a nutok binary payload")
+    pos = len(MAGIC)
+    version, found_kind = data[pos], data[pos + 1]
+    if version != VERSION:
+        raise ValueError(f"unsupported format version: {version}")
+    if found_kind != kind:
+        raise ValueError(f"expected content of kind {kind}, not: {found_kind}")
+    return pos + 2
+
+
+def _write_board(buffer: bytearray, b: Board):
+    buffer.append(b.order)
+    write_varint(buffer, len(b.dropped))
+    for (i, j), t in b.dropped.items():
+        write_varint(buffer, zigzag(i))
+        write_varint(buffer, zigzag(j))
+        buffer.append(t.code)
+
+
+def _read_board(data: bytes, pos: int) -> Tuple[Board, int]:
+    b = Board(data[pos])
+    n, pos = read_varint(data, pos + 1)
+    for _ in range(n):
+        i, pos = read_varint(data, pos)
+        j, pos = read_varint(data, pos)
+        b.add_single_token_no_check(Token.from_code(data[pos]), unzigzag(i), unzigzag(j))
+        pos += 1
+    return b, pos
+
+
+def _write_tokens(buffer: bytearray, tokens: List[Token]):
+    write_varint(buffer, len(tokens))
+    buffer += bytes(t.code for t in tokens)
+
+
+def _read_tokens(data: bytes, pos: int) -> Tuple[List[Token], int]:
+    n, pos = read_varint(data, pos)
+    tokens = [Token.from_code(code) for code in data[pos:pos + n]]
+    return tokens, pos + n
+
+
+def _write_stack(buffer: bytearray, order: int, stack: TokenStack):
+    buffer.append(order)
+    _write_tokens(buffer, stack.stack)
+
+
+def _read_stack(data: bytes, pos: int, rng: Union[None, random.Random]) -> Tuple[TokenStack, int]:
+    tokens, pos = _read_tokens(data, pos + 1)
+    return TokenStack.from_tokens(tokens, rng), pos
+
+
+def dump_board(b: Board) -> bytes:
+    """Serializes a board"""
+    buffer = bytearray()
+    _write_header(buffer, KIND_BOARD)
+    _write_board(buffer, b)
+    return bytes(buffer)
+
+
+def load_board(data: bytes) -> Board:
+    """Rebuilds a board serialized by `dump_board`,
+    without checking the games rules"""
+    b, _ = _read_board(data, _read_header(data, KIND_BOARD))
+    return b
+
+
+def dump_stack(order: int, stack: TokenStack) -> bytes:
+    """Serializes the tokens of a stack (not the state of its randomness)"""
+    buffer = bytearray()
+    _write_header(buffer, KIND_STACK)
+    _write_stack(buffer, order, stack)
+    return bytes(buffer)
+
+
+def load_stack(data: bytes, rng: Union[None, random.Random] = None) -> TokenStack:
+    """Rebuilds a stack serialized by `dump_stack`, drawing from rng"""
+    stack, _ = _read_stack(data, _read_header(data, KIND_STACK), rng)
+    return stack
+
+
+def dump_game(b: Board, stack: TokenStack, players: List[dict]) -> bytes:
+    """Serializes a full game state: board, stack and players,
+    as described in `CliGame` (name, score and tokens)"""
+    buffer = bytearray()
+    _write_header(buffer, KIND_GAME)
+    _write_board(buffer, b)
+    _write_stack(buffer, b.order, stack)
+    write_varint(buffer, len(players))
+    for player in players:
+        name = player['name'].encode('utf8')
+        write_varint(buffer, len(name))
+        buffer += name
+        write_varint(buffer, zigzag(player['score']))
+        _write_tokens(buffer, player['tokens'])
+    return bytes(buffer)
+
+
+def load_game(data: bytes, rng: Union[None, random.Random] = None) -> Tuple[Board, TokenStack, List[dict]]:
+    """Rebuilds a game serialized by `dump_game`"""
+    pos = _read_header(data, KIND_GAME)
+    b, pos = _read_board(data, pos)
+    stack, pos = _read_stack(data, pos, rng)
+    nb_players, pos = read_varint(data, pos)
+    players = list()
+    for _ in range(nb_players):
+        n, pos = read_varint(data, pos)
+        name = data[pos:pos + n].decode('utf8')
+        score, pos = read_varint(data, pos + n)
+        tokens, pos = _read_tokens(data, pos)
+        players.append(dict(tokens=tokens, name=name, score=unzigzag(score)))
+    return b, stack, players
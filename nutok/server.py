@@ -0,0 +1,258 @@
+import argparse
+import asyncio
+import itertools
+import json
+import random
+from typing import Union, Tuple
+from nutok.tokens import MAX_TOKEN_ORDER, TOKEN_COPIES
+from nutok.game import Action, Game
+
+
+def max_players(order: int) -> int:
+    """Returns the number of players the stack can deal full racks to,
+    once the first token is dropped"""
+    return (TOKEN_COPIES * order * order - 1) // order
+
+
+class GameSession:
+
+    __slots__ = ('game_id', 'game', 'seats', 'started')
+
+    def __init__(self, game_id: int, game: Game):
+        """A game hosted by the server, and the connections of its players
+
+        :param game_id: Identifier of the game on the server
+        """
+        self.game_id = game_id
+        self.game = game
+        # Writer of the connection of each player, None while the seat is free
+        self.seats = [None] * game.nb_players
+        # Whether all the seats were taken: seats cannot be freed anymore
+        self.started = False
+
+    def free_seat(self) -> Union[None, int]:
+        """Returns the first free seat, None if the game is full"""
+        for k, writer in enumerate(self.seats):
+            if writer is None:
+                return k
+        return None
+
+    def is_full(self) -> bool:
+        return self.free_seat() is None
+
+    def state(self, seat: int) -> dict:
+        """Returns what the player at seat can see of the game"""
+        game = self.game
+        return dict(
+            type="state",
+            game=self.game_id,
+            seat=seat,
+            to_move=game.to_move,
+            board=game.b.str_with_indices(),
+            rack=[str(t) for t in game.get_player_tokens(seat)],
+            stack=len(game.stack),
+            scores=[game.get_score(k) for k in game.player_ids],
+        )
+
+
+class GameServer:
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, seed: Union[None, int] = None):
+        """Hosts many games at once over TCP, in a single thread.
+
+        Clients send one command per line, and receive one JSON object
+        per line. Outside of a game, commands are:
+        - new <order> <number of players>: creates a game, and takes its first seat,
+        - join <game id>: takes the first free seat of a game,
+        - list: lists the games waiting for players.
+        In a game, commands follow the grammar of `Action.parse`
+        (play, exchange, quit). Once all the seats are taken, every player
+        receives the state of the game after each action.
+
+        :param port: Port to listen to, any free port if 0 (see `address`)
+        :param seed: Seed of the stacks of the games, random if None
+        """
+        self.host = host
+        self.port = port
+        self.rng = random.Random(seed)
+        self.games = dict()
+        self._ids = itertools.count(1)
+        self._server = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        """Returns the address the server listens to, once started"""
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    def new_game(self, order: int, nb_players: int) -> GameSession:
+        game_id = next(self._ids)
+        game = Game(order, nb_players, random.Random(self.rng.getrandbits(64)))
+        session = GameSession(game_id, game)
+        self.games[game_id] = session
+        return session
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        session, seat = None, None
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                msg = line.decode("utf8", errors="replace").strip()
+                if not msg:
+                    continue
+                if session is not None and session.seats[seat] is not writer:
+                    # The game ended in the meantime
+                    session, seat = None, None
+                if session is None:
+                    session, seat = await self._lobby(msg, writer)
+                elif await self._play(session, seat, msg):
+                    session, seat = None, None
+        except ConnectionError:
+            pass
+        finally:
+            if session is not None and session.seats[seat] is writer:
+                await self._leave(session, seat)
+            writer.close()
+
+    async def _lobby(self, msg: str, writer: asyncio.StreamWriter) -> Tuple[Union[None, GameSession], Union[None, int]]:
+        """Runs a command sent outside of a game. Returns the game
+        and the seat the player took, if any."""
+        items = msg.split()
+        command = items[0].lower()
+        try:
+            if command == "list":
+                waiting = [
+                    dict(game=s.game_id, order=s.game.order, players=s.game.nb_players,
+                         seated=sum(w is not None for w in s.seats))
+                    for s in self.games.values() if not s.is_full()
+                ]
+                await _send(writer, dict(type="games", games=waiting))
+                return None, None
+            if command == "new":
+                if len(items) != 3:
+                    raise ValueError(f"{len(items) - 1} param(s) provided instead of 2")
+                order, nb_players = int(items[1]), int(items[2])
+                if not 2 <= order <= MAX_TOKEN_ORDER:
+                    raise ValueError(f"order must be in [2, {MAX_TOKEN_ORDER}]")
+                if not 1 <= nb_players <= max_players(order):
+                    raise ValueError(f"number of players must be in [1, {max_players(order)}] for order {order}")
+                session = self.new_game(order, nb_players)
+            elif command == "join":
+                if len(items) != 2:
+                    raise ValueError(f"{len(items) - 1} param(s) provided instead of 1")
+                session = self.games.get(int(items[1]))
+                if session is None or session.is_full():
+                    raise ValueError(f"no game {items[1]} waiting for players")
+            else:
+                raise ValueError(f"command not supported: {command}")
+        except ValueError as err:
+            await _send(writer, dict(type="error", reason=str(err)))
+            return None, None
+
+        seat = session.free_seat()
+        session.seats[seat] = writer
+        await _send(writer, dict(type="joined", game=session.game_id, seat=seat))
+        if session.is_full():
+            session.started = True
+            await self._broadcast_state(session)
+        return session, seat
+
+    async def _play(self, session: GameSession, seat: int, msg: str) -> bool:
+        """Runs a command of a player in a game.
+        Returns True iff the player left the game."""
+        game = session.game
+        writer = session.seats[seat]
+        action, params = Action.parse(msg)
+        if action == Action.INVALID:
+            await _send(writer, dict(type="error", reason=params['reason']))
+            return False
+        if action == Action.QUIT:
+            await self._leave(session, seat)
+            return True
+
+        if not session.is_full():
+            reason = "waiting for players"
+        elif seat != game.to_move:
+            reason = "not your turn"
+        else:
+            if action == Action.PLAY_TOKEN:
+                done, info = game.play_token(seat, params['token_index'], params['i'], params['j'])
+            else:
+                done, info = game.exchange_token(seat, params['token_index'])
+            if done:
+                game.end_turn()
+                game.start_turn()
+                await self._broadcast_state(session)
+                if game.over:
+                    await self._end(session, "game over")
+                return False
+            reason = info['reason']
+        await _send(writer, dict(type="error", reason=reason))
+        return False
+
+    async def _leave(self, session: GameSession, seat: int):
+        """Frees the seat of a player. A game which started ends,
+        a game nobody waits for anymore is dropped."""
+        if session.started:
+            session.game.give_up()
+            await self._end(session, "a player left")
+            return
+        session.seats[seat] = None
+        if all(w is None for w in session.seats):
+            self.games.pop(session.game_id, None)
+
+    async def _end(self, session: GameSession, reason: str):
+        self.games.pop(session.game_id, None)
+        msg = dict(type="over", game=session.game_id, reason=reason,
+                   scores=[session.game.get_score(k) for k in session.game.player_ids])
+        for k, writer in enumerate(session.seats):
+            if writer is not None:
+                session.seats[k] = None
+                await _send(writer, msg)
+
+    async def _broadcast_state(self, session: GameSession):
+        for k, writer in enumerate(session.seats):
+            if writer is not None:
+                await _send(writer, session.state(k))
+
+
+async def _send(writer: asyncio.StreamWriter, msg: dict):
+    writer.write(json.dumps(msg).encode("utf8") + b"\n")
+    try:
+        await writer.drain()
+    except ConnectionError:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hosts Nutok games over TCP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    server = GameServer(args.host, args.port)
+
+    async def serve():
+        await server.start()
+        print("Listening on {}:{}".format(*server.address))
+        await server.serve_forever()
+
+    asyncio.run(serve())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+import itertools
+import multiprocessing
+import random
+import time
+from typing import Union, List, Tuple, Callable, Iterator
+from nutok.tokens import Token, TokenSet, TokenStack
+from nutok.board import Board
+from nutok.journal import MoveJournal, NO_PLAYER
+
+
+def try_a_game(order=6, pick_attempts=20, verbose=False, stack: Union[None, TokenStack] = None,
+               rng: Union[None, random.Random] = None, journal: Union[None, MoveJournal] = None):
+    """Drops random tokens on random legal locations, until a token
+    cannot be dropped anywhere after `pick_attempts` exchanges.
+
+    Returns the number of drops, and the final board.
+    The stack is drawn from, if provided.
+    Randomness comes from rng if provided, from the global `random` module otherwise.
+    Drops and exchanges are recorded in the journal, if provided.
+    """
+    if rng is None:
+        rng = random
+    b = Board(order)
+    if stack is None:
+        stack = TokenStack(b.token_set, rng)
+
+    t0 = stack.pick()
+    b.add_single_token_no_check(t0, 0, 0)
+    if journal is not None:
+        journal.record_drop(NO_PLAYER, t0, 0, 0)
+
+    count = 0
+    while not stack.is_empty():
+        count += 1
+
+        t = stack.pick()
+        okay = False
+
+        for _ in range(pick_attempts):
+            droppable = b.legal_moves([t], multi=False)
+
+            if len(droppable) == 0:
+                stack.randomly_append(t)
+                t_new = stack.pick()
+                if journal is not None:
+                    journal.record_exchange(0, t, t_new)
+                t = t_new
+            else:
+                okay = True
+                break
+
+        if not okay:
+            if verbose:
+                print("Could not pick a proper piece")
+            break
+
+        rng.shuffle(droppable)
+        ik, jk = droppable[0].pos_a
+        b.add_single_token(t, ik, jk)
+        if journal is not None:
+            journal.record_drop(0, t, ik, jk)
+        if verbose:
+            print(f"=>No:{count}, ({t},{ik},{jk})" + 30 * "-")
+            print(b)
+
+    return count, b
+
+
+class GameRecord:
+
+    __slots__ = ('index', 'seed', 'order', 'move_count', 'cells', 'stack', 'duration', 'journal')
+
+    def __init__(self, index: int, seed: int, order: int, move_count: int,
+                 cells: Tuple[Tuple[int, int, int], ...], stack: bytes, duration: float,
+                 journal: Union[None, MoveJournal] = None):
+        """Compact result of a simulated game
+
+        :param index: Index of the game in the simulation
+        :param seed: Seed the game was played with
+        :param move_count: Number of moves played in a row (see `try_a_game`)
+        :param cells: Final board, as (i, j, token code) in drop order
+        :param stack: Codes of the tokens left in the stack, top last
+        :param duration: Time spent playing the game, in seconds
+        :param journal: Moves of the game, if they were recorded
+        """
+        self.index = index
+        self.seed = seed
+        self.order = order
+        self.move_count = move_count
+        self.cells = cells
+        self.stack = stack
+        self.duration = duration
+        self.journal = journal
+
+    def __repr__(self):
+        return f"GameRecord(index={self.index}, seed={self.seed}, move_count={self.move_count})"
+
+    def board(self) -> Board:
+        """Rebuilds the final board"""
+        b = Board(self.order)
+        for i, j, code in self.cells:
+            b.add_single_token_no_check(Token.from_code(code), i, j)
+        return b
+
+    def stack_tokens(self) -> List[Token]:
+        """Returns the tokens left in the stack, top last"""
+        return [Token.from_code(code) for code in self.stack]
+
+
+def game_seed(seed: int, index: int) -> int:
+    """Seed of the game `index` of a simulation seeded with `seed`"""
+    return seed * 1000003 + index
+
+
+def play_game(order: int, pick_attempts: int, seed: int, index: int, record_moves: bool = False) -> GameRecord:
+    """Plays a seeded game with `try_a_game`, and returns its record"""
+    rng = random.Random(seed)
+    journal = MoveJournal(order) if record_moves else None
+    t0 = time.perf_counter()
+    stack = TokenStack(TokenSet(order), rng)
+    count, b = try_a_game(order=order, pick_attempts=pick_attempts, stack=stack, rng=rng, journal=journal)
+    duration = time.perf_counter() - t0
+    cells = tuple((i, j, t.code) for (i, j), t in b.dropped.items())
+    return GameRecord(index, seed, order, count, cells, bytes(t.code for t in stack.stack), duration, journal)
+
+
+def _play_game_task(args) -> GameRecord:
+    return play_game(*args)
+
+
+class SimulationEngine:
+
+    def __init__(self, order: int = 6, pick_attempts: int = 20, seed: int = 0,
+                 processes: Union[None, int] = None, chunksize: int = 4, record_moves: bool = False):
+        """Plays many games of `try_a_game` across a pool of processes
+
+        Every game gets its own seed (see `game_seed`): a simulation
+        gives the same records whatever the number of processes.
+
+        :param processes: Number of worker processes, all the cores if None.
+            With 1, games are played in the current process.
+        :param chunksize: Number of games sent to a worker at once
+        :param record_moves: Whether records should hold the journal of their game
+        """
+        self.order = order
+        self.pick_attempts = pick_attempts
+        self.seed = seed
+        self.processes = processes if processes is not None else multiprocessing.cpu_count()
+        self.chunksize = chunksize
+        self.record_moves = record_moves
+
+    def _tasks(self, start: int, stop: int):
+        return [
+            (self.order, self.pick_attempts, game_seed(self.seed, k), k, self.record_moves)
+            for k in range(start, stop)
+        ]
+
+    def run(self, nb_games: Union[None, int] = None,
+            stop_when: Union[None, Callable[[GameRecord], bool]] = None) -> Iterator[GameRecord]:
+        """Plays nb_games games (endlessly if None), and yields their records
+        as soon as they are available, in no particular order.
+
+        Stops early after yielding the first record for which `stop_when`
+        returns True. Closing the iterator stops the workers as well.
+        """
+        if self.processes == 1:
+            for k in (range(nb_games) if nb_games is not None else itertools.count()):
+                record = _play_game_task(self._tasks(k, k + 1)[0])
+                yield record
+                if stop_when is not None and stop_when(record):
+                    return
+            return
+
+        # Games are submitted by batches, so that endless runs do not
+        # queue an endless amount of tasks.
+        batch = self.processes * self.chunksize * 4
+        with multiprocessing.Pool(self.processes) as pool:
+            start = 0
+            while nb_games is None or start < nb_games:
+                stop = start + batch if nb_games is None else min(start + batch, nb_games)
+                records = pool.imap_unordered(_play_game_task, self._tasks(start, stop), self.chunksize)
+                for record in records:
+                    yield record
+                    if stop_when is not None and stop_when(record):
+                        return
+                start = stop
@@ -1,5 +1,5 @@
 from enum import Enum
-from typing import List
+from typing import Union, List, Tuple
 import random
 
 
@@ -53,15 +53,44 @@ _COLORS[Color.RED] = dict(char='r', hex='')
 _COLORS[Color.WHITE] = dict(char='w', hex='')
 
 
+# Token codes are `shape * TOKEN_CODE_BASE + color`
+TOKEN_CODE_BASE = 8
+
+
 class Token:
 
-    def __init__(self, shape: Shape, color: Color):
-        """Represents a game token, described by its shape and its color"""
-        self.shape = shape
-        self.color = color
+    __slots__ = ('shape', 'color', 'code', 'shape_bit', 'color_bit')
+
+    _interned = dict()
+
+    def __new__(cls, shape: Shape, color: Color):
+        """Represents a game token, described by its shape and its color
+
+        Tokens are interned: there is a single instance per (shape, color),
+        so that equality boils down to an identity check.
+
+        Each token also carries a compact encoding:
+        - code: small integer `shape * 8 + color`, in [0, 64)
+        - shape_bit, color_bit: one-hot masks used by consistency checks
+        """
+        tok = cls._interned.get((shape, color))
+        if tok is None:
+            tok = super().__new__(cls)
+            tok.shape = shape
+            tok.color = color
+            tok.code = shape.value * TOKEN_CODE_BASE + color.value
+            tok.shape_bit = 1 << shape.value
+            tok.color_bit = 1 << color.value
+            cls._interned[(shape, color)] = tok
+        return tok
+
+    @staticmethod
+    def from_code(code: int) -> 'Token':
+        """Returns the token encoded by `code`"""
+        return _TOKENS_BY_CODE[code]
 
     def __eq__(self, other):
-        return self.shape == other.shape and self.color == other.color
+        return self.code == other.code
 
     def __str__(self):
         return f"{_SHAPES[self.shape]['char']}{_COLORS[self.color]['char']}"
@@ -71,11 +100,65 @@ class Token:
 
     def __hash__(self):
         """Enables the use of Token as a dictionary key"""
-        return (self.shape, self.color).__hash__()
+        return self.code
+
+    def __reduce__(self):
+        """Keeps tokens interned through pickling and copies"""
+        return Token.from_code, (self.code,)
+
+
+_TOKENS_BY_CODE = [Token(s, c) for s in Shape for c in Color]
+
+# Number of set bits of any shape or color mask
+_POPCOUNT = [bin(m).count('1') for m in range(1 << TOKEN_CODE_BASE)]
+
+# Sets of tokens are described as masks over the token codes:
+# bit `code` is set iff the token with that code belongs to the set.
+# The tables below give, for any shape mask (resp. color mask), the set of
+# tokens whose shape (resp. color) is in the mask.
+_SHAPE_TOKENS = [
+    sum(1 << t.code for t in _TOKENS_BY_CODE if t.shape_bit & m)
+    for m in range(1 << TOKEN_CODE_BASE)
+]
+_COLOR_TOKENS = [
+    sum(1 << t.code for t in _TOKENS_BY_CODE if t.color_bit & m)
+    for m in range(1 << TOKEN_CODE_BASE)
+]
+
+
+def tokens_mask(tokens: List[Token]) -> int:
+    """Returns the set of provided tokens, as a mask over the token codes"""
+    mask = 0
+    for t in tokens:
+        mask |= 1 << t.code
+    return mask
+
+
+def mask_tokens(mask: int) -> List[Token]:
+    """Returns the tokens of a mask over the token codes"""
+    tokens = list()
+    while mask:
+        low = mask & -mask
+        tokens.append(_TOKENS_BY_CODE[low.bit_length() - 1])
+        mask ^= low
+    return tokens
+
+
+def line_masks(line: List[Token]) -> Tuple[int, int]:
+    """Returns the OR-ed shape bits and color bits of a line of tokens"""
+    shape_mask = 0
+    color_mask = 0
+    for t in line:
+        shape_mask |= t.shape_bit
+        color_mask |= t.color_bit
+    return shape_mask, color_mask
 
 
 MAX_TOKEN_ORDER = min(len(Shape), len(Color))
 
+# Number of copies of each token in a game
+TOKEN_COPIES = 3
+
 
 class TokenSet:
 
@@ -96,6 +179,7 @@ class TokenSet:
             for c in self._colors:
                 t = Token(p, c)
                 self._tokens[t] = (_SHAPES[p], _COLORS[c])
+        self.code_mask = tokens_mask(self._tokens)
 
     def __contains__(self, tok: Token):
         if not isinstance(tok, Token):
@@ -130,65 +214,128 @@ class TokenSet:
             # Lines with more elements than the order cannot be consistent
             return False
 
-        # Checks if the line is of same colors or same shapes
-        ta, tb = line[0], line[1]
-        if ta.shape != tb.shape and ta.color != tb.color:
-            return False
-        if ta.shape == tb.shape and ta.color == tb.color:
-            return False
+        shape_mask, color_mask = line_masks(line)
+        return self.mask_consistency(len(line), shape_mask, color_mask)
 
-        if ta.shape == tb.shape:
-            # All shapes must be the same
-            # All colors must be unique
-            tmp_colors = [ta.color, tb.color]
-            for k in range(2, len(line)):
-                if line[k].shape != ta.shape:
-                    return False
-                if line[k].color in tmp_colors:
-                    return False
-                tmp_colors.append(line[k].color)
-            return True
+    def mask_consistency(self, size: int, shape_mask: int, color_mask: int) -> bool:
+        """Same as `line_consistency`, for a line described by its number
+        of tokens and the OR-ed shape bits and color bits of its tokens.
 
-        # Here, necessarily: ta.color == tb.color
-        # All shapes must be the same
-        # All colors must be unique
-        tmp_shape = [ta.shape, tb.shape]
-        for k in range(2, len(line)):
-            if line[k].color != ta.color:
-                return False
-            if line[k].shape in tmp_shape:
-                return False
-            tmp_shape.append(line[k].shape)
-        return True
+        Unique shapes (resp. colors) means there are as many shape bits
+        (resp. color bits) as tokens in the line.
+        """
+        if size <= 1:
+            return True
+        if size > self.order:
+            return False
+        nb_shapes = _POPCOUNT[shape_mask]
+        nb_colors = _POPCOUNT[color_mask]
+        if nb_shapes == 1:
+            return nb_colors == size
+        if nb_colors == 1:
+            return nb_shapes == size
+        return False
+
+    def admissible_mask(self, size: int, shape_mask: int, color_mask: int) -> int:
+        """Returns the set of tokens, as a mask over the token codes,
+        that can be added to a consistent line while keeping it consistent.
+
+        The line is described by its number of tokens and the OR-ed
+        shape bits and color bits of its tokens.
+        """
+        if size == 0:
+            return self.code_mask
+        if size >= self.order:
+            return 0
+        mask = 0
+        nb_shapes = _POPCOUNT[shape_mask]
+        nb_colors = _POPCOUNT[color_mask]
+        if nb_shapes == 1 and nb_colors == size:
+            # Same shape, any of the missing colors
+            mask |= _SHAPE_TOKENS[shape_mask] & ~_COLOR_TOKENS[color_mask]
+        if nb_colors == 1 and nb_shapes == size:
+            # Same color, any of the missing shapes
+            mask |= _COLOR_TOKENS[color_mask] & ~_SHAPE_TOKENS[shape_mask]
+        return mask & self.code_mask
 
 
 class TokenStack:
 
-    def __init__(self, ts: TokenSet):
-        """Standard token stack, with 3 times as many
-        tokens as in the provided token set"""
-        self.stack = ts.all_tokens() + ts.all_tokens() + ts.all_tokens()
+    def __init__(self, ts: TokenSet, rng: Union[None, random.Random] = None):
+        """Standard token stack, with `TOKEN_COPIES` times as many
+        tokens as in the provided token set
+
+        :param rng: Source of randomness, e.g. random.Random(seed).
+            The global `random` module is used if None.
+        """
+        self.rng = rng if rng is not None else random
+        self.stack = ts.all_tokens() * TOKEN_COPIES
         self.shuffle()
 
+    @classmethod
+    def from_tokens(cls, tokens: List[Token], rng: Union[None, random.Random] = None) -> 'TokenStack':
+        """Stack made of the provided tokens, in that order (the last one is
+        picked first). Unlike the constructor, does not use rng."""
+        stack = cls.__new__(cls)
+        stack.rng = rng if rng is not None else random
+        stack.stack = list(tokens)
+        return stack
+
     def is_empty(self):
         """Self-explanatory"""
         return len(self.stack) == 0
 
+    def __len__(self):
+        """Returns the number of tokens left in the stack"""
+        return len(self.stack)
+
     def pick(self) -> Token:
         """Returns a token from the stack
         Errors out if the stack is empty."""
-        t = self.stack[-1]
-        self.stack = self.stack[:-1]
-        return t
+        return self.stack.pop()
+
+    def peek(self) -> Token:
+        """Returns the token `pick` would return, without removing it
+        Errors out if the stack is empty."""
+        return self.stack[-1]
+
+    def pick_many(self, k: int) -> List[Token]:
+        """Returns up to k tokens from the stack, in the order
+        successive calls to `pick` would return them"""
+        if k <= 0:
+            return list()
+        picked = self.stack[-k:]
+        del self.stack[-k:]
+        picked.reverse()
+        return picked
 
     def randomly_append(self, t: Token):
-        """Appends t at a random place in the stack"""
+        """Appends t at a random place in the stack, below its top token
+
+        The stack below the top is a uniformly shuffled list:
+        swapping t with a random element of it (t included) keeps it
+        uniformly shuffled, just as inserting t at a random index would."""
         if self.is_empty():
             self.stack.append(t)
             return
-        idx = random.randint(0, len(self.stack) - 1)
-        self.stack.insert(idx, t)
+        top = self.stack.pop()
+        self.stack.append(t)
+        idx = self.rng.randint(0, len(self.stack) - 1)
+        self.stack[idx], self.stack[-1] = self.stack[-1], self.stack[idx]
+        self.stack.append(top)
 
     def shuffle(self):
         """Randomly shuffles the entire stack"""
-        random.shuffle(self.stack)
+        self.rng.shuffle(self.stack)
+
+    def get_state(self) -> tuple:
+        """Returns a snapshot of the stack and of the state of its
+        source of randomness, see `set_state`"""
+        return bytes(t.code for t in self.stack), self.rng.getstate()
+
+    def set_state(self, state: tuple):
+        """Restores a snapshot taken by `get_state`: the stack then
+        behaves exactly as it did after the snapshot"""
+        codes, rng_state = state
+        self.stack = [Token.from_code(code) for code in codes]
+        self.rng.setstate(rng_state)
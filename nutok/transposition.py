@@ -0,0 +1,92 @@
+from typing import Union, List, Any
+from nutok.moves import Move
+
+
+class TTEntry:
+
+    __slots__ = ('key', 'depth', 'value', 'flag', 'moves', 'generation')
+
+    def __init__(self, key: int, depth: int, value: Any, flag: int,
+                 moves: Union[None, List[Move]], generation: int):
+        """Cached information about a position
+
+        :param key: Full 64-bit hash of the position
+        :param depth: Depth of the search that computed the value
+        :param value: Value of the position
+        :param flag: Whether value is exact, or a bound (see TranspositionTable)
+        :param moves: Legal moves of the position, best moves first
+        :param generation: Search during which the entry was stored
+        """
+        self.key = key
+        self.depth = depth
+        self.value = value
+        self.flag = flag
+        self.moves = moves
+        self.generation = generation
+
+
+class TranspositionTable:
+
+    (
+        EXACT,
+        LOWER_BOUND,
+        UPPER_BOUND
+    ) = range(3)
+
+    def __init__(self, size: int = 1 << 16):
+        """Bounded cache of position values and legal moves,
+        keyed by position hashes (see `Board.zobrist_hash`).
+
+        The table holds `size` buckets of two entries:
+        - the first one keeps the deepest entry of the current search,
+        - the second one always takes the latest entry that did not fit in
+        the first one.
+        Entries of previous searches (see `new_search`) are replaced first.
+
+        :param size: Number of buckets
+        """
+        self.size = size
+        self._entries = [None] * (2 * size)
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        """Returns the number of stored entries"""
+        return sum(1 for e in self._entries if e is not None)
+
+    def clear(self):
+        """Removes all entries"""
+        self._entries = [None] * (2 * self.size)
+        self.hits = 0
+        self.misses = 0
+
+    def new_search(self):
+        """Marks entries stored so far as coming from a previous search"""
+        self.generation += 1
+
+    def probe(self, key: int) -> Union[None, TTEntry]:
+        """Returns the entry stored for key, None if there is none"""
+        k = 2 * (key % self.size)
+        for e in (self._entries[k], self._entries[k + 1]):
+            if e is not None and e.key == key:
+                self.hits += 1
+                return e
+        self.misses += 1
+        return None
+
+    def store(self, key: int, depth: int = 0, value: Any = None, flag: int = EXACT,
+              moves: Union[None, List[Move]] = None):
+        """Stores information about a position, see `TTEntry`"""
+        entry = TTEntry(key, depth, value, flag, moves, self.generation)
+        k = 2 * (key % self.size)
+        preferred = self._entries[k]
+        if preferred is None or preferred.key == key or preferred.generation != self.generation \
+                or depth >= preferred.depth:
+            self._entries[k] = entry
+            # Avoids keeping a stale duplicate in the second entry
+            other = self._entries[k + 1]
+            if other is not None and other.key == key:
+                self._entries[k + 1] = None
+        else:
+            self._entries[k + 1] = entry
@@ -0,0 +1,135 @@
+import math
+import random
+from typing import Union, List
+from nutok.tokens import Token, TokenSet, TOKEN_COPIES, TOKEN_CODE_BASE
+
+
+class UnseenTokens:
+
+    def __init__(self, token_set: TokenSet, copies: int = TOKEN_COPIES):
+        """Tokens a player has not seen yet: the ones in the stack and in
+        the racks of its opponents. Starts with every token of the game.
+
+        Counts are indexed by token code, and the unseen tokens are also kept
+        in a pool where they can be removed in O(1), for fast sampling.
+        Keep it up to date with `record_drop`, `record_draw` and
+        `record_exchange`.
+        """
+        self.token_set = token_set
+        self.copies = copies
+        self._fill()
+
+    @classmethod
+    def from_board(cls, board, rack: List[Token], copies: int = TOKEN_COPIES) -> 'UnseenTokens':
+        """Tokens neither on the board, nor in the rack"""
+        unseen = cls(board.token_set, copies)
+        unseen.recount(board, rack)
+        return unseen
+
+    def recount(self, board, rack: List[Token]):
+        """Counts again, from scratch, the tokens neither on the board,
+        nor in the rack. The object is updated in place."""
+        self._fill()
+        for t in board.dropped.values():
+            self._remove(t)
+        for t in rack:
+            self._remove(t)
+
+    def __len__(self):
+        return len(self._pool)
+
+    def count(self, token: Token) -> int:
+        return self.counts[token.code]
+
+    def tokens(self) -> List[Token]:
+        """Returns the unseen tokens, in no particular order"""
+        return list(self._pool)
+
+    def record_drop(self, token: Token, own: bool = False):
+        """A token was dropped on the board. Tokens dropped from the rack of
+        the player were already seen, the ones of its opponents were not."""
+        if not own:
+            self._remove(token)
+
+    def record_draw(self, token: Token):
+        """The player drew a token from the stack"""
+        self._remove(token)
+
+    def record_exchange(self, given: Token, drawn: Token):
+        """The player put a token back in the stack, and drew another one.
+        Exchanges of the opponents do not change anything."""
+        self._add(given)
+        self._remove(drawn)
+
+    def probability(self, token: Token) -> float:
+        """Returns the probability that the next draw is token,
+        assuming every unseen token is as likely to be drawn"""
+        if not self._pool:
+            return 0.
+        return self.counts[token.code] / len(self._pool)
+
+    def mask_count(self, mask: int) -> int:
+        """Returns the number of unseen tokens in a set of tokens,
+        described as a mask over the token codes"""
+        count = 0
+        while mask:
+            low = mask & -mask
+            count += self.counts[low.bit_length() - 1]
+            mask ^= low
+        return count
+
+    def mask_probability(self, mask: int, draws: int = 1) -> float:
+        """Returns the probability that at least one of the next draws is
+        in a set of tokens, described as a mask over the token codes.
+
+        E.g. with `Board.admissible_mask(i, j)`, the chance to draw a token
+        that fits at (i, j), i.e. that completes the lines going through it.
+        """
+        total = len(self._pool)
+        draws = min(draws, total)
+        if draws <= 0:
+            return 0.
+        # Hypergeometric: none of the draws is among the tokens of the mask
+        return 1. - math.comb(total - self.mask_count(mask), draws) / math.comb(total, draws)
+
+    def sample_racks(self, sizes: List[int], rng: Union[None, random.Random] = None) -> List[List[Token]]:
+        """Draws racks of the provided sizes among the unseen tokens,
+        without replacement. Sizes are reduced if there are not enough tokens."""
+        if rng is None:
+            rng = random
+        sample = rng.sample(self._pool, min(sum(sizes), len(self._pool)))
+        racks = list()
+        start = 0
+        for size in sizes:
+            racks.append(sample[start:start + size])
+            start += size
+        return racks
+
+    def _fill(self):
+        """Starts over from every token of the game"""
+        self.counts = [0] * (TOKEN_CODE_BASE * TOKEN_CODE_BASE)
+        self._pool = list()
+        # Indices of each token code in the pool
+        self._indices = [list() for _ in self.counts]
+        for t in self.token_set.all_tokens():
+            for _ in range(self.copies):
+                self._add(t)
+
+    def _add(self, token: Token):
+        self.counts[token.code] += 1
+        self._indices[token.code].append(len(self._pool))
+        self._pool.append(token)
+
+    def _remove(self, token: Token):
+        """Removes a token from the pool, moving the last token of the pool
+        to its place"""
+        indices = self._indices[token.code]
+        if not indices:
+            raise ValueError(f"{token} is not unseen")
+        self.counts[token.code] -= 1
+        k = indices.pop()
+        last = self._pool.pop()
+        if k < len(self._pool):
+            self._pool[k] = last
+            last_indices = self._indices[last.code]
+            last_indices[last_indices.index(len(self._pool))] = k
@@ -0,0 +1,51 @@
+from typing import List
+from nutok.tokens import Token
+
+
+MASK_64 = (1 << 64) - 1
+
+# Coordinates are packed on 24 bits each, token codes on 8 bits
+_COORD_MASK = (1 << 24) - 1
+
+
+def _splitmix64(x: int) -> int:
+    """Scrambles a 64-bit integer into a well-distributed 64-bit integer"""
+    z = (x + 0x9E3779B97F4A7C15) & MASK_64
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK_64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK_64
+    return z ^ (z >> 31)
+
+
+def zobrist_key(i: int, j: int, code: int) -> int:
+    """Returns the 64-bit Zobrist key of the token `code` at location (i, j).
+
+    Boards are unbounded, so keys are derived from the location and the token
+    instead of being drawn in a table: they are the same in every process.
+    """
+    return _splitmix64((i & _COORD_MASK) << 32 | (j & _COORD_MASK) << 8 | code)
+
+
+def zobrist_rack(tokens: List[Token]) -> int:
+    """Returns a 64-bit hash of a rack, independent of the order of the tokens.
+
+    To be combined (XOR) with a board hash, e.g. when caching legal moves,
+    which depend on both the board and the rack."""
+    h = 0
+    for t in tokens:
+        # Sums rather than XORs, so that duplicated tokens do not cancel out
+        h += _splitmix64(1 << 56 | t.code)
+    return _splitmix64(h & MASK_64)
+
+
+def zobrist_turn(racks: List[List[Token]], to_move: int, plies_left: int = 0) -> int:
+    """Returns a 64-bit hash of the racks of every player, of the player
+    to move and of the number of moves left before the end of the game,
+    0 if it is not bounded.
+
+    To be combined (XOR) with a board hash, when the racks are known,
+    e.g. in endgames."""
+    # Hashed separately, so that no count can spill over the other field
+    h = _splitmix64(2 << 56 | to_move) ^ _splitmix64(3 << 56 | plies_left)
+    for player, rack in enumerate(racks):
+        h ^= _splitmix64(zobrist_rack(rack) ^ player)
+    return h
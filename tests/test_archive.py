@@ -0,0 +1,51 @@
+import os
+import tempfile
+import unittest
+
+from nutok.simulation import SimulationEngine
+from nutok.archive import ArchiveWriter, GameArchive
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class TestGameArchive(unittest.TestCase):
+
+    def setUp(self):
+        engine = SimulationEngine(order=4, seed=5, processes=1, record_moves=True)
+        self.games = list(engine.run(5))
+        fd, self.path = tempfile.mkstemp(suffix=".ntka")
+        os.close(fd)
+        with ArchiveWriter(self.path) as writer:
+            for r in self.games:
+                writer.add_journal(r.journal, seed=r.seed)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_games(self):
+        with GameArchive(self.path) as archive:
+            self.assertEqual(len(archive), len(self.games))
+            for r, game in zip(self.games, archive):
+                self.assertEqual(game.seed, r.seed)
+                self.assertEqual(game.order, 4)
+                self.assertEqual(game.board().dropped, r.board().dropped)
+                self.assertEqual(game.journal().entries, r.journal.entries)
+            self.assertEqual(archive[3].board().dropped, self.games[3].board().dropped)
+            with self.assertRaises(IndexError):
+                archive[len(self.games)]
+
+    @unittest.skipIf(np is None, "requires numpy")
+    def test_numpy(self):
+        with GameArchive(self.path) as archive:
+            records = archive.records_array()
+            self.assertEqual(len(records), archive.nb_records)
+            self.assertEqual(list(archive.chain_lengths()), [len(r.board()) - 1 for r in self.games])
+            self.assertTrue((records['score'][records['player'] >= 0] > 0).any())
+            del records
+
+
+if __name__ == '__main__':
+    unittest.main()
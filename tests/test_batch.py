@@ -0,0 +1,84 @@
+import random
+import unittest
+from unittest import mock
+
+from nutok.tokens import TokenStack
+from nutok.board import Board
+from nutok.simulation import game_seed
+
+try:
+    import numpy as np
+    from nutok.batch import BoardBatch, play_batch
+except ImportError:
+    np = None
+
+
+@unittest.skipIf(np is None, "requires numpy")
+class TestBoardBatch(unittest.TestCase):
+
+    def test_lockstep(self):
+        """Batched legality and scores must match the ones of each board"""
+        order, nb_boards = 4, 6
+        batch = BoardBatch(order, nb_boards, size=4)
+        stacks = [TokenStack(batch.token_set, random.Random(k)) for k in range(nb_boards)]
+        batch.drop([s.pick() for s in stacks], np.zeros((nb_boards, 2)))
+        rng = np.random.default_rng(0)
+
+        for _ in range(20):
+            boards = [batch.board(k) for k in range(nb_boards)]
+            tokens = [None if s.is_empty() else s.pick() for s in stacks]
+            droppable = batch.droppable(tokens)
+            for k, (b, t) in enumerate(zip(boards, tokens)):
+                expected = set() if t is None else {m.pos_a for m in b.legal_moves([t], multi=False)}
+                rows, cols = np.nonzero(droppable[k])
+                found = {(int(p) + batch.origin[0], int(q) + batch.origin[1]) for p, q in zip(rows, cols)}
+                self.assertEqual(found, expected)
+
+            scores_before = batch.scores.copy()
+            dropped, scores = batch.step(tokens, rng)
+            for k, (b, t) in enumerate(zip(boards, tokens)):
+                if not dropped[k]:
+                    self.assertEqual(scores[k], 0)
+                    continue
+                after = batch.board(k)
+                (i, j), = set(after.dropped) - set(b.dropped)
+                self.assertTrue(b.add_single_token(t, i, j))
+                self.assertEqual(b.score_count(i, j), scores[k])
+            self.assertEqual(list(batch.scores), list(scores_before + scores))
+
+    def test_play_batch(self):
+        """Games played in lockstep must be the games played one at a time,
+        with the stacks of the same seeds and the locations of the batch"""
+        order, nb_boards, seed, pick_attempts = 3, 8, 1, 20
+        with mock.patch.object(BoardBatch, 'drop', autospec=True, side_effect=BoardBatch.drop) as drop:
+            move_counts, batch = play_batch(order=order, nb_boards=nb_boards, pick_attempts=pick_attempts, seed=seed)
+        # Tokens and locations of every step, the first token included
+        steps = [(tokens, np.asarray(locations)) for (_, tokens, locations), _ in drop.call_args_list]
+        self.assertEqual(len(batch), nb_boards)
+
+        for k in range(nb_boards):
+            b = Board(order)
+            stack = TokenStack(b.token_set, random.Random(game_seed(seed, k)))
+            b.drop_first_token(stack.pick())
+            nb_moves = 0
+            for tokens, locations in steps[1:]:
+                if stack.is_empty():
+                    break
+                nb_moves += 1
+                t = stack.pick()
+                for _ in range(pick_attempts):
+                    okay = bool(b.legal_moves([t], multi=False))
+                    if okay:
+                        break
+                    stack.randomly_append(t)
+                    t = stack.pick()
+                if not okay:
+                    break
+                self.assertEqual(tokens[k], t)
+                self.assertTrue(b.add_single_token(t, int(locations[k, 0]), int(locations[k, 1])))
+
+            self.assertEqual(batch.board(k).dropped, b.dropped)
+            self.assertEqual(move_counts[k], nb_moves)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,18 +1,22 @@
+import itertools
+import random
 import unittest
 
-from nutok.tokens import Shape, Color, Token
+from nutok.tokens import Shape, Color, Token, TokenStack
 from nutok.board import Board
 from nutok.board import Vertical, Horizontal
 
 
 class TestBoardBasic(unittest.TestCase):
 
+    board_class = Board
+
     def test_basic(self):
-        b = Board(3)
+        b = self.board_class(3)
         self.assertEqual(len(b), 0)
 
     def test_len(self):
-        b = Board(3)
+        b = self.board_class(3)
         self.assertEqual(len(b), 0)
         self.assertTrue(b.is_empty())
 
@@ -39,13 +43,13 @@ class TestBoardBasic(unittest.TestCase):
     def test_is_empty(self):
         tsp = Token(Shape.SQUARE, Color.PURPLE)
         for k in range(2, len(Shape)):
-            b = Board(k)
+            b = self.board_class(k)
             self.assertTrue(b.is_empty())
             b.drop_first_token(tsp)
             self.assertFalse(b.is_empty())
 
     def test_widest_line(self):
-        b = Board(6)
+        b = self.board_class(6)
 
         tsp = Token(Shape.SQUARE, Color.PURPLE)
         tdp = Token(Shape.DIAMOND, Color.PURPLE)
@@ -78,9 +82,35 @@ class TestBoardBasic(unittest.TestCase):
         self.assertEqual(line_plus[1], tdb)
         self.assertEqual(line_plus[2], tdy)
 
+    def test_bounds(self):
+        tsp = Token(Shape.SQUARE, Color.PURPLE)
+        tdp = Token(Shape.DIAMOND, Color.PURPLE)
+        tcp = Token(Shape.CIRCLE, Color.PURPLE)
+        tsb = Token(Shape.SQUARE, Color.BLUE)
+
+        b = self.board_class(3)
+        self.assertIsNone(b.bounds())
+        self.assertIsNone(b.min_vert())
+
+        b.drop_first_token(tsp)
+        self.assertEqual(b.bounds(), (0, 0, 0, 0))
+        b.add_single_token(tdp, 0, 1)
+        b.add_single_token(tcp, 0, -1)
+        b.add_single_token(tsb, -1, 0)
+        self.assertEqual(b.bounds(), (-1, 0, -1, 1))
+        self.assertEqual((b.min_vert(), b.max_vert(), b.min_horiz(), b.max_horiz()), (-1, 0, -1, 1))
+
+        b.remove_single_token_no_check(0, 1)
+        self.assertEqual(b.bounds(), (-1, 0, -1, 0))
+        b.remove_single_token_no_check(-1, 0)
+        self.assertEqual(b.bounds(), (0, 0, -1, 0))
+        b.remove_single_token_no_check(0, 0)
+        b.remove_single_token_no_check(0, -1)
+        self.assertIsNone(b.bounds())
+
     def test_drop_first_token(self):
         tsp = Token(Shape.SQUARE, Color.PURPLE)
-        b = Board(5)
+        b = self.board_class(5)
         self.assertTrue(b.is_empty())
         b.drop_first_token(tsp)
         self.assertFalse(b.is_empty())
@@ -101,7 +131,7 @@ class TestBoardBasic(unittest.TestCase):
         tsr = Token(Shape.SQUARE, Color.RED)
         tsw = Token(Shape.SQUARE, Color.WHITE)
 
-        b = Board(8)
+        b = self.board_class(8)
         b.drop_first_token(tsp)
 
         self.assertTrue(b.single_droppable(tdp, -1, 0))
@@ -143,6 +173,222 @@ class TestBoardBasic(unittest.TestCase):
         self.assertTrue(b.single_droppable(tdp, -1, 2))
         self.assertFalse(b.single_droppable(tsg, -1, 1))
 
+    def test_nearest_empty_locations(self):
+        tsp = Token(Shape.SQUARE, Color.PURPLE)
+        tdp = Token(Shape.DIAMOND, Color.PURPLE)
+        tsb = Token(Shape.SQUARE, Color.BLUE)
+
+        b = self.board_class(3)
+        self.assertEqual(b.get_all_nearest_empty_locations(), [])
+
+        b.drop_first_token(tsp)
+        self.assertEqual(set(b.get_all_nearest_empty_locations()),
+                         {(-1, 0), (0, -1), (0, 1), (1, 0)})
+
+        b.add_single_token(tdp, 0, 1)
+        b.add_single_token(tsb, 1, 0)
+
+        # Here, b is:
+        # ■b
+        # ■p  ◆p
+
+        expected = set()
+        for i, j in b.dropped:
+            for loc in b.get_neighborhood(i, j):
+                if not b.has_token_at(*loc):
+                    expected.add(loc)
+        locations = b.get_all_nearest_empty_locations()
+        self.assertEqual(len(locations), len(expected))
+        self.assertEqual(set(locations), expected)
+        self.assertEqual(set(b.frontier()), expected)
+
+    def test_run_index(self):
+        """Lines read from the run index must match cell-by-cell walks"""
+
+        def walk(b, i, j, direction):
+            elements = [b.get_token(i, j)]
+            p, q = direction.next(i, j)
+            while b.has_token_at(p, q):
+                elements.append(b.get_token(p, q))
+                p, q = direction.next(p, q)
+            p, q = direction.prev(i, j)
+            while b.has_token_at(p, q):
+                elements.insert(0, b.get_token(p, q))
+                p, q = direction.prev(p, q)
+            return elements
+
+        random.seed(0)
+        for order in range(2, 7):
+            b = self.board_class(order)
+            stack = TokenStack(b.token_set)
+            b.drop_first_token(stack.pick())
+            while not stack.is_empty():
+                t = stack.pick()
+                for i, j in b.get_all_nearest_empty_locations():
+                    expected = all(
+                        b.token_set.line_consistency(b.get_widest_line(i, j, d, token=t))
+                        for d in [Vertical, Horizontal])
+                    self.assertEqual(b.single_droppable(t, i, j), expected)
+                    if expected:
+                        b.add_single_token(t, i, j)
+                        break
+
+            for i, j in b.dropped:
+                for direction in [Vertical, Horizontal]:
+                    self.assertEqual(b.get_widest_line(i, j, direction), walk(b, i, j, direction))
+
+    def test_legal_moves(self):
+        """Generated moves must match trial drops of every possible move"""
+
+        def touches(b, locations):
+            return any(b.has_at_least_one_neighbor(i, j) for i, j in locations)
+
+        random.seed(1)
+        for order in [3, 4]:
+            b = self.board_class(order)
+            stack = TokenStack(b.token_set)
+            b.drop_first_token(stack.pick())
+            for _ in range(6 * order):
+                rack = [stack.pick() for _ in range(order)]
+                moves = b.legal_moves(rack)
+
+                expected = set()
+                r0, r1, c0, c1 = b.min_vert(), b.max_vert(), b.min_horiz(), b.max_horiz()
+                for i in range(r0 - order, r1 + order + 1):
+                    for j in range(c0 - order, c1 + order + 1):
+                        for t in set(rack):
+                            if b.single_droppable(t, i, j):
+                                expected.add(((t,), (i, j), (i, j)))
+                        for k in range(2, order + 1):
+                            for pos_b in [(i + k - 1, j), (i, j + k - 1)]:
+                                locations, _ = b.pos_to_locations((i, j), pos_b)
+                                if not touches(b, locations):
+                                    continue
+                                for tokens in itertools.permutations(set(rack), k):
+                                    if b.multi_droppable(list(tokens), (i, j), pos_b):
+                                        expected.add((tokens, (i, j), pos_b))
+
+                self.assertEqual(len(moves), len(expected))
+                self.assertEqual({(tuple(m.tokens), m.pos_a, m.pos_b) for m in moves}, expected)
+
+                if not moves:
+                    break
+
+                # Plays one of the moves, and puts the other tokens back
+                m = random.choice(moves)
+                self.assertTrue(b.add_multi_token(m.tokens, m.pos_a, m.pos_b))
+                self.assertEqual(b.score_count(*m.pos_b), m.score)
+                for t in m.tokens:
+                    rack.remove(t)
+                for t in rack:
+                    stack.randomly_append(t)
+
+    def test_admissible_mask(self):
+        """Masks kept up to date on every drop must match trial drops"""
+        random.seed(3)
+        for order in [3, 5]:
+            b = self.board_class(order)
+            stack = TokenStack(b.token_set)
+            b.drop_first_token(stack.pick())
+            for step in range(40):
+                if step % 4 == 3 and len(b) > 1:
+                    # Removals split runs, and may take locations off the frontier
+                    b.remove_single_token_no_check(*random.choice(list(b.dropped)[1:]))
+                else:
+                    moves = b.legal_moves(stack.stack[-order:], multi=False)
+                    if not moves:
+                        break
+                    move = random.choice(moves)
+                    stack.stack.remove(move.tokens[0])
+                    b.add_single_token(move.tokens[0], *move.pos_a)
+
+                droppable = 0
+                live = set()
+                for i, j in b.frontier():
+                    expected = 0
+                    for t in b.token_set.all_tokens():
+                        if all(b.token_set.line_consistency(b.get_widest_line(i, j, d, token=t))
+                               for d in [Vertical, Horizontal]):
+                            expected |= 1 << t.code
+                    self.assertEqual(b.admissible_mask(i, j), expected)
+                    droppable |= expected
+                    if expected:
+                        live.add((i, j))
+                self.assertEqual(b.droppable_mask(), droppable)
+                self.assertEqual(set(b.live_locations()), live)
+                self.assertEqual(b.nb_live_locations(), len(live))
+                self.assertEqual(b.nb_dead_locations(), len(b.frontier()) - len(live))
+                self.assertEqual(b.admissible_mask(*next(iter(b.dropped))), 0)
+
+    def test_push_pop_move(self):
+        """Undoing moves must give back the exact same board"""
+
+        def state(b):
+            lines = {
+                (i, j, d): b.get_widest_line(i, j, d)
+                for i, j in b.dropped for d in [Vertical, Horizontal]
+            }
+            admissible = {loc: b.admissible_mask(*loc) for loc in b.frontier()}
+            return dict(b.dropped), admissible, set(b.live_locations()), lines, b.zobrist_hash(), b.bounds()
+
+        random.seed(2)
+        for order in [3, 6]:
+            b = self.board_class(order)
+            stack = TokenStack(b.token_set)
+            b.drop_first_token(stack.pick())
+            states = [state(b)]
+            while not stack.is_empty():
+                rack = [stack.pick() for _ in range(min(order, len(stack.stack)))]
+                moves = b.legal_moves(rack)
+                if not moves:
+                    break
+                b.push_move(random.choice(moves))
+                states.append(state(b))
+
+            # Board built with push_move must match a board built with the rules
+            rebuilt = self.board_class(order)
+            for (i, j), t in b.dropped.items():
+                rebuilt.add_single_token_no_check(t, i, j)
+            self.assertEqual(state(rebuilt), states[-1])
+
+            # Copies must not be affected by the moves undone afterwards
+            copied = b.copy()
+            final = states[-1]
+            self.assertEqual(state(copied), final)
+            self.assertEqual(copied.nb_pushed_moves(), 0)
+
+            self.assertEqual(b.nb_pushed_moves(), len(states) - 1)
+            while b.nb_pushed_moves() > 0:
+                states.pop()
+                b.pop_move()
+                self.assertEqual(state(b), states[-1])
+            self.assertEqual(len(b), 1)
+            self.assertEqual(state(copied), final)
+            self.assertEqual(str(copied), str(rebuilt))
+
+    def test_zobrist_hash(self):
+        """Same tokens at the same locations must give the same hash"""
+        tsp = Token(Shape.SQUARE, Color.PURPLE)
+        tdp = Token(Shape.DIAMOND, Color.PURPLE)
+        tsb = Token(Shape.SQUARE, Color.BLUE)
+
+        ba, bb = self.board_class(3), self.board_class(3)
+        self.assertEqual(ba.zobrist_hash(), bb.zobrist_hash())
+
+        ba.drop_first_token(tsp)
+        self.assertNotEqual(ba.zobrist_hash(), bb.zobrist_hash())
+        ba.add_single_token(tdp, 0, 1)
+        ba.add_single_token(tsb, 1, 0)
+
+        bb.drop_first_token(tsp)
+        bb.add_single_token(tsb, 1, 0)
+        bb.add_single_token(tdp, 0, 1)
+        self.assertEqual(ba.zobrist_hash(), bb.zobrist_hash())
+
+        bb.remove_single_token_no_check(0, 1)
+        bb.add_single_token(tdp, -1, 0)
+        self.assertNotEqual(ba.zobrist_hash(), bb.zobrist_hash())
+
 
 if __name__ == '__main__':
     unittest.main()
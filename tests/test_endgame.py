@@ -0,0 +1,147 @@
+import contextlib
+import io
+import random
+import time
+import unittest
+
+from nutok.tokens import TokenStack
+from nutok.board import Board
+from nutok.players import GreedyPlayer
+from nutok.endgame import EndgameSolver, EndgamePlayer
+
+
+def endgame(order, seed, nb_tokens):
+    """Plays random tokens until 2 * nb_tokens are left, and returns the
+    board with two racks of nb_tokens"""
+    rng = random.Random(seed)
+    b = Board(order)
+    stack = TokenStack(b.token_set, rng)
+    b.drop_first_token(stack.pick())
+    while len(stack) > 2 * nb_tokens:
+        moves = b.legal_moves(stack.stack[-order:], multi=False)
+        if not moves:
+            break
+        m = rng.choice(moves)
+        stack.stack.remove(m.tokens[0])
+        b.add_single_token(m.tokens[0], *m.pos_a)
+    return b, [stack.stack[:nb_tokens], stack.stack[nb_tokens:2 * nb_tokens]]
+
+
+def minimax(b, racks, player, plies_left=None):
+    """Plain exhaustive search of the same game as `EndgameSolver`"""
+    if plies_left == 0 or not racks[player]:
+        return 0
+    moves = b.legal_moves(racks[player])
+    nxt = (player + 1) % len(racks)
+    best = 0
+    for k, m in enumerate(moves):
+        rack = list(racks[player])
+        for t in m.tokens:
+            rack.remove(t)
+        b.push_move(m)
+        value = m.score - minimax(b, racks[:player] + [rack] + racks[player + 1:], nxt,
+                                  None if plies_left is None else plies_left - 1)
+        b.pop_move()
+        if k == 0 or value > best:
+            best = value
+    return best
+
+
+class TestEndgame(unittest.TestCase):
+
+    def test_exact(self):
+        for seed in range(4):
+            for plies_left in [None, 1, 2, 3]:
+                b, racks = endgame(4, seed, 3)
+                dropped = dict(b.dropped)
+                result = EndgameSolver(time_budget=60.).solve(b, racks, plies_left=plies_left)
+                self.assertTrue(result.exact)
+                self.assertEqual(result.value, minimax(b, racks, 0, plies_left))
+                self.assertEqual(b.dropped, dropped)
+                self.assertEqual(b.nb_pushed_moves(), 0)
+                if plies_left is not None:
+                    self.assertLessEqual(len(result.line), plies_left)
+
+                # The line is made of legal moves, and scores as announced
+                # when it goes to the end of the game
+                racks = [list(r) for r in racks]
+                player, value = 0, 0
+                for m in result.line:
+                    self.assertIn(m, b.legal_moves(racks[player]))
+                    b.push_move(m)
+                    for t in m.tokens:
+                        racks[player].remove(t)
+                    value += m.score if player == 0 else -m.score
+                    player = 1 - player
+                if len(result.line) == plies_left or not racks[player] or not b.legal_moves(racks[player]):
+                    self.assertEqual(value, result.value)
+
+    def test_root(self):
+        """Values cached for a player must not be reused for another one"""
+        b, racks = endgame(4, 2, 2)
+        racks = [racks[0], racks[1][:1], racks[1][1:]]
+        solver = EndgameSolver(time_budget=60.)
+        for to_move in [0, 1, 2, 0]:
+            self.assertEqual(solver.solve(b, racks, to_move).value,
+                             EndgameSolver(time_budget=60.).solve(b, racks, to_move).value)
+
+    def test_budget(self):
+        b, racks = endgame(6, 0, 6)
+        solver = EndgameSolver(time_budget=60., max_nodes=100)
+        result = solver.solve(b, racks)
+        self.assertLessEqual(result.nodes, 101)
+        self.assertFalse(result.exact)
+        self.assertEqual(b.nb_pushed_moves(), 0)
+
+        t0 = time.perf_counter()
+        EndgameSolver(time_budget=0.05).solve(b, racks)
+        self.assertLess(time.perf_counter() - t0, 0.5)
+
+    def test_player(self):
+        b, racks = endgame(4, 1, 3)
+        player = EndgamePlayer(GreedyPlayer(), time_budget=10.)
+        move = player.choose(b, racks[0], 0)
+        self.assertIn(move, b.legal_moves(racks[0]))
+        self.assertTrue(player.result.exact)
+        self.assertEqual(player.result.value, minimax(b, racks, 0))
+
+        # In the last seat, the player has a single move left
+        player = EndgamePlayer(GreedyPlayer(), seat=1, time_budget=10.)
+        move = player.choose(b, racks[0], 0)
+        self.assertEqual(move.score, max(m.score for m in b.legal_moves(racks[0])))
+        self.assertEqual(len(player.result.line), 1)
+
+        # Only two player games are solved
+        with self.assertRaises(ValueError):
+            EndgamePlayer(GreedyPlayer(), seat=2)
+        with self.assertRaises(ValueError):
+            EndgamePlayer(GreedyPlayer(), seat=1, nb_players=3)
+
+        # Before the end, the other player chooses
+        self.assertEqual(player.choose(b, racks[0], 10), GreedyPlayer().choose(b, racks[0], 10))
+
+    def test_cli_game(self):
+        """Games end at the end of the round the stack gets empty in,
+        so only the last seat plays once the stack is empty"""
+        from cli_game import CliGame
+
+        for seed in [2, 4, 12]:
+            bots = {k: EndgamePlayer(GreedyPlayer(), seat=k, time_budget=10.) for k in range(2)}
+            game = CliGame(3, 2, random.Random(seed), bots=bots)
+            solved = False
+            with contextlib.redirect_stdout(io.StringIO()):
+                for _ in range(500):
+                    solved = solved or game.stack.is_empty()
+                    if game.play_player(game.to_move) or game.over:
+                        break
+            self.assertIsNone(bots[0].result)
+            self.assertEqual(solved, seed != 2)
+            if solved:
+                self.assertEqual(len(bots[1].result.line), 1)
+                self.assertTrue(bots[1].result.exact)
+            else:
+                self.assertIsNone(bots[1].result)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import random
+import unittest
+
+from nutok.unseen import UnseenTokens
+from nutok.game import Action, Game
+
+
+class TestGame(unittest.TestCase):
+
+    def test_actions(self):
+        game = Game(3, 2, random.Random(0))
+        self.assertEqual([game.nb_of_tokens_for(k) for k in game.player_ids], [3, 3])
+        self.assertEqual(len(game.stack), 27 - 1 - 6)
+
+        done, info = game.play_token(0, 5, 0, 1)
+        self.assertFalse(done)
+        self.assertEqual(info['reason'], "Invalid token position")
+        done, info = game.play_token(0, 0, 5, 5)
+        self.assertFalse(done)
+
+        moves = game.b.legal_moves(game.get_player_tokens(0), multi=False)
+        m = moves[0]
+        done, info = game.play_token(0, game.get_player_tokens(0).index(m.tokens[0]), *m.pos_a)
+        self.assertTrue(done)
+        self.assertEqual(info['score'], m.score)
+        self.assertEqual(game.get_score(0), m.score)
+        self.assertEqual(game.nb_of_tokens_for(0), 3)
+
+        rack = list(game.get_player_tokens(1))
+        done, _ = game.exchange_token(1, 0)
+        self.assertTrue(done)
+        self.assertEqual(game.get_player_tokens(1)[:2], rack[1:])
+
+    def test_turns(self):
+        game = Game(2, 2, random.Random(0))
+        self.assertTrue(game.start_turn())
+        game.end_turn()
+        self.assertEqual(game.to_move, 1)
+        game.stack.stack.clear()
+        self.assertFalse(game.exchange_token(1, 0)[0])
+        # The game ends with the round the stack got empty in
+        game.end_turn()
+        self.assertTrue(game.over)
+        self.assertFalse(game.start_turn())
+
+    def test_unseen(self):
+        """Unseen tokens kept up to date must match a count from scratch"""
+        game = Game(3, 2, random.Random(3))
+        rng = random.Random(0)
+        while game.start_turn():
+            player_id = game.to_move
+            moves = game.b.legal_moves(game.get_player_tokens(player_id))
+            if moves:
+                self.assertTrue(game.play_move(player_id, rng.choice(moves))[0])
+            elif not game.exchange_token(player_id, 0)[0]:
+                break
+            game.end_turn()
+            for k in game.player_ids:
+                expected = UnseenTokens.from_board(game.b, game.get_player_tokens(k))
+                self.assertEqual(game.unseen[k].counts, expected.counts)
+        self.assertTrue(game.stack.is_empty())
+
+    def test_dump(self):
+        game = Game(4, 3, random.Random(1))
+        loaded = Game.load(game.dump())
+        self.assertEqual(loaded.b.dropped, game.b.dropped)
+        self.assertEqual(loaded.stack.stack, game.stack.stack)
+        self.assertEqual(loaded.players, game.players)
+        self.assertEqual([u.counts for u in loaded.unseen], [u.counts for u in game.unseen])
+
+    def test_parse(self):
+        self.assertEqual(Action.parse("play 2 3 4"), (Action.PLAY_TOKEN, dict(token_index=1, i=3, j=4)))
+        self.assertEqual(Action.parse("2 3 -4"), (Action.PLAY_TOKEN, dict(token_index=1, i=3, j=-4)))
+        self.assertEqual(Action.parse("e 1"), (Action.EXCHANGE_TOKEN, dict(token_index=0)))
+        self.assertEqual(Action.parse("quit")[0], Action.QUIT)
+        self.assertEqual(Action.parse("exchange")[0], Action.INVALID)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import random
+import unittest
+
+from . import test_board
+from nutok.tokens import TokenStack
+
+try:
+    from nutok.grid_board import GridBoard, MARGIN
+except ImportError:
+    GridBoard = None
+
+
+@unittest.skipIf(GridBoard is None, "requires numpy")
+class TestGridBoard(test_board.TestBoardBasic):
+    """Runs all the board tests on the grid backend"""
+
+    board_class = GridBoard
+
+    def test_grid(self):
+        """Vectorized queries must match the location by location ones"""
+        random.seed(4)
+        for order in [3, 6, 8]:
+            b = GridBoard(order, size=4)
+            stack = TokenStack(b.token_set)
+            b.drop_first_token(stack.pick())
+            while not stack.is_empty():
+                self.assertEqual(set(b._to_locations(b.frontier_grid())), set(b.frontier()))
+
+                rack = stack.pick_many(order)
+                drops = b.droppable_tokens(rack)
+                moves = b.legal_moves(rack, multi=False)
+                self.assertEqual(set(drops), {(m.tokens[0], m.pos_a) for m in moves})
+                self.assertEqual(set(b.droppable_locations(rack[0])),
+                                 {m.pos_a for m in moves if m.tokens[0] == rack[0]})
+                if not drops:
+                    break
+                t, (i, j) = random.choice(drops)
+                b.add_single_token(t, i, j)
+                rack.remove(t)
+                for r in rack:
+                    stack.randomly_append(r)
+
+            oi, oj = b.origin
+            for (i, j), t in b.dropped.items():
+                self.assertEqual(b.grid[i - oi, j - oj], t.code)
+            self.assertEqual(int((b.grid >= 0).sum()), len(b))
+
+    def test_far_drop(self):
+        """The grid must grow as much as needed to hold far away tokens"""
+        b = GridBoard(3, size=4)
+        t = b.token_set.all_tokens()[0]
+        for i, j in [(0, 0), (-40, 0), (0, 100), (75, -63)]:
+            b.add_single_token_no_check(t, i, j)
+        oi, oj = b.origin
+        h, w = b.grid.shape
+        for i, j in b.dropped:
+            self.assertTrue(MARGIN <= i - oi < h - MARGIN and MARGIN <= j - oj < w - MARGIN)
+            self.assertEqual(b.grid[i - oi, j - oj], t.code)
+        self.assertEqual(int((b.grid >= 0).sum()), len(b))
+
+
+if __name__ == '__main__':
+    unittest.main()
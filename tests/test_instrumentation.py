@@ -0,0 +1,78 @@
+import io
+import json
+import random
+import time
+import unittest
+
+from nutok.tokens import Shape, Color, Token, TokenSet
+from nutok.board import Board
+from nutok.simulation import try_a_game
+from nutok.instrumentation import Instrumentation
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        self.inst = Instrumentation()
+        self.addCleanup(self.inst.disable)
+
+    def test_disabled(self):
+        """Disabled, the original methods are left in place"""
+        methods = dict(Board.__dict__), dict(TokenSet.__dict__)
+        self.inst.enable()
+        self.assertNotEqual(Board.__dict__['single_droppable'], methods[0]['single_droppable'])
+        self.inst.disable()
+        self.assertEqual(dict(Board.__dict__), methods[0])
+        self.assertEqual(dict(TokenSet.__dict__), methods[1])
+        self.assertIs(type(Board(3).dropped), dict)
+
+    def test_counts(self):
+        self.inst.enable()
+        b = Board(3)
+        t = Token(Shape.SQUARE, Color.PURPLE)
+        b.drop_first_token(t)
+        b.single_droppable(Token(Shape.CIRCLE, Color.PURPLE), 0, 1)
+        b.single_droppable(Token(Shape.CIRCLE, Color.PURPLE), 1, 0)
+        str(b)
+        ops = self.inst.snapshot()['operations']
+        self.assertEqual(ops['Board.single_droppable']['calls'], 2)
+        self.assertEqual(ops['BoardRenderer.render']['calls'], 1)
+        self.assertGreater(ops['TokenSet.admissible_mask']['calls'], 0)
+
+        self.inst.reset()
+        self.assertEqual(self.inst.snapshot()['operations'], dict())
+        b.score_count(0, 0)
+        self.assertEqual(self.inst.snapshot()['operations']['Board.score_count']['calls'], 1)
+
+    def test_probes(self):
+        b = Board(4)
+        self.inst.enable()
+        _, game = try_a_game(4, rng=random.Random(0))
+        snapshot = self.inst.snapshot()
+        # One move per drop, but the first token which is not checked
+        self.assertEqual(snapshot['moves'], len(game) - 1)
+        self.assertGreater(snapshot['probes_per_move'], 0)
+        self.assertGreaterEqual(snapshot['max_probes_per_move'], snapshot['probes_per_move'])
+
+        # Boards created before enabling are only counted once watched
+        probes = self.inst.probes
+        b.drop_first_token(Token(Shape.SQUARE, Color.PURPLE))
+        self.assertEqual(self.inst.probes, probes)
+        self.inst.watch(b)
+        b.has_token_at(0, 0)
+        self.assertEqual(self.inst.probes, probes + 1)
+
+    def test_dump(self):
+        self.inst.enable()
+        stream = io.StringIO()
+        self.inst.start_periodic_dump(stream, interval=0.01)
+        try_a_game(3, rng=random.Random(0))
+        time.sleep(0.05)
+        self.inst.stop_periodic_dump()
+        lines = stream.getvalue().splitlines()
+        self.assertGreater(len(lines), 0)
+        self.assertIn('operations', json.loads(lines[-1]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import io
+import random
+import unittest
+from unittest import mock
+
+from nutok.tokens import Shape, Color, Token
+from nutok.board import Board
+from nutok.simulation import try_a_game
+from nutok.journal import MoveJournal, JournalEntry, JournalReplayer, read_journal, iter_journal
+
+
+class TestJournal(unittest.TestCase):
+
+    def test_stream(self):
+        """Entries written to a stream must be read back identically"""
+        tsp = Token(Shape.SQUARE, Color.PURPLE)
+        tdp = Token(Shape.DIAMOND, Color.PURPLE)
+        tcp = Token(Shape.CIRCLE, Color.PURPLE)
+
+        stream = io.BytesIO()
+        journal = MoveJournal(3, stream)
+        journal.record_drop(-1, tsp, 0, 0)
+        journal.record_multi(0, [tdp, tcp], (0, 1), (0, 2))
+        journal.record_exchange(1, tsp, tdp)
+
+        loaded = read_journal(stream.getvalue())
+        self.assertEqual(loaded.order, 3)
+        self.assertEqual(loaded.entries, journal.entries)
+        self.assertEqual(loaded.entries[2].kind, JournalEntry.EXCHANGE)
+
+    def test_truncated_stream(self):
+        """Reading an incomplete stream must stop at the last complete entry"""
+        tsp = Token(Shape.SQUARE, Color.PURPLE)
+        tdp = Token(Shape.DIAMOND, Color.PURPLE)
+        tcp = Token(Shape.CIRCLE, Color.PURPLE)
+
+        stream = io.BytesIO()
+        journal = MoveJournal(3, stream)
+        header_size = len(stream.getvalue())
+        # Ends of the frames of the entries
+        ends = list()
+        for record in [
+            lambda: journal.record_drop(-1, tsp, 0, 0),
+            lambda: journal.record_multi(0, [tdp, tcp], (0, 1), (0, 2)),
+            lambda: journal.record_exchange(1, tsp, tdp),
+            lambda: journal.record_multi(1, [tcp, tdp, tsp], (-1, 0), (-3, 0)),
+        ]:
+            record()
+            ends.append(len(stream.getvalue()))
+
+        data = stream.getvalue()
+        for size in range(len(data) + 1):
+            partial = io.BytesIO(data[:size])
+            if size < header_size:
+                with self.assertRaises(ValueError):
+                    iter_journal(partial)
+                continue
+            order, entries = iter_journal(partial)
+            self.assertEqual(order, 3)
+            nb_complete = sum(1 for end in ends if end <= size)
+            self.assertEqual(list(entries), journal.entries[:nb_complete])
+
+    def test_replay(self):
+        """Boards rebuilt at any ply must match the boards of the game"""
+        journal = MoveJournal(5)
+        _, b = try_a_game(order=5, rng=random.Random(2), journal=journal)
+        self.assertGreater(len(journal), 20)
+
+        expected = [dict(board.dropped) for board in JournalReplayer(journal).boards()]
+        self.assertEqual(expected[-1], b.dropped)
+
+        replayer = JournalReplayer(journal, snapshot_interval=8)
+        plies = list(range(len(journal) + 1))
+        random.Random(0).shuffle(plies)
+        for ply in plies:
+            self.assertEqual(replayer.board_at(ply).dropped, expected[ply])
+        with self.assertRaises(IndexError):
+            replayer.board_at(len(journal) + 1)
+
+        # Seeking copies the closest snapshot, and only drops the tokens since
+        with mock.patch.object(Board, 'add_single_token_no_check', autospec=True,
+                               side_effect=Board.add_single_token_no_check) as drop:
+            b = replayer.board_at(len(journal))
+        since = journal.entries[len(journal) // 8 * 8:]
+        self.assertEqual(drop.call_count, sum(len(e.tokens) for e in since if e.kind != JournalEntry.EXCHANGE))
+        self.assertEqual(b.dropped, expected[-1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import multiprocessing
+import random
+import unittest
+
+from nutok.tokens import TokenStack
+from nutok.board import Board
+from nutok.mcts import unseen_tokens, MctsSearch, MctsPlayer
+
+
+class TestMcts(unittest.TestCase):
+
+    def setUp(self):
+        self.b = Board(4)
+        self.stack = TokenStack(self.b.token_set, random.Random(3))
+        self.b.drop_first_token(self.stack.pick())
+        self.rack = self.stack.pick_many(4)
+        self.opponent_rack = self.stack.pick_many(4)
+
+    def test_unseen_tokens(self):
+        unseen = unseen_tokens(self.b, self.rack)
+        self.assertEqual(len(unseen), len(self.stack) + 4)
+        hidden = self.stack.stack + self.opponent_rack
+        self.assertEqual(sorted(t.code for t in unseen), sorted(t.code for t in hidden))
+
+    def test_search(self):
+        dropped = dict(self.b.dropped)
+        search = MctsSearch(self.b, self.rack, len(self.stack), rng=random.Random(0))
+        search.run(10., max_iterations=200)
+        self.assertEqual(search.iterations, 200)
+        # The board is left untouched
+        self.assertEqual(self.b.dropped, dropped)
+        self.assertEqual(self.b.nb_pushed_moves(), 0)
+
+        stats = search.statistics()
+        self.assertEqual(set(stats), set(self.b.legal_moves(self.rack)))
+        self.assertEqual(sum(v for v, _ in stats.values()), 200)
+        self.assertTrue(all(0 <= r <= v for v, r in stats.values()))
+
+    def test_determinize(self):
+        search = MctsSearch(self.b, self.rack, len(self.stack), rng=random.Random(0))
+        state = search.determinize()
+        self.assertEqual(state.racks[0], self.rack)
+        self.assertEqual(len(state.racks[1]), 4)
+        self.assertEqual(len(state.stack), len(self.stack))
+
+        # Opponents hold tokens even if the stack size leaves none to them
+        search = MctsSearch(self.b, self.rack, len(self.stack) + 4, nb_opponents=2, rng=random.Random(0))
+        state = search.determinize()
+        self.assertEqual([len(r) for r in state.racks], [4, 4, 4])
+
+        # Unseen tokens kept up to date by the game are used as they are
+        search = MctsSearch(self.b, self.rack, 0, unseen=self.opponent_rack, rng=random.Random(0))
+        state = search.determinize()
+        self.assertEqual(sorted(t.code for t in state.racks[1]), sorted(t.code for t in self.opponent_rack))
+
+    def test_player(self):
+        player = MctsPlayer(time_budget=10., max_iterations=100, seed=0)
+        move = player.choose(self.b, self.rack, len(self.stack))
+        self.assertIn(move, self.b.legal_moves(self.rack))
+        moves = self.b.legal_moves(self.rack)
+        self.assertEqual(move.score, moves[moves.index(move)].score)
+        self.assertEqual(player.statistics[move][0], max(v for v, _ in player.statistics.values()))
+
+    def test_root_parallel(self):
+        player = MctsPlayer(time_budget=10., processes=2, max_iterations=50, seed=0)
+        move = player.choose(self.b, self.rack, len(self.stack))
+        self.assertIn(move, self.b.legal_moves(self.rack))
+        # Worker processes do not outlive the search
+        self.assertEqual(multiprocessing.active_children(), [])
+        # Visit counts of both searches are merged
+        self.assertEqual(sum(v for v, _ in player.statistics.values()), 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
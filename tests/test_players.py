@@ -0,0 +1,129 @@
+import contextlib
+import io
+import random
+import unittest
+
+from nutok.tokens import TokenStack
+from nutok.board import Board
+from nutok.players import GreedyPlayer, MultiTokenPlayer, LookaheadPlayer
+
+
+class StepClock:
+
+    def __init__(self, step: float):
+        """Clock moving forward by step seconds every time it is read"""
+        self.step = step
+        self.now = 0.
+        self.reads = 0
+
+    def __call__(self) -> float:
+        self.reads += 1
+        self.now += self.step
+        return self.now
+
+
+class TestPlayers(unittest.TestCase):
+
+    def play(self, player, order=4, seed=0):
+        """Lets the player drop all the tokens it can, and returns the board"""
+        b = Board(order)
+        stack = TokenStack(b.token_set, random.Random(seed))
+        b.drop_first_token(stack.pick())
+        rack = stack.pick_many(order)
+        for _ in range(10):
+            move = player.choose(b, rack, len(stack))
+            if move is None:
+                k = player.exchange_index(b, rack)
+                self.assertTrue(0 <= k < len(rack))
+                break
+            score = move.score
+            self.assertTrue(b.add_multi_token(move.tokens, move.pos_a, move.pos_b))
+            self.assertEqual(b.score_count(*move.pos_b), score)
+            for t in move.tokens:
+                rack.remove(t)
+            rack += stack.pick_many(order - len(rack))
+        return b
+
+    def test_greedy(self):
+        player = GreedyPlayer()
+        b = self.play(player)
+        rack = b.token_set.all_tokens()[:4]
+        move = player.choose(b, rack, 0)
+        self.assertEqual(move.score, max(m.score for m in b.legal_moves(rack, multi=False)))
+
+    def test_multi_token(self):
+        self.play(MultiTokenPlayer(), order=5)
+
+        # Out of time, the best scoring move is played
+        player = MultiTokenPlayer(time_budget=0.)
+        player.clock = StepClock(1.)
+        b = self.play(GreedyPlayer(), order=5)
+        rack = b.token_set.all_tokens()[:5]
+        move = player.choose(b, rack, 0)
+        self.assertEqual(move.score, max(m.score for m in b.legal_moves(rack)))
+        self.assertEqual(player.clock.reads, 2)
+
+    def test_lookahead(self):
+        self.play(LookaheadPlayer(time_budget=0.05), order=5)
+
+        b = Board(6)
+        stack = TokenStack(b.token_set, random.Random(1))
+        b.drop_first_token(stack.pick())
+        rack = stack.pick_many(6)
+
+        # A stopped clock lets the search go to the maximum depth
+        player = LookaheadPlayer(time_budget=1., max_depth=3, beam=4)
+        player.clock = StepClock(0.)
+        self.assertIsNotNone(player.choose(b, rack, len(stack)))
+        self.assertEqual(player.depth, 3)
+
+        # The search stops at the first position visited after the deadline
+        player = LookaheadPlayer(time_budget=1., max_depth=10, beam=50)
+        player.clock = StepClock(0.25)
+        self.assertIsNotNone(player.choose(b, rack, len(stack)))
+        self.assertEqual(player.clock.reads, 6)
+        self.assertLess(player.depth, 10)
+
+    def test_cli_game(self):
+        """Games between bots must go on until the end"""
+        from cli_game import CliGame
+        from nutok.journal import MoveJournal, JournalReplayer
+
+        journal = MoveJournal(3)
+        # A generous time budget keeps the game reproducible
+        bots = {0: GreedyPlayer(), 1: LookaheadPlayer(time_budget=10., max_depth=2)}
+        game = CliGame(3, 2, random.Random(2), journal=journal, bots=bots)
+        self.assertIs(bots[1].unseen, game.unseen[1])
+        with contextlib.redirect_stdout(io.StringIO()):
+            stop = False
+            for turn in range(500):
+                stop = game.play_player(turn % 2)
+                if stop:
+                    break
+        self.assertTrue(stop)
+        self.assertEqual(JournalReplayer(journal).board_at(len(journal)).dropped, game.b.dropped)
+
+    def test_set_state(self):
+        """Bots must keep up with the game after it is restored"""
+        from cli_game import CliGame
+        from nutok.unseen import UnseenTokens
+
+        bots = {0: GreedyPlayer(), 1: GreedyPlayer()}
+        game = CliGame(4, 2, random.Random(5), bots=bots)
+        with contextlib.redirect_stdout(io.StringIO()):
+            for turn in range(4):
+                game.play_player(turn % 2)
+            state = game.get_state()
+            for turn in range(4, 10):
+                game.play_player(turn % 2)
+            game.set_state(state)
+            for turn in range(4, 8):
+                game.play_player(turn % 2)
+        for k, bot in bots.items():
+            self.assertIs(bot.unseen, game.unseen[k])
+            expected = UnseenTokens.from_board(game.b, game.get_player_tokens(k))
+            self.assertEqual(bot.unseen.counts, expected.counts)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+
+from nutok.tokens import Shape, Color, Token
+from nutok.board import Board
+from nutok.render import BoardRenderer
+
+
+class TestBoardRenderer(unittest.TestCase):
+
+    def setUp(self):
+        self.tsp = Token(Shape.SQUARE, Color.PURPLE)
+        self.tdp = Token(Shape.DIAMOND, Color.PURPLE)
+        self.tcp = Token(Shape.CIRCLE, Color.PURPLE)
+        self.tsw = Token(Shape.SQUARE, Color.WHITE)
+
+        # Here, b is:
+        # ■p  ◆p  ●p
+        # ■w
+        self.b = Board(8)
+        self.b.drop_first_token(self.tsp)
+        self.b.add_single_token(self.tdp, 0, 1)
+        self.b.add_single_token(self.tcp, 0, 2)
+        self.b.add_single_token(self.tsw, -1, 0)
+
+    def test_render(self):
+        self.assertEqual(str(Board(3)), Board.EMPTY_BOARD_TXT)
+        self.assertEqual(str(self.b), "■p  ◆p  ●p  \n■w          \n")
+        self.assertEqual(
+            self.b.str_with_indices(),
+            "  0  ■p  ◆p  ●p  \n"
+            " -1  ■w          \n"
+            "     0   1   2   "
+        )
+
+    def test_viewport(self):
+        r = BoardRenderer(self.b, viewport=(-1, 1, 1, 3))
+        self.assertEqual(r.render(), "            \n◆p  ●p      \n            \n")
+        r = BoardRenderer(Board(3), viewport=(0, 0, 0, 1))
+        self.assertEqual(r.render(), "        \n")
+
+    def test_changed_rows(self):
+        r = BoardRenderer(self.b, viewport=(-2, 1, -1, 3))
+        self.assertEqual(len(r.changed_rows()), 4)
+        self.assertEqual(r.changed_rows(), dict())
+
+        self.b.add_single_token(self.tsp, 1, 2)
+        changed = r.changed_rows()
+        self.assertEqual(list(changed), [1])
+        self.assertEqual(r.frame(), BoardRenderer(self.b, viewport=(-2, 1, -1, 3)).rows())
+
+        # The window follows the board: it grows, so all rows are rendered again
+        r = BoardRenderer(self.b)
+        r.changed_rows()
+        self.b.add_single_token(self.tsw, 1, 3)
+        self.assertEqual(len(r.changed_rows()), 3)
+        self.assertEqual("".join([line + "\n" for line in r.frame()]), str(self.b))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import random
+import unittest
+
+from nutok.tokens import TokenSet, TokenStack
+from nutok.simulation import try_a_game
+from nutok.serialization import dump_board, load_board, dump_stack, load_stack, dump_game, load_game, \
+    zigzag, unzigzag, write_varint, read_varint
+
+
+class TestSerialization(unittest.TestCase):
+
+    def test_varint(self):
+        buffer = bytearray()
+        values = [0, 1, 127, 128, 300, 1 << 40]
+        for v in values:
+            write_varint(buffer, v)
+        self.assertEqual(len(buffer), 1 + 1 + 1 + 2 + 2 + 6)
+        pos = 0
+        for v in values:
+            value, pos = read_varint(buffer, pos)
+            self.assertEqual(value, v)
+
+        for v in [0, -1, 1, -2, 2, -1000, 1000]:
+            self.assertGreaterEqual(zigzag(v), 0)
+            self.assertEqual(unzigzag(zigzag(v)), v)
+
+    def test_board(self):
+        _, b = try_a_game(order=5, rng=random.Random(4))
+        data = dump_board(b)
+        self.assertLessEqual(len(data), 5 + 1 + 2 + 3 * len(b))
+        loaded = load_board(data)
+        self.assertEqual(loaded.order, b.order)
+        self.assertEqual(list(loaded.dropped.items()), list(b.dropped.items()))
+        self.assertEqual(loaded.zobrist_hash(), b.zobrist_hash())
+
+        with self.assertRaises(ValueError):
+            load_stack(data)
+
+    def test_game(self):
+        ts = TokenSet(4)
+        stack = TokenStack(ts, random.Random(1))
+        _, b = try_a_game(order=4, rng=random.Random(1))
+        players = [
+            dict(tokens=stack.pick_many(4), name="Ève", score=12),
+            dict(tokens=[], name="Player 1", score=0),
+        ]
+        loaded_b, loaded_stack, loaded_players = load_game(dump_game(b, stack, players))
+        self.assertEqual(loaded_b.dropped, b.dropped)
+        self.assertEqual(loaded_stack.stack, stack.stack)
+        self.assertEqual(loaded_players, players)
+
+        self.assertEqual(load_stack(dump_stack(4, stack)).stack, stack.stack)
+
+        # Loading does not draw from the source of randomness it is given
+        rng = random.Random(1)
+        loaded_stack = load_stack(dump_stack(4, stack), rng)
+        self.assertIs(loaded_stack.rng, rng)
+        self.assertEqual(rng.getstate(), random.Random(1).getstate())
+        _, loaded_stack, _ = load_game(dump_game(b, stack, players), rng)
+        self.assertEqual(rng.getstate(), random.Random(1).getstate())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+import asyncio
+import itertools
+import json
+import unittest
+
+from nutok.server import GameServer
+
+
+class Client:
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, server):
+        return cls(*await asyncio.open_connection(*server.address))
+
+    async def send(self, msg):
+        self.writer.write(msg.encode("utf8") + b"\n")
+        await self.writer.drain()
+
+    async def receive(self):
+        return json.loads(await asyncio.wait_for(self.reader.readline(), 5))
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+class TestServer(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        # The debug mode of the test loop records a traceback for every callback
+        asyncio.get_running_loop().set_debug(False)
+        self.server = GameServer(seed=0)
+        await self.server.start()
+
+    async def asyncTearDown(self):
+        await self.server.close()
+
+    async def start_game(self, order=3):
+        alice, bob = await Client.connect(self.server), await Client.connect(self.server)
+        await alice.send(f"new {order} 2")
+        joined = await alice.receive()
+        self.assertEqual(joined, dict(type="joined", game=joined['game'], seat=0))
+
+        await bob.send("list")
+        self.assertIn(joined['game'], [g['game'] for g in (await bob.receive())['games']])
+        await bob.send(f"join {joined['game']}")
+        self.assertEqual((await bob.receive())['seat'], 1)
+        states = [await alice.receive(), await bob.receive()]
+        self.assertEqual([s['type'] for s in states], ["state", "state"])
+        return alice, bob, self.server.games[joined['game']]
+
+    async def test_game(self):
+        alice, bob, session = await self.start_game()
+        game = session.game
+
+        await bob.send("exchange 1")
+        self.assertEqual(await bob.receive(), dict(type="error", reason="not your turn"))
+        await alice.send("dance")
+        self.assertEqual((await alice.receive())['type'], "error")
+
+        # Plays the first move a bot would find, by the command grammar
+        for seat, client in enumerate([alice, bob]):
+            rack = game.get_player_tokens(seat)
+            moves = game.b.legal_moves(rack, multi=False)
+            if moves:
+                m = moves[0]
+                await client.send(f"play {rack.index(m.tokens[0]) + 1} {m.pos_a[0]} {m.pos_a[1]}")
+            else:
+                await client.send("exchange 1")
+            states = [await alice.receive(), await bob.receive()]
+            self.assertEqual([s['to_move'] for s in states], [1 - seat, 1 - seat])
+            self.assertEqual(states[seat]['rack'], [str(t) for t in game.get_player_tokens(seat)])
+            self.assertEqual(states[0]['scores'], [game.get_score(0), game.get_score(1)])
+
+        # Leaving ends the game for everyone
+        await alice.send("quit")
+        self.assertEqual((await alice.receive())['type'], "over")
+        self.assertEqual((await bob.receive())['reason'], "a player left")
+        self.assertNotIn(session.game_id, self.server.games)
+
+        # Both players are back in the lobby
+        await bob.send("play 1 0 1")
+        self.assertEqual((await bob.receive())['type'], "error")
+
+        # Games need enough tokens to deal full racks
+        await bob.send("new 2 100000000")
+        self.assertEqual(await bob.receive(),
+                         dict(type="error", reason="number of players must be in [1, 5] for order 2"))
+        await bob.send("new 2 5")
+        self.assertEqual((await bob.receive())['type'], "joined")
+        await alice.close()
+        await bob.close()
+
+    async def test_many_games(self):
+        """Games run side by side, each one until its end"""
+        async def play(order):
+            alice, bob, session = await self.start_game(order)
+            clients = [alice, bob]
+            game = session.game
+            over = False
+            for turn in itertools.count():
+                seat = game.to_move
+                rack = game.get_player_tokens(seat)
+                moves = game.b.legal_moves(rack, multi=False)
+                if turn == 100:
+                    # Players may exchange tokens forever
+                    await clients[seat].send("q")
+                elif moves:
+                    m = moves[0]
+                    await clients[seat].send(f"p {rack.index(m.tokens[0]) + 1} {m.pos_a[0]} {m.pos_a[1]}")
+                elif len(game.stack):
+                    await clients[seat].send("e 1")
+                else:
+                    await clients[seat].send("q")
+                for c in clients:
+                    msg = await c.receive()
+                    if msg['type'] == "state":
+                        continue
+                    self.assertEqual(msg['type'], "over")
+                    over = True
+                if not over and game.over:
+                    for c in clients:
+                        self.assertEqual((await c.receive())['type'], "over")
+                    over = True
+                if over:
+                    break
+            for c in clients:
+                await c.close()
+            return game
+
+        games = await asyncio.gather(*[play(3 + k % 3) for k in range(12)])
+        self.assertTrue(all(g.over for g in games))
+        self.assertEqual(self.server.games, dict())
+
+
+if __name__ == '__main__':
+    unittest.main()
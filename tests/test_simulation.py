@@ -0,0 +1,35 @@
+import unittest
+
+from nutok.simulation import SimulationEngine
+
+
+class TestSimulationEngine(unittest.TestCase):
+
+    def test_deterministic(self):
+        """Records must not depend on the number of processes"""
+        serial = SimulationEngine(order=4, seed=3, processes=1).run(6)
+        parallel = SimulationEngine(order=4, seed=3, processes=2, chunksize=1).run(6)
+        serial = sorted(serial, key=lambda r: r.index)
+        parallel = sorted(parallel, key=lambda r: r.index)
+        self.assertEqual([r.index for r in serial], list(range(6)))
+        for ra, rb in zip(serial, parallel):
+            self.assertEqual(ra.seed, rb.seed)
+            self.assertEqual(ra.move_count, rb.move_count)
+            self.assertEqual(ra.cells, rb.cells)
+            self.assertEqual(ra.stack, rb.stack)
+
+    def test_record(self):
+        record = next(SimulationEngine(order=3, processes=1).run(1))
+        b = record.board()
+        self.assertEqual(len(b), len(record.cells))
+        self.assertEqual(len(b), record.move_count + 1)
+        self.assertLessEqual(len(b) + len(record.stack_tokens()), 3 * 3 * 3)
+
+    def test_stop_when(self):
+        engine = SimulationEngine(order=3, processes=2)
+        records = list(engine.run(stop_when=lambda r: r.move_count >= 3))
+        self.assertGreaterEqual(records[-1].move_count, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
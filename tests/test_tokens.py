@@ -1,6 +1,8 @@
+import pickle
+import random
 import unittest
 
-from nutok.tokens import Shape, Color, Token, TokenSet
+from nutok.tokens import Shape, Color, Token, TokenSet, TokenStack, line_masks
 
 
 class TestToken(unittest.TestCase):
@@ -33,6 +35,20 @@ class TestToken(unittest.TestCase):
                 self.assertNotEqual(tia, tjb)
                 self.assertNotEqual(tib, tja)
 
+    def test_token_encoding(self):
+        """Tests the interning and the integer encoding of the tokens"""
+        codes = set()
+        for s in Shape:
+            for c in Color:
+                t = Token(s, c)
+                self.assertIs(t, Token(s, c))
+                self.assertIs(t, Token.from_code(t.code))
+                self.assertIs(t, pickle.loads(pickle.dumps(t)))
+                self.assertEqual(t.shape_bit, 1 << s.value)
+                self.assertEqual(t.color_bit, 1 << c.value)
+                codes.add(t.code)
+        self.assertEqual(codes, set(range(len(Shape) * len(Color))))
+
     def test_sizes(self):
         """Tests the number of tokens"""
         for k in range(1, len(Shape) + 1):
@@ -101,6 +117,80 @@ class TestToken(unittest.TestCase):
         # Line too long to be consistent
         self.assertFalse(ts.line_consistency([tsp, tsb, tst, tsg, tsy, tso, tsr, tsw, tsp, tsp]))
 
+    def test_mask_consistency(self):
+        """Mask-based checks must agree with the definition of consistency"""
+        ts = TokenSet(4)
+        tokens = ts.all_tokens()
+        lines = [[ta, tb] for ta in tokens for tb in tokens]
+        lines += [[ta, tb, tc] for ta in tokens for tb in tokens for tc in tokens]
+        for line in lines:
+            shapes = {t.shape for t in line}
+            colors = {t.color for t in line}
+            expected = (len(shapes) == 1 and len(colors) == len(line)) or \
+                       (len(colors) == 1 and len(shapes) == len(line))
+            shape_mask, color_mask = line_masks(line)
+            self.assertEqual(ts.mask_consistency(len(line), shape_mask, color_mask), expected)
+            self.assertEqual(ts.line_consistency(line), expected)
+
+
+class TestTokenStack(unittest.TestCase):
+
+    def test_seeded(self):
+        """Stacks with the same seed must behave identically"""
+        ts = TokenSet(4)
+        sa = TokenStack(ts, random.Random(7))
+        sb = TokenStack(ts, random.Random(7))
+        self.assertEqual(sa.stack, sb.stack)
+        for s in [sa, sb]:
+            t = s.pick()
+            s.randomly_append(t)
+        self.assertEqual(sa.stack, sb.stack)
+
+    def test_pick(self):
+        s = TokenStack(TokenSet(3), random.Random(0))
+        self.assertEqual(len(s), 27)
+        expected = list(reversed(s.stack))
+        self.assertEqual(s.peek(), expected[0])
+        self.assertEqual(s.pick(), expected[0])
+        self.assertEqual(s.pick_many(5), expected[1:6])
+        self.assertEqual(len(s), 21)
+        self.assertEqual(s.pick_many(30), expected[6:])
+        self.assertTrue(s.is_empty())
+        self.assertEqual(s.pick_many(1), [])
+
+    def test_randomly_append(self):
+        """Appended tokens go anywhere but on top, uniformly"""
+        ts = TokenSet(2)
+        t = Token(Shape.STAR, Color.RED)
+        rng = random.Random(5)
+        counts = [0] * 4
+        for _ in range(4000):
+            s = TokenStack(ts, rng)
+            top = s.peek()
+            s.randomly_append(t)
+            self.assertEqual(len(s), 13)
+            self.assertIs(s.pick(), top)
+            counts[s.stack.index(t) % 4] += 1
+        for c in counts:
+            self.assertAlmostEqual(c / 4000, 0.25, delta=0.03)
+
+    def test_state(self):
+        """Restoring a snapshot must replay the same draws"""
+        s = TokenStack(TokenSet(4), random.Random(3))
+        state = s.get_state()
+
+        def play(_s):
+            drawn = list()
+            for _ in range(20):
+                t = _s.pick()
+                _s.randomly_append(t)
+                drawn.append(_s.pick())
+            return drawn
+
+        first = play(s)
+        s.set_state(state)
+        self.assertEqual(play(s), first)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+
+from nutok.tokens import Shape, Color, Token
+from nutok.transposition import TranspositionTable
+from nutok.zobrist import zobrist_rack, zobrist_turn
+
+
+class TestTranspositionTable(unittest.TestCase):
+
+    def test_store_probe(self):
+        tt = TranspositionTable(16)
+        self.assertIsNone(tt.probe(42))
+        tt.store(42, depth=3, value=10, flag=TranspositionTable.LOWER_BOUND)
+        e = tt.probe(42)
+        self.assertEqual(e.value, 10)
+        self.assertEqual(e.depth, 3)
+        self.assertEqual(e.flag, TranspositionTable.LOWER_BOUND)
+        self.assertEqual(tt.hits, 1)
+        self.assertEqual(tt.misses, 1)
+
+    def test_replacement(self):
+        """Deep entries are kept, shallow ones go to the second entry"""
+        tt = TranspositionTable(16)
+        ka, kb, kc = 5, 5 + 16, 5 + 32
+        tt.store(ka, depth=5, value='a')
+        tt.store(kb, depth=1, value='b')
+        tt.store(kc, depth=2, value='c')
+        self.assertEqual(tt.probe(ka).value, 'a')
+        self.assertIsNone(tt.probe(kb))
+        self.assertEqual(tt.probe(kc).value, 'c')
+        self.assertEqual(len(tt), 2)
+
+        # Entries of a previous search are always replaced
+        tt.new_search()
+        tt.store(kb, depth=0, value='b')
+        self.assertIsNone(tt.probe(ka))
+        self.assertEqual(tt.probe(kb).value, 'b')
+
+    def test_rack_hash(self):
+        tsp = Token(Shape.SQUARE, Color.PURPLE)
+        tdp = Token(Shape.DIAMOND, Color.PURPLE)
+        self.assertEqual(zobrist_rack([tsp, tdp]), zobrist_rack([tdp, tsp]))
+        self.assertNotEqual(zobrist_rack([tsp, tsp]), zobrist_rack([]))
+        self.assertNotEqual(zobrist_rack([tsp, tsp]), zobrist_rack([tsp]))
+
+        # Racks are told apart by their seat, as well as the player to move
+        self.assertEqual(zobrist_turn([[tsp, tdp], [tsp]], 0), zobrist_turn([[tdp, tsp], [tsp]], 0))
+        self.assertNotEqual(zobrist_turn([[tsp], [tdp]], 0), zobrist_turn([[tdp], [tsp]], 0))
+        self.assertNotEqual(zobrist_turn([[tsp], [tdp]], 0), zobrist_turn([[tsp], [tdp]], 1))
+        self.assertNotEqual(zobrist_turn([[tsp], [tdp]], 0), zobrist_turn([[tsp], [tdp]], 0, plies_left=1))
+        self.assertNotEqual(zobrist_turn([[tsp], [tdp]], 1, plies_left=0),
+                            zobrist_turn([[tsp], [tdp]], 0, plies_left=256))
+
+
+if __name__ == '__main__':
+    unittest.main()
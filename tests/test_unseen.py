@@ -0,0 +1,87 @@
+import collections
+import random
+import unittest
+
+from nutok.tokens import Shape, Color, Token, TokenStack, tokens_mask
+from nutok.board import Board
+from nutok.unseen import UnseenTokens
+
+
+class TestUnseenTokens(unittest.TestCase):
+
+    def test_tracking(self):
+        """Counts kept up to date on every event must match a recount"""
+        rng = random.Random(0)
+        b = Board(4)
+        stack = TokenStack(b.token_set, rng)
+        b.drop_first_token(stack.pick())
+        racks = [stack.pick_many(4), stack.pick_many(4)]
+        unseen = UnseenTokens.from_board(b, racks[0])
+
+        for turn in range(40):
+            player = turn % 2
+            rack = racks[player]
+            moves = b.legal_moves(rack, multi=False)
+            if moves:
+                m = rng.choice(moves)
+                b.add_single_token(m.tokens[0], *m.pos_a)
+                rack.remove(m.tokens[0])
+                unseen.record_drop(m.tokens[0], own=player == 0)
+                if not stack.is_empty():
+                    t = stack.pick()
+                    rack.append(t)
+                    if player == 0:
+                        unseen.record_draw(t)
+            elif not stack.is_empty():
+                given = rack.pop(0)
+                stack.randomly_append(given)
+                drawn = stack.pick()
+                rack.append(drawn)
+                if player == 0:
+                    unseen.record_exchange(given, drawn)
+
+            expected = UnseenTokens.from_board(b, racks[0])
+            self.assertEqual(unseen.counts, expected.counts)
+            self.assertEqual(len(unseen), len(stack) + len(racks[1]))
+            self.assertEqual(collections.Counter(unseen.tokens()), collections.Counter(stack.stack + racks[1]))
+
+    def test_probabilities(self):
+        b = Board(3)
+        tsp = Token(Shape.SQUARE, Color.PURPLE)
+        tdp = Token(Shape.DIAMOND, Color.PURPLE)
+        b.drop_first_token(tsp)
+        unseen = UnseenTokens.from_board(b, [tsp, tdp])
+        self.assertEqual(len(unseen), 27 - 3)
+        self.assertEqual(unseen.count(tsp), 1)
+        self.assertAlmostEqual(unseen.probability(tdp), 2 / 24)
+        self.assertAlmostEqual(sum(unseen.probability(t) for t in b.token_set.all_tokens()), 1.)
+
+        mask = b.admissible_mask(0, 1)
+        self.assertEqual(unseen.mask_count(mask), 2 + 3 + 3 + 3)
+        self.assertAlmostEqual(unseen.mask_probability(mask), 11 / 24)
+        self.assertAlmostEqual(unseen.mask_probability(tokens_mask([tsp])), 1 / 24)
+        # Among 14 draws, at least one is one of the 11 tokens
+        self.assertAlmostEqual(unseen.mask_probability(mask, draws=14), 1.)
+        self.assertAlmostEqual(unseen.mask_probability(mask, draws=2), 1 - (13 / 24) * (12 / 23))
+
+    def test_sample_racks(self):
+        b = Board(3)
+        b.drop_first_token(Token(Shape.SQUARE, Color.PURPLE))
+        unseen = UnseenTokens.from_board(b, [])
+        rng = random.Random(1)
+        seen = collections.Counter()
+        for _ in range(2000):
+            racks = unseen.sample_racks([3, 3], rng)
+            self.assertEqual([len(r) for r in racks], [3, 3])
+            sample = collections.Counter(racks[0] + racks[1])
+            self.assertTrue(all(c <= unseen.count(t) for t, c in sample.items()))
+            seen.update(racks[0])
+        # Every unseen token is as likely to be drawn
+        for t in b.token_set.all_tokens():
+            self.assertAlmostEqual(seen[t] / 6000, unseen.probability(t), delta=0.015)
+
+        self.assertEqual([len(r) for r in unseen.sample_racks([20, 20], rng)], [20, 6])
+
+
+if __name__ == '__main__':
+    unittest.main()